@@ -18,13 +18,42 @@ If not, see https://www.gnu.org/licenses/.
 
 import base64
 import csv
+import hashlib
 import io
+import itertools
+import json
+import math
+import multiprocessing
 import re
 import os
-from dash import Dash, html, dcc, Input, Output, State, callback, no_update, ctx
+import queue
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager
+from flask import Response, g, has_request_context, jsonify, request
+from dash import (
+    Dash,
+    html,
+    dcc,
+    Input,
+    Output,
+    State,
+    callback,
+    clientside_callback,
+    no_update,
+    ctx,
+    Patch,
+)
 import dash_bootstrap_components as dbc
 import dash_leaflet as dl
-import pandas as pd
+import numpy as np
 
 # Constants matching the JavaScript version
 GLIDE_RATIO_MIN = 1
@@ -50,9 +79,256 @@ OUTLANDING = 3
 GLIDING_AIRFIELD = 4
 AIRPORT = 5
 
+# Styles that are landing spots; all other waypoints are ignored
+LANDING_STYLES = (GRASS_SURFACE, OUTLANDING, GLIDING_AIRFIELD, AIRPORT)
+
+# Marker line that starts the tasks section at the end of a CUP file
+TASKS_SECTION_MARKER = "-----Related Tasks-----"
+
+# Number of CUP lines split and decoded per vectorized batch while streaming
+CUP_PARSE_BATCH_SIZE = 8192
+
+# Uploads are hashed and base64-decoded this many characters at a time (a
+# multiple of 4), so no full copy of the file is made
+UPLOAD_CHUNK_CHARS = 1 << 20
+
+# Largest CUP file accepted for upload, checked before decoding; 0 disables it
+UPLOAD_MAX_BYTES = int(os.environ.get("GLIDEMAP_UPLOAD_MAX_MB", "50")) << 20
+
+# Longest CUP elevation string decoded without falling back to the scalar parser
+CUP_ELEVATION_WIDTH = 15
+
+# Powers of ten used by the vectorized CUP decoders
+_POWERS_OF_TEN = 10 ** np.arange(16, dtype=np.int64)
+
+# Color mapping for different landing site types (matching JavaScript version)
+STYLE_COLORS = {
+    AIRPORT: "#AAC896",  # Green for airports
+    GLIDING_AIRFIELD: "#AAC896",  # Green for gliding airfields
+    GRASS_SURFACE: "#AAAADC",  # Blue for grass strips
+    OUTLANDING: "#E6E696",  # Yellow for landable fields
+}
+
+# Landing site styles drawn in each map layer
+LAYER_STYLES = {
+    "airports": (AIRPORT, GLIDING_AIRFIELD),
+    "grass": (GRASS_SURFACE,),
+    "landables": (OUTLANDING,),
+}
+
+# Server-side dataset registry: parsed tables are kept in memory up to this many
+# bytes (least recently used evicted first) and spilled to disk so every worker
+# can reload a dataset from its key
+DATASET_CACHE_MAX_BYTES = int(os.environ.get("GLIDEMAP_DATASET_CACHE_MB", "256")) << 20
+DATASET_SPILL_DIR = os.environ.get(
+    "GLIDEMAP_DATASET_DIR", os.path.join(tempfile.gettempdir(), "glidemap-datasets")
+)
+DATASET_SPILL_MAX_BYTES = int(os.environ.get("GLIDEMAP_DATASET_DIR_MB", "1024")) << 20
+
+# Memory budget of one uploaded dataset, as counted for GLIDEMAP_DATASET_CACHE_MB
+# (0 for no limit). Larger uploads are rejected, or with "downsample" thinned to
+# every 2nd, 4th, ... spot while parsing, so they never exceed the budget
+DATASET_MAX_BYTES = int(os.environ.get("GLIDEMAP_DATASET_MAX_MB", "64")) << 20
+DATASET_DOWNSAMPLE = (
+    os.environ.get("GLIDEMAP_DATASET_OVER_BUDGET", "reject").lower() == "downsample"
+)
+
+# Trace allocations with tracemalloc and log the peak and retained bytes of
+# each upload and render stage. Slows the app down noticeably; for profiling only
+MEMORY_TRACING = os.environ.get("GLIDEMAP_MEMORY_TRACE", "0") == "1"
+
+# Uploads of at least this many bytes (as a base64 data URL) are parsed by a
+# background job, so the request returns at once and the browser polls for
+# progress. Jobs run in subprocesses and hand the dataset back through
+# DATASET_SPILL_DIR, so 0 or an empty spill directory parses every upload in
+# the request
+BACKGROUND_UPLOAD_MIN_BYTES = (
+    int(os.environ.get("GLIDEMAP_BACKGROUND_UPLOAD_MB", "2")) << 20
+)
+BACKGROUND_UPLOADS = BACKGROUND_UPLOAD_MIN_BYTES > 0 and bool(DATASET_SPILL_DIR)
+BACKGROUND_JOB_DIR = os.environ.get(
+    "GLIDEMAP_BACKGROUND_DIR", os.path.join(tempfile.gettempdir(), "glidemap-jobs")
+)
+BACKGROUND_POLL_MS = 500
+
+# How glide-parameter changes reach the map: "server" rebuilds the layers in
+# update_map_layers; "clientside" recomputes only the radii in the browser and
+# involves the server only when the dataset or layer toggles change
+RADIUS_UPDATE_MODE = os.environ.get("GLIDEMAP_RADIUS_UPDATES", "server").lower()
+
+# Directory of SRTM .hgt elevation tiles (N42W072.hgt, ...). When set, each
+# layer is drawn as terrain-aware reach polygons instead of circles: radial
+# glide paths from every spot stop where the terrain, plus the arrival height,
+# blocks them. Missing tiles and voids do not block
+TERRAIN_DEM_DIR = os.environ.get("GLIDEMAP_TERRAIN_DIR", "")
+TERRAIN_RENDERING = bool(TERRAIN_DEM_DIR)
+# Radial glide paths per spot, the spacing of terrain samples along them
+# (about the 3 arc-second SRTM grid) and the samples per radial looked up at a
+# time, which bounds the memory of a chunk of spots
+TERRAIN_RADIALS = 72
+TERRAIN_STEP_M = 90.0
+TERRAIN_CHUNK_STEPS = 64
+# Processes computing reach polygons (0 computes them in the request) and the
+# spots handed to a process at a time. Each gunicorn worker starts its own pool
+TERRAIN_WORKERS = int(os.environ.get("GLIDEMAP_TERRAIN_WORKERS", "2"))
+TERRAIN_CHUNK_SITES = 32
+# Most polygons drawn per layer; beyond this the spots nearest the view win
+TERRAIN_MAX_SITES = int(os.environ.get("GLIDEMAP_TERRAIN_MAX_SITES", "2000"))
+# Reach polygons kept in memory per worker, per spot and glide parameters
+TERRAIN_CACHE_ENTRIES = 100000
+
+# How layers are drawn: "geojson" sends one dl.GeoJSON per layer whose circles
+# and popups are built in the browser; "circles" sends one dl.Circle component
+# per spot; "envelope" sends the union of each layer's range disks as one
+# simplified GeoJSON multipolygon, cached per dataset, glide parameters and zoom
+# level. Envelopes are always computed on the server
+RENDER_MODE = os.environ.get("GLIDEMAP_RENDER_MODE", "geojson").lower()
+ENVELOPE_RENDERING = RENDER_MODE == "envelope"
+GEOJSON_RENDERING = RENDER_MODE not in ("circles", "envelope")
+CLIENTSIDE_RADIUS_UPDATES = (
+    RADIUS_UPDATE_MODE == "clientside"
+    and not ENVELOPE_RENDERING
+    and not TERRAIN_RENDERING
+)
+# Envelope outlines are accurate to about this many screen pixels
+ENVELOPE_TOLERANCE_PX = 2
+# Longest side, in cells, of the raster an envelope is traced from
+ENVELOPE_MAX_CELLS = 2048
+# From this zoom level on, an envelope covers only the padded map view, so its
+# raster stays within ENVELOPE_MAX_CELLS at full resolution
+ENVELOPE_CLIP_MIN_ZOOM = 11
+
+# Level of detail: at zoom levels up to LOD_MAX_ZOOM, nearby spots of the same
+# layer are drawn as one representative circle covering all their range disks.
+# Clusters are grid cells about LOD_CLUSTER_PX screen pixels wide, built once
+# per dataset for every zoom level from LOD_MIN_ZOOM. Only spots within
+# LOD_MAX_OFFSET of their own range from the cluster center are merged, so a
+# cluster circle claims at most 2 * LOD_MAX_OFFSET more range than a member
+# has; the rest are drawn singly. Cluster radii depend on every member, so
+# clustering is off with clientside radius updates
+LEVEL_OF_DETAIL = (
+    os.environ.get("GLIDEMAP_LEVEL_OF_DETAIL", "1") != "0"
+    and not CLIENTSIDE_RADIUS_UPDATES
+)
+LOD_MIN_ZOOM = 0
+LOD_MAX_ZOOM = 8
+LOD_CLUSTER_PX = 32
+LOD_MAX_OFFSET = 0.02
+# Clusters are drawn only when they cut the circles of the visible layers by
+# at least this factor
+LOD_MIN_MERGE = 2
+
+# Containment pruning (opt-in): circles lying entirely inside another circle of
+# the same layer are not drawn; the containing circle's popup lists them instead. Each
+# circle is tested against the PRUNE_CANDIDATES largest circles of each grid
+# cell within reach; cells are 1 / PRUNE_CELL_DIVISIONS of the largest radius.
+# Which circles are contained depends on the glide parameters, so pruning is off
+# with clientside radius updates
+PRUNE_CONTAINED_CIRCLES = (
+    os.environ.get("GLIDEMAP_PRUNE_CONTAINED", "0") == "1"
+    and not CLIENTSIDE_RADIUS_UPDATES
+)
+PRUNE_CANDIDATES = 4
+PRUNE_CELL_DIVISIONS = 4
+
+# Initial map zoom, before a dataset recenters the map
+DEFAULT_MAP_ZOOM = 9
+
+# Viewport culling: only circles whose range disk intersects the map view, padded
+# by VIEWPORT_PADDING of its size on each side, are sent to the browser. Panning
+# appends newly visible circles; a layer is rebuilt to the current view once it
+# holds more than VIEWPORT_REBUILD_FACTOR times the visible circles
+VIEWPORT_CULLING = os.environ.get("GLIDEMAP_VIEWPORT_CULLING", "1") != "0"
+VIEWPORT_PADDING = 0.25
+VIEWPORT_REBUILD_FACTOR = 3
+VIEWPORT_REBUILD_MIN_CIRCLES = 500
+
+# Cell size of the spatial grid index over landing spots
+SPATIAL_GRID_CELL_DEGREES = 0.25
+
+# Mean Earth radius, used for distances between nearby points
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE = EARTH_RADIUS_M * math.pi / 180
+
+# Render cache for built layers and envelopes. Entries are shared by all gunicorn
+# workers through a directory of JSON files, capped at RENDER_CACHE_MAX_BYTES
+# (least recently used removed first) and written by a background thread; each
+# worker also keeps the most recent in memory, up to RENDER_CACHE_MEMORY_BYTES
+# of their JSON size
+RENDER_CACHE_MEMORY_BYTES = (
+    int(os.environ.get("GLIDEMAP_RENDER_CACHE_MEMORY_MB", "64")) << 20
+)
+RENDER_CACHE_DIR = os.environ.get(
+    "GLIDEMAP_RENDER_CACHE_DIR", os.path.join(tempfile.gettempdir(), "glidemap-render")
+)
+RENDER_CACHE_MAX_BYTES = int(os.environ.get("GLIDEMAP_RENDER_CACHE_MB", "256")) << 20
+# Pending background writes; beyond this a miss writes its entry itself
+RENDER_CACHE_WRITE_QUEUE = 64
+# Part of every cache file name; bump it when built layers change shape, so
+# workers of another release never read each other's entries
+RENDER_CACHE_VERSION = 1
+
+# Per-callback metrics served as Prometheus text on /metrics; 0 removes the
+# route and the request hooks
+METRICS_ENABLED = os.environ.get("GLIDEMAP_METRICS", "1") != "0"
+METRICS_DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+# Counters kept per callback: metric name and help text
+METRICS_COUNTERS = {
+    "parse_seconds": (
+        "glidemap_callback_parse_seconds_total",
+        "Time spent parsing CUP files",
+    ),
+    "spots": (
+        "glidemap_callback_spots_total",
+        "Landing spots processed",
+    ),
+    "circles": (
+        "glidemap_callback_circles_total",
+        "Range circles or clusters sent to the browser",
+    ),
+    "request_bytes": (
+        "glidemap_callback_request_bytes_total",
+        "Request payload bytes",
+    ),
+    "response_bytes": (
+        "glidemap_callback_response_bytes_total",
+        "Response payload bytes",
+    ),
+    "parse_errors": (
+        "glidemap_callback_parse_errors_total",
+        "CUP files that could not be loaded",
+    ),
+    "rejected_rows": (
+        "glidemap_callback_rejected_rows_total",
+        "CUP rows that could not be parsed",
+    ),
+}
+
+# Largest batch of positions accepted by the reachability API
+API_MAX_POSITIONS = int(os.environ.get("GLIDEMAP_API_MAX_POSITIONS", "10000"))
+
+# Dataset keys are SHA-256 hex digests; anything else from the browser is ignored
+DATASET_KEY_PATTERN = re.compile(r"[0-9a-f]{64}")
+
 # Default CUP file path
 DEFAULT_CUP_FILE_PATH = "Sterling, Massachusetts 2021 SeeYou.cup"
 
+# Binary snapshot of the default CUP file, built by `python app.py build-snapshot`.
+# Workers memory-map it instead of parsing the CSV; it is ignored when missing,
+# written by another SNAPSHOT_VERSION or built from different CUP contents
+DEFAULT_SNAPSHOT_PATH = os.environ.get(
+    "GLIDEMAP_DEFAULT_SNAPSHOT", f"{DEFAULT_CUP_FILE_PATH}.snapshot"
+)
+SNAPSHOT_MAGIC = b"GLIDESNP"
+SNAPSHOT_VERSION = 1
+SNAPSHOT_ALIGNMENT = 64
+
+# Seconds between checks of the default CUP file and snapshot for edits; a
+# changed file is loaded in the background and replaces the default dataset
+# without restarting workers. 0 disables the check
+DEFAULT_RELOAD_SECONDS = float(os.environ.get("GLIDEMAP_DEFAULT_RELOAD_SECONDS", "30"))
+
 
 def feet_to_meters(feet):
     """Convert feet to meters"""
@@ -64,14 +340,49 @@ def meters_to_feet(meters):
     return meters / 0.3048
 
 
+def calculate_radii(glide_ratio, altitude, arrival_height, elevations):
+    """
+    Calculate glide range radii in meters for an array of elevations
+    Missing (NaN) elevations and unreachable spots are clamped to a 1.0 m floor
+    """
+    elevations = np.asarray(elevations, dtype=float)
+    r = feet_to_meters(glide_ratio * (altitude - arrival_height - elevations))
+    # fmax ignores NaN, so NaN radii fall back to the floor as well
+    return np.fmax(r, 1.0)
+
+
 def calculate_radius(glide_ratio, altitude, arrival_height, elevation):
     """Calculate glide range radius in meters"""
-    r = feet_to_meters(glide_ratio * (altitude - arrival_height - elevation))
-    if pd.isna(r):
-        r = 1.0
-    else:
-        r = max(r, 1.0)
-    return r
+    return float(calculate_radii(glide_ratio, altitude, arrival_height, [elevation])[0])
+
+
+def validate_glide_parameters(glide_ratio, altitude, arrival_height):
+    """
+    Apply defaults and limits to the glide parameters
+    Returns (glide_ratio, altitude, arrival_height) ready for calculate_radii
+    """
+    # Use explicit None checks so 0 is preserved
+    glide_ratio = glide_ratio if glide_ratio is not None else GLIDE_RATIO_DEFAULT
+    glide_ratio = max(GLIDE_RATIO_MIN, min(GLIDE_RATIO_MAX, glide_ratio))
+    altitude = altitude if altitude is not None else ALTITUDE_DEFAULT
+    altitude = max(ALTITUDE_MIN, min(ALTITUDE_MAX, altitude))
+    arrival_height = (
+        arrival_height if arrival_height is not None else ARRIVAL_HEIGHT_DEFAULT
+    )
+    arrival_height = max(ARRIVAL_HEIGHT_MIN, min(ARRIVAL_HEIGHT_MAX, arrival_height))
+
+    # Ensure arrival height is less than altitude
+    if arrival_height >= altitude:
+        # Apply safety factor: use either 90% of altitude or ensure minimum buffer
+        arrival_height = max(
+            0,
+            min(
+                altitude * ARRIVAL_HEIGHT_SAFETY_FACTOR,
+                altitude - ARRIVAL_HEIGHT_MIN_BUFFER,
+            ),
+        )
+
+    return glide_ratio, altitude, arrival_height
 
 
 def parse_cup_coordinate(coord_str, is_longitude=False):
@@ -101,163 +412,2903 @@ def parse_cup_elevation(elev_str):
     return 0
 
 
-def parse_cup_file(contents):
+class _FieldColumn:
+    """
+    A column of CUP fields given as byte ranges of a UTF-8 buffer
+    Fields are decoded to strings only when indexed, for the scalar fallbacks.
     """
-    Parse a CUP file and return a list of landing spots
 
-    CUP format (CSV):
-    name,code,country,lat,lon,elev,style,rwdir,rwlen,freq,desc
-    0    1    2       3   4   5    6     7     8     9    10
+    __slots__ = ("raw", "buf", "starts", "ends")
+
+    def __init__(self, raw, buf, starts, ends):
+        self.raw, self.buf, self.starts, self.ends = raw, buf, starts, ends
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        return self.raw[self.starts[i] : self.ends[i]].decode("utf-8")
+
+
+class _CupLines:
+    """
+    The fields of a batch of CUP lines, located in one pass over their bytes
+
+    Lines are joined and encoded once, and the commas, quotes and whitespace
+    found with array comparisons give the byte range of each line's first
+    seven fields. A line is clean when csv.reader would split it the same way:
+    the name is quoted at most around the whole field, the next six fields
+    have no quotes or whitespace, and anything after them is plain or whole
+    quoted fields. Clean lines are decoded from the byte ranges; the others
+    (headers, quoted commas, multi-line fields, the tasks marker, blank rows)
+    are left to csv.reader. With NUL bytes or bare carriage returns no line is
+    clean.
     """
+
+    def __init__(self, lines):
+        n = len(lines)
+        self.text = "".join(lines)
+        self.raw = self.text.encode("utf-8")
+        self.clean = np.zeros(n, dtype=bool)
+        self.starts = self.ends = np.zeros((n, 7), dtype=np.int64)
+        self.name_start = self.name_end = np.zeros(n, dtype=np.int64)
+        if b"\0" in self.raw or (
+            b"\r" in self.raw and self.raw.count(b"\r") != self.raw.count(b"\r\n")
+        ):
+            return
+        buf = self.buf = np.frombuffer(self.raw, dtype=np.uint8)
+        line_end = np.flatnonzero(buf == ord("\n"))
+        if len(line_end) == n - 1:
+            line_end = np.append(line_end, len(buf))
+        if len(line_end) != n:
+            return
+        line_start = np.concatenate(([0], line_end[:-1] + 1))
+        content_end = line_end - (
+            (line_end > line_start) & (buf[np.maximum(line_end - 1, 0)] == ord("\r"))
+        )
+
+        def within(positions, start, end):
+            return np.searchsorted(positions, end) - np.searchsorted(positions, start)
+
+        # Field j runs from the comma before it to the comma after it; the
+        # seventh ends at the line end when the line has only seven fields
+        commas = np.flatnonzero(buf == ord(","))
+        first = np.searchsorted(commas, line_start)
+        n_commas = np.searchsorted(commas, content_end) - first
+        fields = np.arange(7)
+        bounds = (
+            commas[np.minimum(first[:, None] + fields, len(commas) - 1)]
+            if len(commas)
+            else np.zeros((n, 7), dtype=np.int64)
+        )
+        self.starts = np.column_stack([line_start, bounds[:, :6] + 1])
+        self.ends = np.where(fields < n_commas[:, None], bounds, content_end[:, None])
+        clean = n_commas >= 6
+        clean &= line_end - line_start <= csv.field_size_limit()
+        # Leading whitespace or "-" could be a blank row or the tasks marker
+        lead = buf[np.minimum(line_start, len(buf) - 1)]
+        clean &= (lead != ord(" ")) & (lead != ord("\t")) & (lead != ord("-"))
+        clean &= self.ends[:, 3] > self.starts[:, 3]
+
+        quotes = np.flatnonzero(buf == ord('"'))
+        name_start, name_end = self.starts[:, 0], self.ends[:, 0]
+        name_quotes = within(quotes, name_start, name_end)
+        quoted = (
+            (name_quotes == 2)
+            & (name_end - name_start >= 2)
+            & (buf[name_start] == ord('"'))
+            & (buf[name_end - 1] == ord('"'))
+        )
+        clean &= (name_quotes == 0) | quoted
+        self.name_start = name_start + quoted
+        self.name_end = name_end - quoted
+        clean &= within(quotes, name_end, self.ends[:, 6]) == 0
+        blanks = np.flatnonzero((buf == ord(" ")) | (buf == ord("\t")))
+        clean &= within(blanks, self.starts[:, 3], self.ends[:, 6]) == 0
+
+        # After the seventh field, quotes must pair up as whole quoted fields,
+        # so every line ends outside quotes
+        rest_first = np.searchsorted(quotes, self.ends[:, 6])
+        rest_quotes = np.searchsorted(quotes, content_end) - rest_first
+        clean &= rest_quotes % 2 == 0
+        line = np.searchsorted(line_start, quotes, side="right") - 1
+        rank = np.arange(len(quotes)) - rest_first[line]
+        in_rest = (rank >= 0) & (rank < rest_quotes[line])
+        after = buf[np.minimum(quotes + 1, len(buf) - 1)]
+        closes = (quotes + 1 == content_end[line]) | (after == ord(","))
+        opens = buf[quotes - 1] == ord(",")
+        stray = in_rest & np.where(rank % 2 == 0, ~opens, ~closes)
+        clean[line[stray]] = False
+        self.clean = clean
+
+    def names(self, lines):
+        """Stripped names of an array of line indices"""
+        bounds = zip(self.name_start[lines].tolist(), self.name_end[lines].tolist())
+        # Byte offsets are character offsets in ASCII text
+        if len(self.text) == len(self.raw):
+            return [self.text[a:b].strip() for a, b in bounds]
+        return [self.raw[a:b].decode("utf-8").strip() for a, b in bounds]
+
+    def field_ranges(self, lines):
+        """Byte ranges (lines, 4, 2) of the coordinates, elevation and style"""
+        return np.stack([self.starts[lines, 3:7], self.ends[lines, 3:7]], axis=-1)
+
+
+def _char_codes(strs, width):
+    """
+    Return a NUL-padded (n, width) matrix of character codes for a string column,
+    together with each string's length (capped at width)
+
+    ASCII columns are joined into one byte buffer and gathered column by column;
+    anything else falls back to UTF-32 code points. The matrix is column-major so
+    each character position is contiguous. Strings longer than width are
+    truncated, so callers reserve a spare column to detect them. A _FieldColumn
+    is gathered straight from its buffer.
+    """
+    n = len(strs)
+    if isinstance(strs, _FieldColumn):
+        lengths = np.minimum(strs.ends - strs.starts, width)
+        # Gather one row per character position, up to the longest field
+        positions = np.arange(int(lengths.max(initial=0)))[:, None]
+        codes = np.zeros((width, n), dtype=np.uint8)
+        codes[: len(positions)] = np.where(
+            positions < lengths,
+            strs.buf[np.minimum(strs.starts + positions, len(strs.buf) - 1)],
+            0,
+        )
+        return codes.T, lengths
+
     try:
-        # Decode base64 content if it's a data URL (starts with data:)
-        if contents.startswith("data:"):
-            content_type, content_string = contents.split(",", 1)
-            decoded = base64.b64decode(content_string).decode("utf-8")
+        buf = np.frombuffer(("\0".join(strs) + "\0").encode("ascii"), dtype=np.uint8)
+    except (TypeError, UnicodeEncodeError):
+        buf = None
+
+    if (
+        buf is not None
+        and len(buf) == n * width
+        and np.count_nonzero(buf) == n * (width - 1)
+        and not buf[width - 1 :: width].any()
+    ):
+        # Every string fills the width exactly, so the buffer is the matrix
+        return buf.reshape(n, width), np.full(n, width - 1)
+
+    ends = None if buf is None else np.flatnonzero(buf == 0)
+    if ends is not None and len(ends) == n:
+        starts = np.empty(n, dtype=np.int64)
+        starts[:1] = 0
+        starts[1:] = ends[:-1] + 1
+        lengths = np.minimum(ends - starts, width)
+        # Positions past a string's end land on its NUL separator
+        codes = np.zeros((width, n), dtype=np.uint8)
+        for j in range(int(lengths.max(initial=0))):
+            codes[j] = buf[np.minimum(starts + j, ends)]
+        return codes.T, lengths
+
+    raw = np.array(strs, dtype=f"U{width}")
+    codes = np.asfortranarray(raw.view(np.uint32).reshape(n, width))
+    lengths = np.zeros(n, dtype=np.int64)
+    for j in range(width):
+        lengths += codes[:, j] != 0
+    return codes, lengths
+
+
+def _decode_decimals(codes, lengths, allow_fraction=True):
+    """
+    Decode [+-]digits[.digits] numbers from a character-code matrix
+
+    Only the first lengths[i] codes of each row are read. Digits are combined
+    into an exact integer mantissa and divided by a power of ten, which rounds
+    the same way float() does. Returns (values, ok); rows in any other form
+    (exponents, whitespace, too many digits, ...) are not ok.
+    """
+    n = len(codes)
+    lead = codes[:, 0]
+    is_neg = (lengths > 0) & (lead == ord("-"))
+    start = is_neg | ((lengths > 0) & (lead == ord("+")))
+    mantissa = np.zeros(n, dtype=np.int64)
+    n_digits = np.zeros(n, dtype=np.int8)
+    n_dots = np.zeros(n, dtype=np.int8)
+    frac_digits = np.zeros(n, dtype=np.int8)
+    ok = np.ones(n, dtype=bool)
+
+    # Walk the character positions, accumulating every row's mantissa at once
+    for j in range(min(codes.shape[1], int(lengths.max(initial=0)))):
+        in_body = (j < lengths) & ((j > 0) | ~start)
+        digit = codes[:, j].astype(np.int16) - ord("0")
+        is_digit = in_body & (digit >= 0) & (digit <= 9)
+        is_dot = in_body & (digit == ord(".") - ord("0"))
+        ok &= is_digit | is_dot | ~in_body
+        mantissa *= 1 + 9 * is_digit
+        mantissa += digit * is_digit
+        frac_digits += is_digit & (n_dots > 0)
+        n_digits += is_digit
+        n_dots += is_dot
+
+    ok &= (n_digits >= 1) & (n_digits <= 15)
+    ok &= n_dots <= (1 if allow_fraction else 0)
+    values = mantissa / _POWERS_OF_TEN[np.clip(frac_digits, 0, 15)]
+    values = np.where(is_neg, -values, values)
+    return np.where(ok, values, np.nan), ok
+
+
+def decode_cup_coordinates(coord_strs, is_longitude=False):
+    """
+    Decode a column of CUP coordinates to signed decimal degrees in one pass
+
+    Canonical ddmm.mmm{N|S} / dddmm.mmm{E|W} strings are decoded with array
+    arithmetic on their character codes; any other string falls back to
+    parse_cup_coordinate. Returns (values, valid): rows that cannot be parsed
+    are NaN in values and False in valid instead of raising.
+    """
+    deg_digits = 3 if is_longitude else 2
+    width = deg_digits + 7
+    positive, negative = ("E", "W") if is_longitude else ("N", "S")
+
+    # One spare column so strings longer than the canonical width are rejected
+    codes, _ = _char_codes(coord_strs, width + 1)
+    hemisphere = codes[:, width - 1]
+    canonical = (
+        (codes[:, width] == 0)
+        & (codes[:, deg_digits + 2] == ord("."))
+        & ((hemisphere == ord(positive)) | (hemisphere == ord(negative)))
+    )
+
+    # Degrees and thousandths of a minute, accumulated one digit column at a time
+    degrees = np.zeros(len(codes), dtype=np.int64)
+    milli_minutes = np.zeros(len(codes), dtype=np.int64)
+    for j in [*range(deg_digits + 2), *range(deg_digits + 3, width - 1)]:
+        digit = codes[:, j].astype(np.int64) - ord("0")
+        canonical &= (digit >= 0) & (digit <= 9)
+        if j < deg_digits:
+            degrees = degrees * 10 + digit
         else:
-            # Plain text content (for local file loading)
-            decoded = contents
-    except (ValueError, AttributeError) as e:
-        raise ValueError(
-            f"Invalid CUP file format. Expected 'data:' URL or plain text content: {e}"
-        )
+            milli_minutes = milli_minutes * 10 + digit
 
-    # Remove tasks section if present
-    task_location = decoded.find("-----Related Tasks-----")
-    if task_location != -1:
-        decoded = decoded[:task_location]
+    minutes = milli_minutes / 1000.0
+    sign = np.where(hemisphere == ord(positive), 1.0, -1.0)
+    values = np.where(canonical, sign * (degrees + minutes / 60.0), np.nan)
+    valid = canonical.copy()
 
-    # Parse CSV
-    lines = decoded.strip().split("\n")
-    if len(lines) < 2:
-        return []
+    # Non-canonical rows are rare; give them the scalar parser's leniency
+    for i in np.flatnonzero(~canonical):
+        try:
+            values[i] = parse_cup_coordinate(coord_strs[i], is_longitude=is_longitude)
+            valid[i] = True
+        except (ValueError, IndexError):
+            continue
+
+    return values, valid
+
+
+def decode_cup_elevations(elev_strs):
+    """
+    Decode a column of CUP elevations to feet in one pass
+
+    Values ending in "ft" are feet and values ending in "m" are meters; values
+    with no unit decode to 0 like parse_cup_elevation. Returns (values, valid).
+    """
+    codes, lengths = _char_codes(elev_strs, CUP_ELEVATION_WIDTH + 1)
+    rows = np.arange(len(codes))
+    last = codes[rows, np.maximum(lengths - 1, 0)]
+    prev = codes[rows, np.maximum(lengths - 2, 0)]
+    is_ft = (lengths >= 2) & (last == ord("t")) & (prev == ord("f"))
+    is_m = ~is_ft & (lengths >= 1) & (last == ord("m"))
 
-    landing_spots = []
+    values, ok = _decode_decimals(codes, lengths - 2 * is_ft - is_m)
+    values = np.where(is_m, meters_to_feet(values), values)
+    fits = codes[:, -1] == 0
+    unitless = fits & ~(is_ft | is_m)
+    values[unitless] = 0.0
+    valid = unitless | (fits & ok)
 
-    # Skip header line
-    for line in lines[1:]:
-        if not line.strip():
+    # Overlong or unusual numbers (exponents, whitespace) use the scalar parser
+    for i in np.flatnonzero(~valid):
+        try:
+            values[i] = parse_cup_elevation(elev_strs[i])
+            valid[i] = True
+        except ValueError:
             continue
 
+    return values, valid
+
+
+def decode_cup_styles(style_strs):
+    """Decode a column of CUP style codes; returns (values, valid)"""
+    codes, lengths = _char_codes(style_strs, 4)
+    values, valid = _decode_decimals(codes, lengths, allow_fraction=False)
+    valid &= codes[:, -1] == 0
+    values = np.where(valid, values, -1).astype(np.int64)
+
+    for i in np.flatnonzero(~valid):
         try:
-            # Use csv.reader to correctly handle quoted fields containing commas
-            row = next(csv.reader([line]))
-            if len(row) < 7:
-                continue
+            values[i] = int(style_strs[i])
+            valid[i] = True
+        except ValueError:
+            continue
 
-            name = row[0].strip()
-            lat_str = row[3].strip()
-            lon_str = row[4].strip()
-            elev_str = row[5].strip()
-            style = int(row[6].strip())
+    return values, valid
 
-            # Only process landing spots
-            if style not in [GRASS_SURFACE, OUTLANDING, GLIDING_AIRFIELD, AIRPORT]:
-                continue
 
-            lat = parse_cup_coordinate(lat_str, is_longitude=False)
-            lon = parse_cup_coordinate(lon_str, is_longitude=True)
-            elevation = parse_cup_elevation(elev_str)
-
-            landing_spots.append(
-                {
-                    "name": name,
-                    "lat": lat,
-                    "lon": lon,
-                    "elevation": elevation,
-                    "style": style,
-                }
+def decode_cup_columns(names, lat_strs, lon_strs, elev_strs, style_strs):
+    """
+    Decode raw CUP string columns into a LandingSpotTable in one vectorized pass
+
+    Waypoints that are not landing spots are dropped. Returns (table, rejected)
+    where rejected masks the input rows that could not be parsed.
+    """
+    styles, style_ok = decode_cup_styles(style_strs)
+    lats, lat_ok = decode_cup_coordinates(lat_strs, is_longitude=False)
+    lons, lon_ok = decode_cup_coordinates(lon_strs, is_longitude=True)
+    elevations, elev_ok = decode_cup_elevations(elev_strs)
+
+    landing = style_ok & np.isin(styles, LANDING_STYLES)
+    parsed = lat_ok & lon_ok & elev_ok
+    keep = landing & parsed
+    rejected = ~style_ok | (landing & ~parsed)
+
+    table = LandingSpotTable(
+        [sys.intern(name) for name, k in zip(names, keep.tolist()) if k],
+        lats[keep],
+        lons[keep],
+        elevations[keep],
+        styles[keep],
+    )
+    return table, rejected
+
+
+class LandingSpotTable:
+    """
+    Columnar container for parsed landing spots
+
+    Coordinates and elevations are stored as contiguous float64 arrays, styles as
+    an int8 array and names as interned strings. Indexing with an int returns the
+    legacy spot dict; slices, boolean masks and index arrays return a new table
+    (slices share memory with the original). sampling is (spots read, stride)
+    when the table keeps only every stride-th spot of its file, else None.
+    """
+
+    __slots__ = (
+        "names",
+        "lat",
+        "lon",
+        "elevation",
+        "style",
+        "sampling",
+        "_spatial_index",
+        "_clusters",
+    )
+
+    def __init__(self, names=(), lat=(), lon=(), elevation=(), style=()):
+        self.names = np.asarray(names, dtype=object)
+        self.lat = np.ascontiguousarray(lat, dtype=np.float64)
+        self.lon = np.ascontiguousarray(lon, dtype=np.float64)
+        self.elevation = np.ascontiguousarray(elevation, dtype=np.float64)
+        self.style = np.ascontiguousarray(style, dtype=np.int8)
+        self.sampling = None
+        self._spatial_index = None
+        self._clusters = None
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Build a table from an iterable of legacy spot dicts
+        Consumes the iterable in a single pass, so generators are not materialized
+        """
+        names = []
+        lat, lon = array("d"), array("d")
+        elevation, style = array("d"), array("b")
+        for spot in records:
+            names.append(sys.intern(str(spot["name"])))
+            lat.append(spot["lat"])
+            lon.append(spot["lon"])
+            elev = spot.get("elevation")
+            elevation.append(np.nan if elev is None else elev)
+            style.append(spot["style"])
+        return cls(names, lat, lon, elevation, style)
+
+    @classmethod
+    def from_data(cls, data):
+        """
+        Coerce stored data into a table
+        Accepts a table, a list of spot dicts, a columnar dict from to_dict() or None
+        """
+        if isinstance(data, cls):
+            return data
+        if not data:
+            return cls()
+        if isinstance(data, dict):
+            return cls(
+                names=[sys.intern(str(name)) for name in data["name"]],
+                lat=data["lat"],
+                lon=data["lon"],
+                elevation=data["elevation"],
+                style=data["style"],
             )
-        except Exception as e:
-            print(f"Error parsing line: {line[:50]}... Error: {e}")
-            continue
+        return cls.from_records(data)
 
-    return landing_spots
+    @classmethod
+    def concat(cls, tables):
+        """Concatenate tables into one"""
+        tables = list(tables)
+        if not tables:
+            return cls()
+        return cls(
+            np.concatenate([t.names for t in tables]),
+            np.concatenate([t.lat for t in tables]),
+            np.concatenate([t.lon for t in tables]),
+            np.concatenate([t.elevation for t in tables]),
+            np.concatenate([t.style for t in tables]),
+        )
 
+    def __len__(self):
+        return len(self.lat)
 
-def load_default_cup_file():
-    """Load the default CUP file on startup"""
-    try:
-        if os.path.exists(DEFAULT_CUP_FILE_PATH):
-            with open(DEFAULT_CUP_FILE_PATH, "r", encoding="utf-8") as f:
-                content = f.read()
-                return parse_cup_file(content)
-    except Exception as e:
-        print(f"Error loading default CUP file: {e}")
-    return []
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, key):
+        if isinstance(key, (int, np.integer)):
+            return {
+                "name": self.names[key],
+                "lat": float(self.lat[key]),
+                "lon": float(self.lon[key]),
+                "elevation": float(self.elevation[key]),
+                "style": int(self.style[key]),
+            }
+        return LandingSpotTable(
+            self.names[key],
+            self.lat[key],
+            self.lon[key],
+            self.elevation[key],
+            self.style[key],
+        )
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the table, counting each distinct name once"""
+        return (
+            self.names.nbytes
+            + sum(sys.getsizeof(name) for name in set(self.names.tolist()))
+            + self.lat.nbytes
+            + self.lon.nbytes
+            + self.elevation.nbytes
+            + self.style.nbytes
+        )
 
+    @property
+    def spatial_index(self):
+        """SpatialGridIndex over the spots, built on first use"""
+        if self._spatial_index is None:
+            self._spatial_index = SpatialGridIndex(self.lat, self.lon)
+        return self._spatial_index
 
-def calculate_center_and_zoom_from_bounds(bounds):
+    @property
+    def clusters(self):
+        """ClusterHierarchy over the spots, built on first use"""
+        if self._clusters is None:
+            self._clusters = ClusterHierarchy(self)
+        return self._clusters
+
+    def style_mask(self, styles):
+        """Boolean mask selecting spots whose style is in styles"""
+        return np.isin(self.style, styles)
+
+    def with_styles(self, styles):
+        """Return the subset of spots whose style is in styles"""
+        return self[self.style_mask(styles)]
+
+    def to_records(self):
+        """Convert to the legacy list-of-dicts form"""
+        return list(self)
+
+    def to_dict(self):
+        """Convert to a compact, JSON-serializable columnar dict"""
+        return {
+            "name": self.names.tolist(),
+            "lat": self.lat.tolist(),
+            "lon": self.lon.tolist(),
+            "elevation": self.elevation.tolist(),
+            "style": self.style.tolist(),
+        }
+
+
+class SpatialGridIndex:
     """
-    Calculate center and zoom level from bounds
-    Returns (center, zoom) tuple
+    Uniform latitude/longitude grid over a set of points
+
+    Points are sorted by cell, so the cells of one grid row form a contiguous run.
+    A bounding-box query costs one binary search per grid row plus the points it
+    returns, independent of the total number of points.
     """
-    if not bounds:
-        return default_center, 9
 
-    # Extract coordinates
-    min_lat, min_lon = bounds[0]
-    max_lat, max_lon = bounds[1]
+    def __init__(self, lat, lon, cell_degrees=SPATIAL_GRID_CELL_DEGREES):
+        self.cell_degrees = cell_degrees
+        self.n_cols = int(math.ceil(360 / cell_degrees)) + 1
+        cells = self._rows(lat) * self.n_cols + self._cols(lon)
+        self.order = np.argsort(cells, kind="stable")
+        self.sorted_cells = cells[self.order]
 
-    # Calculate center
-    center_lat = (min_lat + max_lat) / 2
-    center_lon = (min_lon + max_lon) / 2
-    center = [center_lat, center_lon]
+    @classmethod
+    def from_sorted(cls, order, sorted_cells, cell_degrees):
+        """Rebuild an index from the arrays of an existing one without sorting"""
+        index = cls.__new__(cls)
+        index.cell_degrees = cell_degrees
+        index.n_cols = int(math.ceil(360 / cell_degrees)) + 1
+        index.order = order
+        index.sorted_cells = sorted_cells
+        return index
 
-    # Calculate zoom level based on coordinate span
-    lat_diff = max_lat - min_lat
-    lon_diff = max_lon - min_lon
-    max_diff = max(lat_diff, lon_diff)
+    def __len__(self):
+        return len(self.order)
 
-    # Zoom level calculation (rough approximation)
-    # Each zoom level roughly doubles the scale
-    if max_diff > 10:
-        zoom = 6
-    elif max_diff > 5:
-        zoom = 7
-    elif max_diff > 2:
-        zoom = 8
-    elif max_diff > 1:
-        zoom = 9
-    elif max_diff > 0.5:
-        zoom = 10
-    elif max_diff > 0.2:
-        zoom = 11
-    elif max_diff > 0.1:
-        zoom = 12
-    else:
-        zoom = 13
+    def _rows(self, lat):
+        return np.floor((np.asarray(lat) + 90) / self.cell_degrees).astype(np.int64)
+
+    def _cols(self, lon):
+        return np.floor((np.asarray(lon) + 180) / self.cell_degrees).astype(np.int64)
+
+    def query_box(self, south, west, north, east):
+        """
+        Indices of points in the grid cells overlapping a box
+        Whole cells are returned, so callers apply their own exact test. A box
+        with west > east, or with longitudes beyond ±180, crosses the
+        antimeridian and is searched as two boxes.
+        """
+        south, north = max(south, -90.0), min(north, 90.0)
+        if not len(self.order) or south > north:
+            return np.zeros(0, dtype=np.int64)
+        if west <= east and east - west >= 360:
+            return self._query_columns(south, north, -180.0, 180.0)
+        if not -180 <= west <= 180:
+            west = (west + 180) % 360 - 180
+        if not -180 <= east <= 180:
+            east = (east + 180) % 360 - 180
+        if west <= east:
+            return self._query_columns(south, north, west, east)
+        return np.concatenate(
+            (
+                self._query_columns(south, north, west, 180.0),
+                self._query_columns(south, north, -180.0, east),
+            )
+        )
+
+    def _query_columns(self, south, north, west, east):
+        """query_box for -180 <= west <= east <= 180"""
+        rows = np.arange(self._rows(south), self._rows(north) + 1)
+        lo = np.searchsorted(self.sorted_cells, rows * self.n_cols + self._cols(west))
+        hi = np.searchsorted(
+            self.sorted_cells, rows * self.n_cols + self._cols(east), side="right"
+        )
+        runs = [self.order[a:b] for a, b in zip(lo.tolist(), hi.tolist()) if b > a]
+        if not runs:
+            return np.zeros(0, dtype=np.int64)
+        return np.concatenate(runs)
+
+    def query_reach(self, south, west, north, east, radius):
+        """Indices of points in the grid cells within radius meters of a box"""
+        lat_reach = radius / METERS_PER_DEGREE
+        # Degrees of longitude are shortest at the box's most poleward edge
+        poleward = min(max(abs(south - lat_reach), abs(north + lat_reach)), 89.0)
+        lon_reach = lat_reach / math.cos(math.radians(poleward))
+        return self.query_box(
+            south - lat_reach, west - lon_reach, north + lat_reach, east + lon_reach
+        )
+
+
+class ClusterLevel:
+    """
+    Clusters of one zoom level: each cluster's center, layer and members
+
+    Members are stored sorted by cluster (members[starts[i]:starts[i + 1]]),
+    with their distances in meters from the cluster center.
+    """
+
+    __slots__ = ("lat", "lon", "layer", "count", "members", "starts", "distances")
+
+    def __init__(self, labels, lat, lon, layer, spot_lat, spot_lon):
+        self.lat, self.lon, self.layer = lat, lon, layer
+        self.members = np.argsort(labels, kind="stable").astype(np.int32)
+        self.count = np.bincount(labels, minlength=len(lat))
+        self.starts = np.concatenate(([0], np.cumsum(self.count)[:-1]))
+        member_labels = labels[self.members]
+        # Equirectangular distances; clusters span a few screen pixels at most
+        dy = (spot_lat[self.members] - lat[member_labels]) * METERS_PER_DEGREE
+        dx = (spot_lon[self.members] - lon[member_labels]) * METERS_PER_DEGREE
+        dx *= np.cos(np.radians(lat[member_labels]))
+        self.distances = np.hypot(dx, dy).astype(np.float32)
+
+    def __len__(self):
+        return len(self.lat)
+
+    def representatives(self, landing_spots, layer, parameters):
+        """
+        A LandingSpotTable with one row per cluster of a layer, plus radii that
+        cover every merged member's range disk and the row ids
+
+        Members further than LOD_MAX_OFFSET of their own radius from the
+        cluster center are drawn singly, with id -1 - spot index. Single spots
+        keep their own row; larger clusters are named by their size and carry
+        the elevation of the member setting their radius.
+        """
+        owner = np.repeat(np.arange(len(self)), self.count)
+        entries = np.flatnonzero(self.layer[owner] == layer)
+        if not len(entries):
+            return LandingSpotTable(), np.zeros(0), np.zeros(0, dtype=np.int64)
+        spots = self.members[entries]
+        own = calculate_radii(*parameters, landing_spots.elevation[spots])
+        distances = self.distances[entries].astype(float)
+        merged = distances <= LOD_MAX_OFFSET * own
+
+        # Entries are sorted by cluster, so each cluster's merged members are a run
+        labels = owner[entries[merged]]
+        reach = own[merged] + distances[merged]
+        ids, starts, counts = np.unique(labels, return_index=True, return_counts=True)
+        widest = spots[merged][np.lexsort((-reach, labels))[starts]]
+        single = counts == 1
+        radii = np.where(
+            single, own[merged][starts], np.maximum.reduceat(reach, starts)
+        )
+        clusters = LandingSpotTable(
+            np.where(
+                single,
+                landing_spots.names[widest],
+                np.array(
+                    [f"{count} landing spots" for count in counts.tolist()],
+                    dtype=object,
+                ),
+            ),
+            np.where(single, landing_spots.lat[widest], self.lat[ids]),
+            np.where(single, landing_spots.lon[widest], self.lon[ids]),
+            landing_spots.elevation[widest],
+            landing_spots.style[widest],
+        )
+        apart = spots[~merged]
+        table = LandingSpotTable.concat([clusters, landing_spots[apart]])
+        radii = np.concatenate([radii, own[~merged]])
+        ids = np.concatenate([ids, -1 - apart.astype(np.int64)])
+        return table, radii, ids
+
+
+class ClusterHierarchy:
+    """
+    Grid clusters of same-layer landing spots for each zoom level up to
+    LOD_MAX_ZOOM
+
+    Each level merges the clusters of the level above it, with cells about
+    LOD_CLUSTER_PX web-map pixels wide, so a cluster's members always stay
+    together as the map zooms out. Built once per dataset; choosing the
+    clusters for a zoom level is a lookup.
+    """
+
+    def __init__(self, landing_spots, min_zoom=LOD_MIN_ZOOM, max_zoom=LOD_MAX_ZOOM):
+        self.levels = {}
+        n_spots = len(landing_spots)
+        layer = np.full(n_spots, -1, dtype=np.int64)
+        for i, styles in enumerate(LAYER_STYLES.values()):
+            layer[landing_spots.style_mask(styles)] = i
+        if not n_spots:
+            return
+        middle = math.cos(math.radians(float(np.mean(landing_spots.lat))))
+
+        labels = np.arange(n_spots)
+        lat, lon = landing_spots.lat, landing_spots.lon
+        weight = np.ones(n_spots)
+        for zoom in range(max_zoom, min_zoom - 1, -1):
+            cell_lon = LOD_CLUSTER_PX * 360 / (256 * 2**zoom)
+            cell_lat = cell_lon * middle
+            rows = np.floor((lat + 90) / cell_lat).astype(np.int64)
+            cols = np.floor((lon + 180) / cell_lon).astype(np.int64)
+            n_rows = int(180 / cell_lat) + 2
+            n_cols = int(360 / cell_lon) + 2
+            cells = ((layer + 1) * n_rows + rows) * n_cols + cols
+            cells, parent = np.unique(cells, return_inverse=True)
+
+            # Weighted centers, so each spot counts once however deep it sits
+            total = np.bincount(parent, weight)
+            lat = np.bincount(parent, weight * lat) / total
+            lon = np.bincount(parent, weight * lon) / total
+            weight = total
+            layer = cells // (n_rows * n_cols) - 1
+            labels = parent[labels]
+            self.levels[zoom] = ClusterLevel(
+                labels, lat, lon, layer, landing_spots.lat, landing_spots.lon
+            )
+
+    def level(self, zoom):
+        """The ClusterLevel for a map zoom, or None where spots are drawn singly"""
+        if zoom is None or zoom > LOD_MAX_ZOOM:
+            return None
+        return self.levels.get(max(int(zoom), LOD_MIN_ZOOM))
+
+
+def find_containing_disks(lat, lon, radii, candidates=PRUNE_CANDIDATES):
+    """
+    For each disk, the index of another disk that contains it, or -1
+
+    Disks are hashed into grid cells a fraction (PRUNE_CELL_DIVISIONS) of the
+    largest radius wide, so a containing disk always lies within that many
+    cells. Each disk is tested against the largest few disks of those cells
+    that are big enough to reach it, which keeps the check linear; a contained
+    disk may occasionally be missed, but a disk is never reported contained
+    when it is not. Of identical disks the first is kept.
+    """
+    n_disks = len(lat)
+    container = np.full(n_disks, -1, dtype=np.int64)
+    if n_disks < 2:
+        return container
+
+    cell_meters = float(np.max(radii)) / PRUNE_CELL_DIVISIONS
+    cell_lat = cell_meters / METERS_PER_DEGREE
+    poleward = min(float(np.max(np.abs(lat))) + cell_lat, 89.0)
+    cell_lon = cell_lat / math.cos(math.radians(poleward))
+    rows = np.floor(lat / cell_lat).astype(np.int64)
+    cols = np.floor(lon / cell_lon).astype(np.int64)
+    rows -= rows.min() - PRUNE_CELL_DIVISIONS
+    cols -= cols.min() - PRUNE_CELL_DIVISIONS
+    width = int(cols.max()) + PRUNE_CELL_DIVISIONS + 1
+    cells = rows * width + cols
+
+    # The largest disks of each cell, largest first (-1 pads short cells)
+    order = np.lexsort((-radii, cells))
+    cell_ids, first = np.unique(cells[order], return_index=True)
+    rank = np.arange(n_disks) - np.repeat(first, np.diff(np.append(first, n_disks)))
+    largest = np.full((len(cell_ids), candidates), -1, dtype=np.int64)
+    top = rank < candidates
+    largest[np.searchsorted(cell_ids, cells[order][top]), rank[top]] = order[top]
+    cell_max = radii[largest[:, 0]]
+
+    reach = range(-PRUNE_CELL_DIVISIONS, PRUNE_CELL_DIVISIONS + 1)
+    for d_row in reach:
+        for d_col in reach:
+            # Closest possible distance between points of the two cells
+            gap = cell_meters * math.hypot(
+                max(abs(d_row) - 1, 0), max(abs(d_col) - 1, 0)
+            )
+            neighbours = cells + d_row * width + d_col
+            slot = np.searchsorted(cell_ids, neighbours)
+            slot = np.minimum(slot, len(cell_ids) - 1)
+            hopeful = (cell_ids[slot] == neighbours) & (container < 0)
+            hopeful &= cell_max[slot] - radii >= gap
+            i = np.flatnonzero(hopeful)
+            for j in largest[slot[i]].T:
+                dy = (lat[j] - lat[i]) * METERS_PER_DEGREE
+                dx = (lon[j] - lon[i]) * METERS_PER_DEGREE
+                dx *= np.cos(np.radians(lat[i]))
+                slack = radii[j] - radii[i] - np.hypot(dx, dy)
+                # Identical disks contain each other; only the later one goes
+                inside = (j >= 0) & (j != i) & (slack >= 0)
+                inside &= (slack > 0) | (radii[j] > radii[i]) | (j < i)
+                container[i[inside]] = j[inside]
+    return container
+
+
+def prune_contained_spots(landing_spots, indices, radii):
+    """
+    Drop spots whose range disk lies inside another's
+    Returns the kept indices and a dict mapping kept spot indices to the names
+    of the spots their circle covers
+    """
+    container = find_containing_disks(
+        landing_spots.lat[indices], landing_spots.lon[indices], radii
+    )
+    pruned = container >= 0
+    covered = {}
+    # Follow chains of containment to a kept circle
+    while True:
+        hops = container[container] if len(container) else container
+        nested = pruned & (hops >= 0)
+        if not nested.any():
+            break
+        container[nested] = hops[nested]
+    for spot, holder in zip(
+        indices[pruned].tolist(), indices[container[pruned]].tolist()
+    ):
+        covered.setdefault(holder, []).append(landing_spots.names[spot])
+    return indices[~pruned], covered
+
+
+def disks_in_box(lat, lon, radii, south, west, north, east):
+    """
+    Boolean mask of disks (radii in meters) that intersect a box
+    A box with west > east crosses the antimeridian
+    """
+    if west > east:
+        east += 360
+    # Compare each disk with the box using its longitude nearest the box
+    lon = lon + 360 * np.round(((west + east) / 2 - lon) / 360)
+    dy = (np.clip(lat, south, north) - lat) * METERS_PER_DEGREE
+    dx = (np.clip(lon, west, east) - lon) * METERS_PER_DEGREE * np.cos(np.radians(lat))
+    return dx * dx + dy * dy <= radii * radii
+
+
+def padded_bounds(bounds):
+    """Map bounds grown by VIEWPORT_PADDING as (south, west, north, east)"""
+    (south, west), (north, east) = bounds
+    lat_pad = (north - south) * VIEWPORT_PADDING
+    lon_pad = (east - west) * VIEWPORT_PADDING
+    south, north = south - lat_pad, north + lat_pad
+    west, east = west - lon_pad, east + lon_pad
+    if east - west >= 360:
+        west, east = -180.0, 180.0
+    return south, west, north, east
+
+
+def spots_in_view(landing_spots, bounds, glide_ratio, altitude, arrival_height):
+    """
+    Indices (sorted) of spots whose range disk intersects the padded map bounds
+
+    Candidates come from the table's spatial index, searched with the largest
+    radius any spot can have; each candidate disk is then tested against the box.
+    Bounds are [[south, west], [north, east]]; views wider than the world are
+    treated as the whole world.
+    """
+    south, west, north, east = padded_bounds(bounds)
+    if not len(landing_spots):
+        return np.zeros(0, dtype=np.int64)
+
+    # The lowest spot has the largest radius
+    lowest = np.nanmin(landing_spots.elevation, initial=np.inf)
+    max_radius = calculate_radius(glide_ratio, altitude, arrival_height, lowest)
+    candidates = landing_spots.spatial_index.query_reach(
+        south, west, north, east, max_radius
+    )
+
+    radii = calculate_radii(
+        glide_ratio, altitude, arrival_height, landing_spots.elevation[candidates]
+    )
+    touching = disks_in_box(
+        landing_spots.lat[candidates],
+        landing_spots.lon[candidates],
+        radii,
+        south,
+        west,
+        north,
+        east,
+    )
+    return np.sort(candidates[touching])
+
+
+def haversine_distances(lat, lon, lats, lons):
+    """Great-circle distances in meters from one point to arrays of points"""
+    lat1, lat2 = math.radians(lat), np.radians(lats)
+    dlat = lat2 - lat1
+    dlon = np.radians(lons) - math.radians(lon)
+    h = np.sin(dlat / 2) ** 2 + math.cos(lat1) * np.cos(lat2) * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(np.minimum(h, 1.0)))
+
+
+def reachable_spots(
+    landing_spots,
+    lat,
+    lon,
+    altitude,
+    glide_ratio,
+    arrival_height,
+    styles=LANDING_STYLES,
+):
+    """
+    Landing spots reachable from a position, best arrival margin first
+
+    A spot is reachable when it lies within its glide range circle
+    (calculate_radii) as seen from the position. The arrival margin is the
+    height in feet to spare above the spot's arrival height. Only the grid cells
+    within the largest possible range are searched.
+
+    Returns (indices, distances in meters, margins in feet) as arrays.
+    """
+    empty = np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+    if not len(landing_spots):
+        return empty
+    lowest = np.nanmin(landing_spots.elevation, initial=np.inf)
+    max_radius = calculate_radius(glide_ratio, altitude, arrival_height, lowest)
+    candidates = landing_spots.spatial_index.query_reach(lat, lon, lat, lon, max_radius)
+    if styles != LANDING_STYLES:
+        candidates = candidates[np.isin(landing_spots.style[candidates], styles)]
+    if not len(candidates):
+        return empty
+
+    elevations = landing_spots.elevation[candidates]
+    radii = calculate_radii(glide_ratio, altitude, arrival_height, elevations)
+    distances = haversine_distances(
+        lat, lon, landing_spots.lat[candidates], landing_spots.lon[candidates]
+    )
+    # Height to spare at the spot; radii are floored at 1.0 m, so spots below
+    # the glide path are excluded by the height they would need instead
+    margins = meters_to_feet(radii - distances) / glide_ratio
+    reachable = (distances <= radii) & (altitude - arrival_height - elevations > 0)
+    order = np.argsort(-margins[reachable], kind="stable")
+    return (
+        candidates[reachable][order],
+        distances[reachable][order],
+        margins[reachable][order],
+    )
+
+
+def rasterize_disks(lat, lon, radii, cell_meters, clip=None):
+    """
+    Rasterize disks onto a latitude/longitude grid with cells about cell_meters
+    wide (coarsened to at most ENVELOPE_MAX_CELLS per side)
+
+    With clip as (south, west, north, east), the grid covers only that box. A
+    cell is set when its center lies inside any disk. The grid has an empty
+    one-cell border so traced outlines always close. Returns (mask, south, west,
+    cell_lat, cell_lon), where mask[r, c] covers latitudes south + (r - 1) *
+    cell_lat upwards and longitudes west + (c - 1) * cell_lon eastwards.
+    """
+    lat_reach = radii / METERS_PER_DEGREE
+    lon_reach = lat_reach / np.cos(np.radians(np.clip(lat, -89.0, 89.0)))
+    south, north = float(np.min(lat - lat_reach)), float(np.max(lat + lat_reach))
+    west, east = float(np.min(lon - lon_reach)), float(np.max(lon + lon_reach))
+    if clip is not None:
+        south, west = max(south, clip[0]), max(west, clip[1])
+        north, east = max(min(north, clip[2]), south), max(min(east, clip[3]), west)
+
+    # Roughly square cells in the middle of the area
+    cell_lat = cell_meters / METERS_PER_DEGREE
+    cell_lon = cell_lat / math.cos(math.radians(min(abs(south + north) / 2, 89.0)))
+    scale = max(
+        1.0,
+        (north - south) / cell_lat / ENVELOPE_MAX_CELLS,
+        (east - west) / cell_lon / ENVELOPE_MAX_CELLS,
+    )
+    cell_lat *= scale
+    cell_lon *= scale
+    n_rows = int(math.ceil((north - south) / cell_lat)) + 1
+    n_cols = int(math.ceil((east - west) / cell_lon)) + 1
+
+    # One (disk, row) pair for every grid row a disk spans
+    first = np.maximum(np.ceil((lat - lat_reach - south) / cell_lat - 0.5), 0)
+    last = np.minimum(np.floor((lat + lat_reach - south) / cell_lat - 0.5), n_rows - 1)
+    counts = np.maximum(last - first + 1, 0).astype(np.int64)
+    disk = np.repeat(np.arange(len(lat)), counts)
+    offsets = np.arange(len(disk)) - np.repeat(np.cumsum(counts) - counts, counts)
+    rows = first.astype(np.int64)[disk] + offsets
+
+    # Each pair covers the columns whose centers fall inside the disk's chord
+    row_lat = south + (rows + 0.5) * cell_lat
+    dy = (row_lat - lat[disk]) * METERS_PER_DEGREE
+    half_chord = np.sqrt(np.maximum(radii[disk] ** 2 - dy * dy, 0.0))
+    half_chord /= METERS_PER_DEGREE * np.cos(np.radians(row_lat))
+    start = np.ceil((lon[disk] - half_chord - west) / cell_lon - 0.5)
+    stop = np.floor((lon[disk] + half_chord - west) / cell_lon - 0.5) + 1
+    start = np.clip(start, 0, n_cols).astype(np.int64)
+    stop = np.clip(stop, 0, n_cols).astype(np.int64)
+    keep = start < stop
+
+    # Mark each run's ends, then a running sum along the rows fills them in
+    width = n_cols + 1
+    runs = np.bincount(
+        rows[keep] * width + start[keep], minlength=n_rows * width
+    ) - np.bincount(rows[keep] * width + stop[keep], minlength=n_rows * width)
+    covered = np.cumsum(runs.reshape(n_rows, width), axis=1)[:, :n_cols] > 0
+
+    mask = np.zeros((n_rows + 2, n_cols + 2), dtype=bool)
+    mask[1:-1, 1:-1] = covered
+    return mask, south, west, cell_lat, cell_lon
+
+
+def trace_mask_rings(mask):
+    """
+    Trace the boundaries of a raster mask as closed rings of grid corners
+
+    Rings keep the set cells on their left, so outer boundaries run
+    counter-clockwise and holes clockwise (x east, y north). Where two set
+    cells touch only at a corner the rings turn left, keeping them separate.
+    Returns a list of (n, 2) arrays of x/y corner coordinates without the
+    closing point, reduced to the corners where the boundary turns.
+    """
+    n_rows, n_cols = mask.shape
+    inside = mask[1:-1, 1:-1]
+    below, above = mask[:-2, 1:-1], mask[2:, 1:-1]
+    left, right = mask[1:-1, :-2], mask[1:-1, 2:]
+    # Direction codes: 0 east, 1 north, 2 west, 3 south
+    step_x = np.array([1, 0, -1, 0])
+    step_y = np.array([0, 1, 0, -1])
+    starts_x, starts_y, directions = [], [], []
+    for direction, edge, dx, dy in (
+        (0, inside & ~below, 0, 0),
+        (1, inside & ~right, 1, 0),
+        (2, inside & ~above, 1, 1),
+        (3, inside & ~left, 0, 1),
+    ):
+        r, c = np.nonzero(edge)
+        starts_x.append(c + 1 + dx)
+        starts_y.append(r + 1 + dy)
+        directions.append(np.full(len(r), direction))
+    x = np.concatenate(starts_x)
+    y = np.concatenate(starts_y)
+    direction = np.concatenate(directions)
+    if not len(x):
+        return []
+
+    # Successor of each edge: the edge starting where it ends, preferring a
+    # left turn where two edges start at the same corner
+    width = n_cols + 1
+    start_id = y * width + x
+    end_id = (y + step_y[direction]) * width + x + step_x[direction]
+    order = np.argsort(start_id, kind="stable")
+    first = np.searchsorted(start_id[order], end_id)
+    successor = order[first]
+    shared = (first + 1 < len(order)) & (
+        start_id[order[np.minimum(first + 1, len(order) - 1)]] == end_id
+    )
+    alternative = order[np.minimum(first + 1, len(order) - 1)]
+    left_turn = (direction + 1) % 4
+    use_alternative = shared & (direction[alternative] == left_turn)
+    successor = np.where(use_alternative, alternative, successor).tolist()
+
+    # Follow successors around each ring, keeping only the turning corners
+    rings = []
+    visited = np.zeros(len(x), dtype=bool)
+    turns = direction != direction[successor]
+    for edge in np.flatnonzero(turns).tolist():
+        if visited[edge]:
+            continue
+        ring = []
+        current = edge
+        while not visited[current]:
+            visited[current] = True
+            current = successor[current]
+            if turns[current]:
+                ring.append(current)
+        # Each turning edge ends at a corner of the ring
+        ring = np.array(ring)
+        corners = np.column_stack(
+            (
+                x[ring] + step_x[direction[ring]],
+                y[ring] + step_y[direction[ring]],
+            )
+        )
+        rings.append(corners)
+    return rings
+
+
+def simplify_ring(points, tolerance):
+    """
+    Simplify a closed ring with the Douglas-Peucker algorithm
+    Returns the kept points, or None if fewer than three remain
+    """
+    if len(points) < 4:
+        return points if len(points) == 3 else None
+    # Split the ring at its first point and the point farthest from it
+    far = int(np.argmax(((points - points[0]) ** 2).sum(axis=1)))
+    keep = np.zeros(len(points) + 1, dtype=bool)
+    keep[[0, far, len(points)]] = True
+    closed = np.vstack((points, points[:1]))
+    stack = [(0, far), (far, len(points))]
+    while stack:
+        a, b = stack.pop()
+        if b - a < 2:
+            continue
+        segment = closed[b] - closed[a]
+        offsets = closed[a + 1 : b] - closed[a]
+        length = math.hypot(*segment)
+        if length:
+            cross = segment[0] * offsets[:, 1] - segment[1] * offsets[:, 0]
+            distances = np.abs(cross) / length
+        else:
+            distances = np.hypot(offsets[:, 0], offsets[:, 1])
+        i = int(np.argmax(distances))
+        if distances[i] > tolerance:
+            keep[a + 1 + i] = True
+            stack.append((a, a + 1 + i))
+            stack.append((a + 1 + i, b))
+    points = closed[keep][:-1]
+    return points if len(points) >= 3 else None
+
+
+def _ring_area(points):
+    """Signed shoelace area of a ring; positive when counter-clockwise"""
+    x, y = points[:, 0], points[:, 1]
+    return 0.5 * float(np.dot(x, np.roll(y, -1)) - np.dot(np.roll(x, -1), y))
+
+
+def _point_in_ring(point, ring):
+    """Even-odd ray casting test of a point against a ring"""
+    x, y = point
+    x0, y0 = ring[:, 0], ring[:, 1]
+    x1, y1 = np.roll(x0, -1), np.roll(y0, -1)
+    crosses = (y0 > y) != (y1 > y)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        at = x0 + (y - y0) * (x1 - x0) / (y1 - y0)
+    return bool(np.count_nonzero(crosses & (x < at)) % 2)
+
+
+def coverage_envelope(lat, lon, radii, tolerance_meters, clip=None):
+    """
+    Union of range disks as a GeoJSON MultiPolygon geometry
+
+    The disks are rasterized with cells of about tolerance_meters, the raster
+    outline is traced, and each ring is simplified to within one cell, so the
+    outline is accurate to about twice the tolerance. Holes are attached to the
+    smallest outer ring containing them. With clip as (south, west, north,
+    east), only the part of the union inside that box is outlined.
+    """
+    if clip is not None:
+        inside = disks_in_box(lat, lon, radii, *clip)
+        lat, lon, radii = lat[inside], lon[inside], radii[inside]
+    if not len(lat):
+        return {"type": "MultiPolygon", "coordinates": []}
+    mask, south, west, cell_lat, cell_lon = rasterize_disks(
+        lat, lon, radii, tolerance_meters, clip
+    )
+    outers, holes = [], []
+    for ring in trace_mask_rings(mask):
+        ring = simplify_ring(ring.astype(float), 1.0)
+        if ring is None:
+            continue
+        area = _ring_area(ring)
+        (outers if area > 0 else holes).append((abs(area), ring))
+    outers.sort(key=lambda item: item[0])
+    polygons = [[ring] for _, ring in outers]
+    for _, hole in holes:
+        for polygon, (_, outer) in zip(polygons, outers):
+            if _point_in_ring(hole.mean(axis=0), outer):
+                polygon.append(hole)
+                break
+
+    def to_lon_lat(ring):
+        coords = np.column_stack(
+            (west + (ring[:, 0] - 1) * cell_lon, south + (ring[:, 1] - 1) * cell_lat)
+        )
+        coords = np.round(coords, 6).tolist()
+        return coords + coords[:1]
+
+    return {
+        "type": "MultiPolygon",
+        "coordinates": [[to_lon_lat(ring) for ring in polygon] for polygon in polygons],
+    }
+
+
+def envelope_tolerance_meters(zoom, lat):
+    """Ground size of ENVELOPE_TOLERANCE_PX web-map pixels at a zoom level"""
+    pixel = 2 * math.pi * EARTH_RADIUS_M * math.cos(math.radians(lat)) / 256
+    return ENVELOPE_TOLERANCE_PX * pixel / 2**zoom
+
+
+class ElevationModel:
+    """
+    SRTM .hgt elevation tiles in a directory, memory-mapped on first use
+
+    Each tile is a square grid of big-endian int16 heights in meters covering
+    one degree, named after its south-west corner and stored north row first.
+    Only the pages holding sampled points are read from disk.
+    """
+
+    def __init__(self, directory):
+        self.directory = directory
+        self._tiles = {}
+        self._lock = threading.Lock()
+
+    def _tile(self, lat, lon):
+        """The memory-mapped tile with south-west corner (lat, lon), or None"""
+        with self._lock:
+            if (lat, lon) in self._tiles:
+                return self._tiles[(lat, lon)]
+            name = (
+                f"{'N' if lat >= 0 else 'S'}{abs(lat):02d}"
+                f"{'E' if lon >= 0 else 'W'}{abs(lon):03d}.hgt"
+            )
+            tile = None
+            for candidate in (name, name.lower()):
+                path = os.path.join(self.directory, candidate)
+                try:
+                    samples = math.isqrt(os.path.getsize(path) // 2)
+                    tile = np.memmap(
+                        path, dtype=">i2", mode="r", shape=(samples, samples)
+                    )
+                    break
+                except (OSError, ValueError):
+                    continue
+            self._tiles[(lat, lon)] = tile
+            return tile
+
+    def elevations(self, lat, lon):
+        """Heights in meters at arrays of points; NaN where no tile or a void"""
+        lat = np.asarray(lat, dtype=float)
+        lon = (np.asarray(lon, dtype=float) + 180.0) % 360.0 - 180.0
+        heights = np.full(lat.shape, np.nan)
+        corners = (np.floor(lat) + 90) * 360 + np.floor(lon) + 180
+        for corner in np.unique(corners[np.isfinite(corners)]):
+            tile_lat, tile_lon = divmod(int(corner), 360)
+            tile_lat, tile_lon = tile_lat - 90, tile_lon - 180
+            tile = self._tile(tile_lat, tile_lon)
+            if tile is None:
+                continue
+            selected = corners == corner
+            last = tile.shape[0] - 1
+            rows = np.rint((tile_lat + 1 - lat[selected]) * last).astype(np.intp)
+            cols = np.rint((lon[selected] - tile_lon) * last).astype(np.intp)
+            values = tile[rows, cols].astype(float)
+            values[values == -32768] = np.nan
+            heights[selected] = values
+        return heights
+
+
+# Elevation models opened by this process, by directory
+_elevation_models = {}
+
+
+def elevation_model(directory):
+    """The ElevationModel for directory, shared within this process"""
+    model = _elevation_models.get(directory)
+    if model is None:
+        model = _elevation_models.setdefault(directory, ElevationModel(directory))
+    return model
+
+
+def terrain_reach_distances(directory, lat, lon, elevations, parameters):
+    """
+    Reach in meters along TERRAIN_RADIALS bearings (clockwise from north) for
+    arrays of spots, using the elevation tiles in directory
+
+    A glider starting d meters out is at altitude - (d - r) / glide ratio when r
+    meters from the spot, so terrain of height h at r allows starts up to
+    r + glide ratio * (altitude - arrival height - h). Each radial is sampled
+    every TERRAIN_STEP_M, and the reach is the last sample that every sample
+    before it allows; it never exceeds the spot's calculate_radii radius.
+    Radials are walked TERRAIN_CHUNK_STEPS samples at a time, carrying the
+    lowest limit so far, and only spots with an unblocked radial are sampled.
+    """
+    glide_ratio, altitude, arrival_height = parameters
+    lat = np.asarray(lat, dtype=float)
+    lon = np.asarray(lon, dtype=float)
+    radii = calculate_radii(glide_ratio, altitude, arrival_height, elevations)
+    steps = int(np.ceil(radii.max(initial=0.0) / TERRAIN_STEP_M)) + 1
+    bearings = np.radians(np.arange(TERRAIN_RADIALS) * 360.0 / TERRAIN_RADIALS)
+    model = elevation_model(directory)
+    # The spot itself allows its plain radius
+    limit = np.repeat(radii[:, None], TERRAIN_RADIALS, axis=1)
+    open_ = limit >= 0.0
+    reach = np.zeros((len(radii), TERRAIN_RADIALS))
+    for start in range(1, steps, TERRAIN_CHUNK_STEPS):
+        sites = np.flatnonzero(open_.any(axis=1))
+        if not len(sites):
+            break
+        distances = np.arange(start, min(start + TERRAIN_CHUNK_STEPS, steps))
+        distances = distances * TERRAIN_STEP_M
+        north = np.cos(bearings)[None, :, None] * distances
+        east = np.sin(bearings)[None, :, None] * distances
+        site_lat = lat[sites, None, None]
+        sample_lat = site_lat + north / METERS_PER_DEGREE
+        sample_lon = lon[sites, None, None] + east / (
+            METERS_PER_DEGREE * np.cos(np.radians(site_lat))
+        )
+        terrain = meters_to_feet(model.elevations(sample_lat, sample_lon))
+        limits = distances + feet_to_meters(
+            glide_ratio * (altitude - arrival_height - terrain)
+        )
+        # Unknown terrain never blocks
+        limits = np.where(np.isnan(limits), np.inf, limits)
+        limits = np.minimum.accumulate(
+            np.minimum(limits, limit[sites, :, None]), axis=2
+        )
+        clear = np.logical_and.accumulate(distances <= limits, axis=2)
+        clear &= open_[sites, :, None]
+        count = clear.sum(axis=2)
+        reach[sites] = np.where(
+            count > 0, distances[np.maximum(count - 1, 0)], reach[sites]
+        )
+        limit[sites] = limits[:, :, -1]
+        open_[sites] = clear[:, :, -1]
+    return np.fmax(np.minimum(reach, radii[:, None]), 1.0)
+
+
+def reach_polygon(lat, lon, reach):
+    """Closed GeoJSON ring ([lon, lat] points) around a spot for its radial reach"""
+    bearings = np.radians(np.arange(len(reach)) * 360.0 / len(reach))
+    lats = lat + reach * np.cos(bearings) / METERS_PER_DEGREE
+    lons = lon + reach * np.sin(bearings) / (
+        METERS_PER_DEGREE * math.cos(math.radians(lat))
+    )
+    ring = np.round(np.column_stack([lons, lats]), 5).tolist()
+    return ring + ring[:1]
+
+
+def _api_number(value, name, minimum, maximum):
+    """Check that an API value is a number within the UI's limits"""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"{name} must be a number")
+    if not minimum <= value <= maximum:
+        raise ValueError(f"{name} must be between {minimum} and {maximum}")
+    return float(value)
+
+
+def parse_reachability_request(payload):
+    """
+    Validate a reachability API request body
+
+    The body is {"glide_ratio", "arrival_height", "positions": [{"lat", "lon",
+    "altitude"}, ...]} with optional "dataset" and "max_spots". Values must lie
+    within the same limits as the UI inputs. Raises ValueError with a message
+    for the client; returns (dataset, positions array of lat/lon/altitude rows,
+    glide_ratio, arrival_height, max_spots).
+    """
+    if not isinstance(payload, dict):
+        raise ValueError("Request body must be a JSON object")
+    glide_ratio = _api_number(
+        payload.get("glide_ratio", GLIDE_RATIO_DEFAULT),
+        "glide_ratio",
+        GLIDE_RATIO_MIN,
+        GLIDE_RATIO_MAX,
+    )
+    arrival_height = _api_number(
+        payload.get("arrival_height", ARRIVAL_HEIGHT_DEFAULT),
+        "arrival_height",
+        ARRIVAL_HEIGHT_MIN,
+        ARRIVAL_HEIGHT_MAX,
+    )
+    dataset = payload.get("dataset")
+    if dataset is not None and not (
+        isinstance(dataset, str) and DATASET_KEY_PATTERN.fullmatch(dataset)
+    ):
+        raise ValueError("dataset must be a dataset key")
+    max_spots = payload.get("max_spots")
+    if max_spots is not None and (
+        isinstance(max_spots, bool) or not isinstance(max_spots, int) or max_spots < 1
+    ):
+        raise ValueError("max_spots must be a positive integer")
+
+    positions = payload.get("positions")
+    if not isinstance(positions, list) or not positions:
+        raise ValueError("positions must be a non-empty list")
+    if len(positions) > API_MAX_POSITIONS:
+        raise ValueError(f"At most {API_MAX_POSITIONS} positions per request")
+    rows = np.empty((len(positions), 3))
+    for i, position in enumerate(positions):
+        if not isinstance(position, dict):
+            raise ValueError(f"positions[{i}] must be an object")
+        rows[i] = (
+            _api_number(position.get("lat"), f"positions[{i}].lat", -90, 90),
+            _api_number(position.get("lon"), f"positions[{i}].lon", -180, 180),
+            _api_number(
+                position.get("altitude"),
+                f"positions[{i}].altitude",
+                ALTITUDE_MIN,
+                ALTITUDE_MAX,
+            ),
+        )
+    return dataset, rows, glide_ratio, arrival_height, max_spots
+
+
+def reachability_batch(
+    landing_spots, positions, glide_ratio, arrival_height, max_spots=None
+):
+    """
+    Reachable landing spots for each position in a batch
+
+    positions is an array of lat/lon/altitude rows. Each result lists spot
+    indices, distances in meters and arrival margins in feet, best margin first.
+    The spots referenced by any result are returned once, keyed by index.
+    """
+    results = []
+    referenced = []
+    for lat, lon, altitude in positions.tolist():
+        # Same arrival height rule as the UI
+        glide, altitude, arrival = validate_glide_parameters(
+            glide_ratio, altitude, arrival_height
+        )
+        indices, distances, margins = reachable_spots(
+            landing_spots, lat, lon, altitude, glide, arrival
+        )
+        indices = indices[:max_spots]
+        referenced.append(indices)
+        results.append(
+            {
+                "spots": indices.tolist(),
+                "distance_m": np.round(distances[:max_spots]).tolist(),
+                "margin_ft": np.round(margins[:max_spots], 1).tolist(),
+            }
+        )
+
+    spots = {}
+    if referenced:
+        for i in np.unique(np.concatenate(referenced)).tolist():
+            spot = landing_spots[i]
+            if np.isnan(spot["elevation"]):
+                spot["elevation"] = None
+            spots[str(i)] = spot
+    return {"results": results, "spots": spots}
+
+
+# Open trace_memory stages of each thread, innermost last
+_memory_stages = threading.local()
+
+
+def start_memory_trace(label):
+    """
+    Start measuring a stage's allocations; returns a marker for
+    finish_memory_trace, or None when MEMORY_TRACING is off
+    """
+    if not MEMORY_TRACING:
+        return None
+    if not tracemalloc.is_tracing():
+        tracemalloc.start()
+    stack = _memory_stages.__dict__.setdefault("stack", [])
+    current, peak = tracemalloc.get_traced_memory()
+    # The peak is reset for each stage, so carry it over to the enclosing one
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    tracemalloc.reset_peak()
+    marker = {"label": label, "start": current, "peak": current}
+    stack.append(marker)
+    return marker
+
+
+def finish_memory_trace(marker):
+    """
+    Log and return a stage's peak and retained bytes above its start
+    tracemalloc counts the whole process, so concurrent requests add up
+    """
+    if marker is None:
+        return None
+    stack = _memory_stages.stack
+    current, peak = tracemalloc.get_traced_memory()
+    peak = max(marker["peak"], peak)
+    del stack[stack.index(marker) :]
+    if stack:
+        stack[-1]["peak"] = max(stack[-1]["peak"], peak)
+    label = " / ".join([entry["label"] for entry in stack] + [marker["label"]])
+    peak, retained = peak - marker["start"], current - marker["start"]
+    print(
+        f"Memory {label}: peak {peak / (1 << 20):.1f} MB, "
+        f"retained {retained / (1 << 20):.1f} MB"
+    )
+    return peak, retained
+
+
+@contextmanager
+def trace_memory(label):
+    """Measure the allocations of the enclosed block as a stage called label"""
+    marker = start_memory_trace(label)
+    try:
+        yield
+    finally:
+        finish_memory_trace(marker)
+
+
+class Base64Stream(io.RawIOBase):
+    """
+    Binary stream over a base64 payload held in a str, starting at start
+    The payload is decoded one chunk of chunk_chars characters at a time, so
+    only one decoded chunk is held while a parser reads the stream. The
+    payload must not contain whitespace, as in browser data URLs.
+    """
+
+    def __init__(self, text, start=0, chunk_chars=UPLOAD_CHUNK_CHARS):
+        self._text = text
+        self._position = start
+        self._chunk_chars = chunk_chars - chunk_chars % 4
+        self._chunk = memoryview(b"")
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        while not self._chunk and self._position < len(self._text):
+            end = self._position + self._chunk_chars
+            self._chunk = memoryview(base64.b64decode(self._text[self._position : end]))
+            self._position = end
+        n = min(len(buffer), len(self._chunk))
+        buffer[:n] = self._chunk[:n]
+        self._chunk = self._chunk[n:]
+        return n
+
+
+def base64_decoded_size(text, start=0):
+    """Number of bytes a base64 payload in text[start:] decodes to"""
+    length = len(text) - start
+    padding = 0
+    if length:
+        padding = 2 if text.endswith("==") else 1 if text.endswith("=") else 0
+    return length // 4 * 3 - padding
+
+
+def iter_cup_tables(stream, batch_size=CUP_PARSE_BATCH_SIZE, progress=None):
+    """
+    Stream landing spots from a text stream of CUP data in LandingSpotTable batches
+
+    The stream is read batch_size lines at a time. Runs of plain lines are split
+    into fields by _CupLines without making a string per field; every other
+    line goes through a csv.reader over the same stream, so quoted fields
+    containing commas or line breaks are handled. Reading stops at the
+    "-----Related Tasks-----" marker. Each batch of columns is decoded in one
+    vectorized pass by decode_cup_columns. After each batch, progress(rows,
+    rejected) is called with the running count of waypoint rows read and of
+    rows that were too short or could not be parsed.
+
+    CUP format (CSV):
+    name,code,country,lat,lon,elev,style,rwdir,rwlen,freq,desc
+    0    1    2       3   4   5    6     7     8     9    10
+    """
+    counts = {"rows": 0, "rejected": 0}
+    lines = iter(stream)
+    header_seen = False
+    finished = False
+    while not finished:
+        batch = list(itertools.islice(lines, batch_size))
+        if not batch:
+            break
+        scanned = _CupLines(batch)
+        rows_before = counts["rows"]
+        # Clean lines are decoded from their bytes; rows read by csv.reader keep
+        # their first line's index, their name and their field strings' byte
+        # ranges, which are stored after the batch's own bytes
+        fast = np.zeros(len(batch), dtype=bool)
+        slow_lines, slow_names, slow_ranges = [], [], []
+        extra = bytearray()
+        unclean = np.flatnonzero(~scanned.clean).tolist() + [len(batch)]
+        next_unclean = 0
+        remaining = iter(batch)
+        position = 0
+        while position < len(batch):
+            if header_seen:
+                while unclean[next_unclean] < position:
+                    next_unclean += 1
+                end = unclean[next_unclean]
+                if end > position:
+                    fast[position:end] = True
+                    # Skip the clean lines in the shared line iterator
+                    next(
+                        itertools.islice(remaining, end - position, end - position),
+                        None,
+                    )
+                    position = end
+                    continue
+
+            # One row through csv.reader, which may read on past the batch
+            reader = csv.reader(itertools.chain(remaining, lines))
+            row = next(reader, None)
+            row_line = position
+            position += max(reader.line_num, 1)
+            if row is None:
+                break
+
+            # Skip blank lines
+            if not any(field.strip() for field in row):
+                continue
+
+            # Stop at the tasks section
+            if row[0].lstrip().startswith(TASKS_SECTION_MARKER):
+                finished = True
+                break
+
+            # Skip header line
+            if not header_seen:
+                header_seen = True
+                continue
+
+            if len(row) < 7:
+                counts["rows"] += 1
+                counts["rejected"] += 1
+                continue
+
+            slow_lines.append(row_line)
+            slow_names.append(row[0].strip())
+            for field in row[3:7]:
+                start = len(scanned.raw) + len(extra)
+                extra += field.strip().encode("utf-8")
+                slow_ranges.append((start, len(scanned.raw) + len(extra)))
+
+        fast_lines = np.flatnonzero(fast)
+        n_rows = len(fast_lines) + len(slow_lines)
+        if n_rows:
+            order = np.argsort(np.concatenate([fast_lines, slow_lines]), kind="stable")
+            names = scanned.names(fast_lines) + slow_names
+            names = [names[i] for i in order.tolist()]
+            ranges = np.concatenate(
+                [
+                    scanned.field_ranges(fast_lines),
+                    np.array(slow_ranges, dtype=np.int64).reshape(-1, 4, 2),
+                ]
+            )[order]
+            raw = scanned.raw + bytes(extra)
+            buf = np.frombuffer(raw, dtype=np.uint8)
+            columns = [
+                _FieldColumn(raw, buf, ranges[:, j, 0], ranges[:, j, 1])
+                for j in range(4)
+            ]
+            table, rejected = decode_cup_columns(names, *columns)
+            for i in np.flatnonzero(rejected):
+                fields = tuple(column[i] for column in columns)
+                print(
+                    f"Error parsing line: {names[i][:50]}... Error: invalid "
+                    f"coordinate, elevation or style in {fields}"
+                )
+            counts["rows"] += n_rows
+            counts["rejected"] += int(np.count_nonzero(rejected))
+        if progress is not None and counts["rows"] > rows_before:
+            progress(counts["rows"], counts["rejected"])
+        if n_rows:
+            yield table
+
+
+def iter_cup_spots(stream):
+    """Stream landing spots from a text stream of CUP data as legacy spot dicts"""
+    for table in iter_cup_tables(stream):
+        yield from table
+
+
+class DatasetBudget:
+    """
+    Memory limit applied to a dataset while its batches are parsed
+
+    collect() raises ValueError once the spots read so far exceed max_bytes or,
+    with downsample, keeps every stride-th spot, doubling the stride whenever
+    the kept spots exceed max_bytes again. Afterwards spots_read and stride
+    describe what was kept, and a downsampled table records them as its sampling.
+    """
+
+    def __init__(self, max_bytes, downsample=False):
+        self.max_bytes = max_bytes
+        self.downsample = downsample
+        self.spots_read = 0
+        self.stride = 1
+
+    def collect(self, tables):
+        """Concatenate an iterable of LandingSpotTable batches within the budget"""
+        kept = []
+        nbytes = 0
+        for table in tables:
+            positions = np.arange(self.spots_read, self.spots_read + len(table))
+            self.spots_read += len(table)
+            if self.stride > 1:
+                keep = positions % self.stride == 0
+                table, positions = table[keep], positions[keep]
+            kept.append((table, positions))
+            nbytes += table.nbytes
+            while nbytes > self.max_bytes and sum(len(t) for t, _ in kept) > 1:
+                if not self.downsample:
+                    raise ValueError(
+                        f"File has too many landing spots: the first "
+                        f"{self.spots_read:,} already exceed the "
+                        f"{self.max_bytes / (1 << 20):.0f} MB dataset limit"
+                    )
+                self.stride *= 2
+                kept = [
+                    (t[p % self.stride == 0], p[p % self.stride == 0]) for t, p in kept
+                ]
+                nbytes = sum(t.nbytes for t, _ in kept)
+        table = LandingSpotTable.concat(t for t, _ in kept)
+        if self.stride > 1:
+            table.sampling = (self.spots_read, self.stride)
+        return table
+
+
+def parse_cup_stream(stream, progress=None, budget=None):
+    """
+    Parse a text stream of CUP data into a LandingSpotTable
+    progress is passed on to iter_cup_tables; an optional DatasetBudget limits
+    the spots kept
+    """
+    tables = iter_cup_tables(stream, progress=progress)
+    with trace_memory("parse"):
+        if budget is None:
+            table = LandingSpotTable.concat(tables)
+        else:
+            table = budget.collect(tables)
+    # Build the spatial index now so the first view does not pay. Clusters are
+    # built on first use, since only zoomed-out views need them
+    with trace_memory("index"):
+        table.spatial_index
+    return table
+
+
+def parse_cup_file(contents, progress=None, budget=None):
+    """
+    Parse a CUP file and return a LandingSpotTable of landing spots
+    contents is either a base64 'data:' URL (from dcc.Upload) or plain text;
+    progress and budget are passed on to parse_cup_stream
+    """
+    try:
+        is_data_url = contents.startswith("data:")
+    except AttributeError as e:
+        raise ValueError(
+            f"Invalid CUP file format. Expected 'data:' URL or plain text content: {e}"
+        )
+
+    # Decode base64 content if it's a data URL (starts with data:)
+    if is_data_url:
+        start = contents.find(",") + 1
+        if not start:
+            raise ValueError("Invalid CUP file format. The 'data:' URL has no payload")
+        size = base64_decoded_size(contents, start)
+        if UPLOAD_MAX_BYTES and size > UPLOAD_MAX_BYTES:
+            raise ValueError(
+                f"File is too large ({size / (1 << 20):.1f} MB); the limit is "
+                f"{UPLOAD_MAX_BYTES / (1 << 20):.0f} MB"
+            )
+        # Decode base64 and UTF-8 in chunks while the CSV reader consumes the
+        # stream, without copying the payload out of the data URL
+        stream = io.TextIOWrapper(
+            io.BufferedReader(Base64Stream(contents, start)),
+            encoding="utf-8",
+            newline="",
+        )
+    else:
+        # Plain text content (for local file loading)
+        stream = io.StringIO(contents, newline="")
+
+    return parse_cup_stream(stream, progress, budget)
+
+
+def load_default_cup_file():
+    """Load the default CUP file on startup"""
+    try:
+        if os.path.exists(DEFAULT_CUP_FILE_PATH):
+            with open(DEFAULT_CUP_FILE_PATH, "r", encoding="utf-8", newline="") as f:
+                return parse_cup_stream(f)
+    except Exception as e:
+        print(f"Error loading default CUP file: {e}")
+    return LandingSpotTable()
+
+
+def write_spot_snapshot(path, table, source_key):
+    """
+    Write a table and its spatial index to a binary snapshot
+
+    The file is SNAPSHOT_MAGIC, a little-endian header length, a JSON header and
+    the raw little-endian arrays, each aligned to SNAPSHOT_ALIGNMENT bytes so
+    readers can map them in place. source_key is the SHA-256 of the CUP contents.
+    """
+    index = table.spatial_index
+    arrays = {
+        "lat": table.lat.astype("<f8"),
+        "lon": table.lon.astype("<f8"),
+        "elevation": table.elevation.astype("<f8"),
+        "style": table.style.astype("i1"),
+        "order": index.order.astype("<i8"),
+        "sorted_cells": index.sorted_cells.astype("<i8"),
+        # Names are joined with NUL, which CUP names never contain
+        "names": np.frombuffer("\0".join(table.names.tolist()).encode(), np.uint8),
+    }
+    header = {
+        "version": SNAPSHOT_VERSION,
+        "source": source_key,
+        "count": len(table),
+        "cell_degrees": index.cell_degrees,
+        "arrays": {},
+    }
+    offset = 0
+    for name, values in arrays.items():
+        header["arrays"][name] = [offset, values.dtype.str, len(values)]
+        offset += -(-values.nbytes // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+    header_bytes = json.dumps(header).encode()
+    prefix = len(SNAPSHOT_MAGIC) + 4 + len(header_bytes)
+    data_start = -(-prefix // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(SNAPSHOT_MAGIC)
+        f.write(len(header_bytes).to_bytes(4, "little"))
+        f.write(header_bytes)
+        for name, values in arrays.items():
+            f.seek(data_start + header["arrays"][name][0])
+            f.write(values.tobytes())
+        f.truncate(data_start + offset)
+    # Atomic rename so workers starting meanwhile never map a partial file
+    os.replace(tmp_path, path)
+
+
+def load_spot_snapshot(path, source_key):
+    """
+    Map a snapshot written by write_spot_snapshot into a LandingSpotTable
+    Coordinate, elevation, style and index arrays are read-only views of the
+    mapping, so workers share its pages. Returns None if the file is missing,
+    malformed, of another SNAPSHOT_VERSION or not built from source_key.
+    """
+    try:
+        with open(path, "rb") as f:
+            if f.read(len(SNAPSHOT_MAGIC)) != SNAPSHOT_MAGIC:
+                return None
+            header_length = int.from_bytes(f.read(4), "little")
+            header = json.loads(f.read(header_length))
+        if header.get("version") != SNAPSHOT_VERSION:
+            return None
+        if header.get("source") != source_key:
+            return None
+        prefix = len(SNAPSHOT_MAGIC) + 4 + header_length
+        data_start = -(-prefix // SNAPSHOT_ALIGNMENT) * SNAPSHOT_ALIGNMENT
+        mapped = np.memmap(path, dtype=np.uint8, mode="r")
+        arrays = {}
+        for name, (offset, dtype, length) in header["arrays"].items():
+            start = data_start + offset
+            dtype = np.dtype(dtype)
+            arrays[name] = mapped[start : start + length * dtype.itemsize].view(dtype)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        print(f"Error reading snapshot {path}: {e}")
+        return None
+
+    names = arrays["names"].tobytes().decode("utf-8")
+    table = LandingSpotTable(
+        [sys.intern(name) for name in names.split("\0")] if header["count"] else [],
+        arrays["lat"],
+        arrays["lon"],
+        arrays["elevation"],
+        arrays["style"],
+    )
+    table._spatial_index = SpatialGridIndex.from_sorted(
+        arrays["order"], arrays["sorted_cells"], header["cell_degrees"]
+    )
+    return table
+
+
+def default_cup_file_key():
+    """SHA-256 of the default CUP file, or None if it does not exist"""
+    if not os.path.exists(DEFAULT_CUP_FILE_PATH):
+        return None
+    digest = hashlib.sha256()
+    with open(DEFAULT_CUP_FILE_PATH, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def build_default_snapshot():
+    """Compile the default CUP file into DEFAULT_SNAPSHOT_PATH"""
+    key = default_cup_file_key()
+    if key is None:
+        print(f"Default CUP file not found: {DEFAULT_CUP_FILE_PATH}")
+        return False
+    with open(DEFAULT_CUP_FILE_PATH, "r", encoding="utf-8", newline="") as f:
+        table = parse_cup_stream(f)
+    write_spot_snapshot(DEFAULT_SNAPSHOT_PATH, table, key)
+    print(f"Wrote {len(table)} landing spots to {DEFAULT_SNAPSHOT_PATH}")
+    return True
+
+
+class DatasetRegistry:
+    """
+    Server-side store of parsed LandingSpotTables keyed by content hash
+
+    Tables stay in memory until their combined size exceeds max_bytes, then the
+    least recently used are evicted. Every table is also written to spill_dir, so
+    other gunicorn workers (and this one, after an eviction) can reload it from
+    its key alone instead of the browser sending the spots back.
+    """
+
+    def __init__(self, max_bytes, spill_dir=None, spill_max_bytes=None):
+        self.max_bytes = max_bytes
+        self.spill_dir = spill_dir
+        self.spill_max_bytes = spill_max_bytes
+        self._tables = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key_for(contents):
+        """
+        Content hash for raw bytes, plain text or a 'data:' URL
+        Only the payload of a data URL is hashed, since the MIME type varies by browser
+        """
+        if not isinstance(contents, str):
+            return hashlib.sha256(contents).hexdigest()
+        start = contents.find(",") + 1 if contents.startswith("data:") else 0
+        # Hash in chunks so large uploads are not copied
+        digest = hashlib.sha256()
+        for i in range(start, len(contents), UPLOAD_CHUNK_CHARS):
+            digest.update(contents[i : i + UPLOAD_CHUNK_CHARS].encode("utf-8"))
+        return digest.hexdigest()
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._tables
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tables)
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the tables currently in memory"""
+        return self._nbytes
+
+    def get(self, key):
+        """Return the table for key, reloading it from disk if evicted, or None"""
+        if not isinstance(key, str) or not DATASET_KEY_PATTERN.fullmatch(key):
+            return None
+        with self._lock:
+            table = self._tables.get(key)
+            if table is not None:
+                self._tables.move_to_end(key)
+                return table
+        table = self._read_spill(key)
+        if table is not None:
+            self._remember(key, table)
+        return table
+
+    def put(self, key, table):
+        """Add a table under key"""
+        self._remember(key, table)
+        self._write_spill(key, table)
+
+    def get_or_create(self, key, factory):
+        """Return the table for key, calling factory() to build it only on a miss"""
+        table = self.get(key)
+        if table is None:
+            table = factory()
+            self.put(key, table)
+        return table
+
+    def _remember(self, key, table):
+        with self._lock:
+            previous = self._tables.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous.nbytes
+            self._tables[key] = table
+            self._nbytes += table.nbytes
+            # Evict least recently used tables, but always keep the newest one
+            while self._nbytes > self.max_bytes and len(self._tables) > 1:
+                _, evicted = self._tables.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+
+    def _spill_path(self, key):
+        return os.path.join(self.spill_dir, f"{key}.npz")
+
+    def _write_spill(self, key, table):
+        if not self.spill_dir:
+            return
+        path = self._spill_path(key)
+        if os.path.exists(path):
+            return
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.spill_dir, exist_ok=True)
+            # A downsampled table keeps its sampling, so reloads can report it
+            sampling = {} if table.sampling is None else {"sampling": table.sampling}
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    names=table.names.astype(str),
+                    lat=table.lat,
+                    lon=table.lon,
+                    elevation=table.elevation,
+                    style=table.style,
+                    **sampling,
+                )
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+            self._prune_spill()
+        except OSError as e:
+            print(f"Error writing dataset {key[:12]} to disk: {e}")
+
+    def _read_spill(self, key):
+        if not self.spill_dir:
+            return None
+        path = self._spill_path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                table = LandingSpotTable(
+                    [sys.intern(name) for name in data["names"].tolist()],
+                    data["lat"],
+                    data["lon"],
+                    data["elevation"],
+                    data["style"],
+                )
+                if "sampling" in data.files:
+                    table.sampling = tuple(int(n) for n in data["sampling"])
+            # Refresh the file's age so pruning drops the least recently used
+            os.utime(path)
+            return table
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error reading dataset {key[:12]} from disk: {e}")
+            return None
+
+    def _prune_spill(self):
+        """Delete the oldest spilled datasets once the directory exceeds its cap"""
+        if not self.spill_max_bytes:
+            return
+        entries = []
+        for entry in os.scandir(self.spill_dir):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.spill_max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                continue
+
+
+class RenderCache:
+    """
+    Least-recently-used cache of rendered layer data, such as built layers and
+    coverage envelopes
+
+    Keys are tuples identifying the dataset and everything the result depends
+    on. Entries stay in memory until their JSON size adds up to more than
+    memory_max_bytes. With a directory every entry is also written there as
+    JSON, so other gunicorn workers reuse it, and the oldest files are removed
+    once the directory exceeds max_bytes. New entries are serialized, sized and
+    written by a background thread, off the request. Entries read back from disk
+    are plain JSON data (components become their dict form). The hit and miss
+    counters cover this worker only.
+    """
+
+    def __init__(self, memory_max_bytes, directory=None, max_bytes=None):
+        self.memory_max_bytes = memory_max_bytes
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._nbytes = 0
+        self._lock = threading.Lock()
+        self._writes = queue.Queue(RENDER_CACHE_WRITE_QUEUE)
+        self._writer = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    @property
+    def nbytes(self):
+        """JSON size of the entries in memory that have been sized so far"""
+        return self._nbytes
+
+    def get_or_create(self, key, factory):
+        """Return the entry for key, calling factory() to build it only on a miss"""
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                return self._entries[key][0]
+        found = self._read_file(key)
+        if found is not None:
+            value, nbytes = found
+            with self._lock:
+                self.hits += 1
+                self.disk_hits += 1
+            self._remember(key, value, nbytes)
+            return value
+        with self._lock:
+            self.misses += 1
+        value = factory()
+        # Sized once serialized; until then the entry counts as empty
+        self._remember(key, value, 0)
+        try:
+            self._writes.put_nowait((key, value))
+            self._start_writer()
+        except queue.Full:
+            self._store(key, value)
+        return value
+
+    def flush(self):
+        """Wait until every new entry has been sized and written"""
+        self._writes.join()
+
+    def clear(self):
+        """Drop this worker's in-memory entries; files on disk are kept"""
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    def _remember(self, key, value, nbytes):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._nbytes -= previous[1]
+            self._entries[key] = (value, nbytes)
+            self._nbytes += nbytes
+            self._evict()
+
+    def _evict(self):
+        # Least recently used first, but always keep the newest entry
+        while self._nbytes > self.memory_max_bytes and len(self._entries) > 1:
+            _, (_, nbytes) = self._entries.popitem(last=False)
+            self._nbytes -= nbytes
+
+    def _start_writer(self):
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_entries, daemon=True)
+                self._writer.start()
+
+    def _write_entries(self):
+        while True:
+            key, value = self._writes.get()
+            try:
+                self._store(key, value)
+            finally:
+                self._writes.task_done()
+
+    def _store(self, key, value):
+        """Serialize a new entry, record its size and write it to the directory"""
+        # Imported here because plotly's JSON module pulls in a lot at startup
+        from plotly.io.json import to_json_plotly
+
+        text = to_json_plotly(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is value:
+                self._entries[key] = (value, len(text))
+                self._nbytes += len(text) - entry[1]
+                self._evict()
+        self._write_file(key, text)
+
+    def stats(self):
+        """Counters for sizing the cache: this worker's lookups plus shared disk use"""
+        files = self._files()
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "pid": os.getpid(),
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+                "entries": len(self._entries),
+                "memory_bytes": self._nbytes,
+                "disk_entries": len(files),
+                "disk_bytes": sum(size for _, size, _ in files),
+            }
+
+    def _path(self, key):
+        digest = hashlib.sha256(
+            repr((RENDER_CACHE_VERSION, key)).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json")
+
+    def _files(self):
+        """(mtime, size, path) of every cache file"""
+        if not self.directory:
+            return []
+        files = []
+        try:
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith(".json"):
+                    stat = entry.stat()
+                    files.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            pass
+        return files
+
+    def _read_file(self, key):
+        if not self.directory:
+            return None
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                text = f.read()
+            value = json.loads(text)
+            # Refresh the file's age so pruning drops the least recently used
+            os.utime(path)
+            return value, len(text)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"Error reading render cache entry: {e}")
+            return None
+
+    def _write_file(self, key, text):
+        if not self.directory:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(text)
+            # Atomic rename so concurrent readers never see a partial file
+            os.replace(tmp_path, path)
+            self._prune()
+        except OSError as e:
+            print(f"Error writing render cache entry: {e}")
+
+    def _prune(self):
+        """Delete the oldest files once the directory exceeds its cap"""
+        if not self.max_bytes:
+            return
+        files = self._files()
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+
+class TerrainReachCache:
+    """
+    Least-recently-used cache of radial reach arrays per spot and glide
+    parameters, kept in this worker's memory
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def get(self, key):
+        """The reach array for key, or None"""
+        with self._lock:
+            reach = self._entries.get(key)
+            if reach is not None:
+                self._entries.move_to_end(key)
+            return reach
+
+    def put(self, key, reach):
+        """Add a reach array under key, evicting the least recently used"""
+        with self._lock:
+            self._entries[key] = reach
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class CallbackMetrics:
+    """
+    Wall-time histograms and METRICS_COUNTERS per Dash callback
+
+    Every gunicorn worker keeps its own; series are labelled with the worker's
+    pid so they stay monotonic when a scrape reaches another worker.
+    """
+
+    def __init__(self, buckets=METRICS_DURATION_BUCKETS):
+        self.buckets = buckets
+        self._callbacks = {}
+        self._lock = threading.Lock()
+
+    def observe(self, callback, seconds, **values):
+        """Record one call of callback taking seconds, adding values to its counters"""
+        with self._lock:
+            metrics = self._callbacks.get(callback)
+            if metrics is None:
+                metrics = self._callbacks[callback] = {
+                    "calls": 0,
+                    "seconds": 0.0,
+                    "buckets": [0] * len(self.buckets),
+                    **{name: 0 for name in METRICS_COUNTERS},
+                }
+            metrics["calls"] += 1
+            metrics["seconds"] += seconds
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    metrics["buckets"][i] += 1
+            for name, value in values.items():
+                metrics[name] += value
+
+    def snapshot(self):
+        """A copy of the metrics per callback, sorted by callback name"""
+        with self._lock:
+            return {
+                name: dict(metrics, buckets=list(metrics["buckets"]))
+                for name, metrics in sorted(self._callbacks.items())
+            }
+
+    def render(self, shared=()):
+        """
+        The metrics in the Prometheus text exposition format
+        shared adds (pid label, snapshot) pairs recorded outside this worker
+        """
+        series = [(os.getpid(), self.snapshot()), *shared]
+        histogram = "glidemap_callback_duration_seconds"
+        lines = [
+            f"# HELP {histogram} Wall time of Dash callback requests",
+            f"# TYPE {histogram} histogram",
+        ]
+        for pid, callbacks in series:
+            for callback, metrics in callbacks.items():
+                labels = f'callback="{callback}",pid="{pid}"'
+                for bound, count in zip(self.buckets, metrics["buckets"]):
+                    lines.append(f'{histogram}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(
+                    f'{histogram}_bucket{{{labels},le="+Inf"}} {metrics["calls"]}'
+                )
+                lines.append(f"{histogram}_sum{{{labels}}} {metrics['seconds']}")
+                lines.append(f"{histogram}_count{{{labels}}} {metrics['calls']}")
+        for name, (metric, description) in METRICS_COUNTERS.items():
+            lines.append(f"# HELP {metric} {description}")
+            lines.append(f"# TYPE {metric} counter")
+            for pid, callbacks in series:
+                for callback, metrics in callbacks.items():
+                    labels = f'callback="{callback}",pid="{pid}"'
+                    lines.append(f"{metric}{{{labels}}} {metrics[name]}")
+        return "\n".join(lines) + "\n"
+
+
+class SharedCallbackMetrics:
+    """
+    Callback metrics kept in a diskcache.Cache, for work done in background
+    jobs, which run in subprocesses outside any worker
+
+    Every worker and job shares the counts, so /metrics reports them under the
+    pid label "jobs". Times are stored as integer microseconds, since diskcache
+    increments integers atomically.
+    """
+
+    def __init__(self, cache, buckets=METRICS_DURATION_BUCKETS):
+        self.cache = cache
+        self.buckets = buckets
+
+    def observe(self, callback, seconds, **values):
+        """Record one call of callback taking seconds, adding values to its counters"""
+        with self.cache.transact():
+            names = self.cache.get(("metrics", "callbacks"), ())
+            if callback not in names:
+                self.cache.set(("metrics", "callbacks"), (*names, callback))
+            self.cache.incr(("metrics", callback, "calls"))
+            self.cache.incr(("metrics", callback, "seconds"), round(seconds * 1e6))
+            for i, bound in enumerate(self.buckets):
+                if seconds <= bound:
+                    self.cache.incr(("metrics", callback, "bucket", i))
+            for name, value in values.items():
+                if name == "parse_seconds":
+                    value = value * 1e6
+                self.cache.incr(("metrics", callback, name), round(value))
+
+    def snapshot(self):
+        """The shared metrics per callback, in the form of CallbackMetrics.snapshot"""
+        callbacks = {}
+        for callback in sorted(self.cache.get(("metrics", "callbacks"), ())):
+
+            def count(*name):
+                return self.cache.get(("metrics", callback, *name), 0)
+
+            callbacks[callback] = {
+                "calls": count("calls"),
+                "seconds": count("seconds") / 1e6,
+                "buckets": [count("bucket", i) for i in range(len(self.buckets))],
+                **{name: count(name) for name in METRICS_COUNTERS},
+                "parse_seconds": count("parse_seconds") / 1e6,
+            }
+        return callbacks
+
+
+# Metrics being collected by the background job running in this thread
+_job_metrics = threading.local()
+
+
+@contextmanager
+def background_job_metrics(callback, shared):
+    """
+    Record the enclosed background job as one call of callback in shared (a
+    SharedCallbackMetrics, or None to record nothing), including the values
+    passed to record_callback_metrics meanwhile
+    """
+    if shared is None:
+        yield
+        return
+    _job_metrics.values = {}
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        values = _job_metrics.__dict__.pop("values")
+        try:
+            shared.observe(callback, time.perf_counter() - start, **values)
+        except Exception as e:
+            print(f"Error recording background job metrics: {e}")
+
+
+def record_callback_metrics(**values):
+    """
+    Add values (METRICS_COUNTERS names) to the metrics of the callback serving
+    this request or running as this background job; does nothing when metrics
+    are off or outside both
+    """
+    if not METRICS_ENABLED:
+        return
+    pending = getattr(_job_metrics, "values", None)
+    if pending is None:
+        if not has_request_context():
+            return
+        pending = g.setdefault("callback_metrics", {})
+    for name, value in values.items():
+        pending[name] = pending.get(name, 0) + value
+
+
+def load_default_dataset():
+    """
+    Register the default CUP file in the dataset registry and return its key
+    The snapshot is used when it matches the file; otherwise the CSV is parsed
+    """
+    try:
+        key = default_cup_file_key()
+        if key is not None:
+            table = load_spot_snapshot(DEFAULT_SNAPSHOT_PATH, key)
+            if table is not None:
+                dataset_registry.put(key, table)
+            else:
+                dataset_registry.get_or_create(key, load_default_cup_file)
+            return key
+    except Exception as e:
+        print(f"Error loading default CUP file: {e}")
+    return None
+
+
+def calculate_center_and_zoom_from_bounds(bounds):
+    """
+    Calculate center and zoom level from bounds
+    Returns (center, zoom) tuple
+    """
+    if not bounds:
+        return default_center, 9
+
+    # Extract coordinates
+    min_lat, min_lon = bounds[0]
+    max_lat, max_lon = bounds[1]
+
+    # Calculate center
+    center_lat = (min_lat + max_lat) / 2
+    center_lon = (min_lon + max_lon) / 2
+    center = [center_lat, center_lon]
+
+    # Calculate zoom level based on coordinate span
+    lat_diff = max_lat - min_lat
+    lon_diff = max_lon - min_lon
+    max_diff = max(lat_diff, lon_diff)
+
+    # Zoom level calculation (rough approximation)
+    # Each zoom level roughly doubles the scale
+    if max_diff > 10:
+        zoom = 6
+    elif max_diff > 5:
+        zoom = 7
+    elif max_diff > 2:
+        zoom = 8
+    elif max_diff > 1:
+        zoom = 9
+    elif max_diff > 0.5:
+        zoom = 10
+    elif max_diff > 0.2:
+        zoom = 11
+    elif max_diff > 0.1:
+        zoom = 12
+    else:
+        zoom = 13
+
+    return center, zoom
+
+
+def calculate_map_bounds(landing_spots):
+    """
+    Calculate map bounds from landing spots
+    Returns [[min_lat, min_lon], [max_lat, max_lon]] for use with Dash Leaflet bounds property
+    """
+    landing_spots = LandingSpotTable.from_data(landing_spots)
+    if not landing_spots:
+        # Return None to indicate no bounds (will use default center/zoom)
+        return None
+
+    # Find min/max coordinates
+    min_lat, max_lat = float(landing_spots.lat.min()), float(landing_spots.lat.max())
+    min_lon, max_lon = float(landing_spots.lon.min()), float(landing_spots.lon.max())
+
+    # Return bounds in Leaflet format: [[south, west], [north, east]]
+    # Add small padding (1% of range) to avoid markers on edge
+    lat_padding = (max_lat - min_lat) * 0.01 or 0.01
+    lon_padding = (max_lon - min_lon) * 0.01 or 0.01
+
+    bounds = [
+        [min_lat - lat_padding, min_lon - lon_padding],  # Southwest corner
+        [max_lat + lat_padding, max_lon + lon_padding],  # Northeast corner
+    ]
+
+    return bounds
+
+
+def build_range_circles(landing_spots, radii, covers=None):
+    """
+    Build a dl.Circle with a popup for each spot in a LandingSpotTable
+    covers optionally lists, per spot, the names of pruned spots its circle covers
+    """
+    circles = []
+    if covers is None:
+        covers = [None] * len(landing_spots)
+    for name, lat, lon, elevation, style, radius, covered in zip(
+        landing_spots.names,
+        landing_spots.lat.tolist(),
+        landing_spots.lon.tolist(),
+        landing_spots.elevation.tolist(),
+        landing_spots.style.tolist(),
+        radii.tolist(),
+        covers,
+    ):
+        circles.append(
+            dl.Circle(
+                center=[lat, lon],
+                radius=radius,
+                color="black",
+                fillColor=STYLE_COLORS.get(style, "gray"),
+                fillOpacity=0.5,
+                weight=1,
+                children=[
+                    dl.Popup(
+                        html.Div(
+                            [
+                                html.Strong(name),
+                                html.Br(),
+                                f"Elevation: {elevation:.0f} ft",
+                                html.Br(),
+                                f"Range: {radius/1000:.1f} km",
+                            ]
+                            + (
+                                [html.Br(), f"Also covers: {', '.join(covered)}"]
+                                if covered
+                                else []
+                            )
+                        )
+                    )
+                ],
+            )
+        )
+    return circles
+
+
+# Parsed datasets shared by all sessions in this worker
+dataset_registry = DatasetRegistry(
+    DATASET_CACHE_MAX_BYTES, DATASET_SPILL_DIR, DATASET_SPILL_MAX_BYTES
+)
+
+# Built layers and coverage envelopes, shared by all workers
+render_cache = RenderCache(
+    RENDER_CACHE_MEMORY_BYTES, RENDER_CACHE_DIR or None, RENDER_CACHE_MAX_BYTES
+)
+
+# Terrain reach of recently drawn spots in this worker
+terrain_reach_cache = TerrainReachCache(TERRAIN_CACHE_ENTRIES)
+
+# Processes computing terrain reach, started on first use. They are spawned
+# rather than forked, since a gunicorn worker may hold locks in other threads
+_terrain_pool = {}
+_terrain_pool_lock = threading.Lock()
+
+
+def terrain_pool():
+    """The ProcessPoolExecutor for terrain reach, started on first use"""
+    with _terrain_pool_lock:
+        if "executor" not in _terrain_pool:
+            _terrain_pool["executor"] = ProcessPoolExecutor(
+                TERRAIN_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+        return _terrain_pool["executor"]
+
+
+def compute_terrain_reach(landing_spots, parameters, directory=None):
+    """
+    Radial reach (spots x TERRAIN_RADIALS, meters) for a LandingSpotTable
+    Cached spots are reused; the rest are computed in chunks of
+    TERRAIN_CHUNK_SITES, spread over the terrain process pool
+    """
+    directory = directory or TERRAIN_DEM_DIR
+    keys = [
+        (directory, lat, lon, elevation, *parameters)
+        for lat, lon, elevation in zip(
+            landing_spots.lat.tolist(),
+            landing_spots.lon.tolist(),
+            landing_spots.elevation.tolist(),
+        )
+    ]
+    reach = np.empty((len(keys), TERRAIN_RADIALS))
+    missing = []
+    for i, key in enumerate(keys):
+        cached = terrain_reach_cache.get(key)
+        if cached is None:
+            missing.append(i)
+        else:
+            reach[i] = cached
+    chunks = [
+        np.asarray(missing[i : i + TERRAIN_CHUNK_SITES], dtype=np.int64)
+        for i in range(0, len(missing), TERRAIN_CHUNK_SITES)
+    ]
+    arguments = (
+        [directory] * len(chunks),
+        [landing_spots.lat[chunk] for chunk in chunks],
+        [landing_spots.lon[chunk] for chunk in chunks],
+        [landing_spots.elevation[chunk] for chunk in chunks],
+        [parameters] * len(chunks),
+    )
+    results = None
+    if TERRAIN_WORKERS and len(chunks) > 1:
+        try:
+            results = list(terrain_pool().map(terrain_reach_distances, *arguments))
+        except BrokenProcessPool as e:
+            print(f"Error computing terrain reach in worker processes: {e}")
+            with _terrain_pool_lock:
+                _terrain_pool.pop("executor", None)
+    if results is None:
+        results = map(terrain_reach_distances, *arguments)
+    for chunk, chunk_reach in zip(chunks, results):
+        reach[chunk] = chunk_reach
+        for i, row in zip(chunk.tolist(), chunk_reach):
+            terrain_reach_cache.put(keys[i], row)
+    return reach
+
+
+def make_background_callback_manager():
+    """
+    The DiskcacheManager that runs large uploads in subprocesses, passing
+    results back through diskcache; None when background uploads are off
+    """
+    if not BACKGROUND_UPLOADS:
+        return None
+    # Imported here so diskcache is only loaded when background uploads are on
+    import diskcache
+    from dash import DiskcacheManager
+
+    return DiskcacheManager(diskcache.Cache(BACKGROUND_JOB_DIR))
+
+
+background_callback_manager = make_background_callback_manager()
+
+# Metrics of background jobs, shared through the job cache
+job_metrics = (
+    SharedCallbackMetrics(background_callback_manager.handle)
+    if background_callback_manager is not None and METRICS_ENABLED
+    else None
+)
+
+# The default CUP file is registered on first use, so importing the app stays fast
+_default_dataset = {}
+_default_dataset_lock = threading.Lock()
+
+
+def default_dataset_signature():
+    """Modification time and size of the default CUP file and snapshot"""
+    signature = []
+    for path in (DEFAULT_CUP_FILE_PATH, DEFAULT_SNAPSHOT_PATH):
+        try:
+            stat = os.stat(path)
+            signature.append((stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append(None)
+    return tuple(signature)
+
+
+def default_dataset_key():
+    """
+    Key of the default CUP file, registering it on the first call
+    The first call also starts this worker's watcher for edits to the file
+    """
+    with _default_dataset_lock:
+        if "key" not in _default_dataset:
+            _default_dataset["signature"] = default_dataset_signature()
+            _default_dataset["key"] = load_default_dataset()
+            if DEFAULT_RELOAD_SECONDS > 0:
+                threading.Thread(
+                    target=watch_default_dataset,
+                    args=(DEFAULT_RELOAD_SECONDS,),
+                    name="default-dataset-watcher",
+                    daemon=True,
+                ).start()
+        return _default_dataset["key"]
+
+
+def reload_default_dataset():
+    """
+    Reload the default dataset if its CUP file or snapshot changed
+    The new version is parsed and registered before the default key is swapped,
+    so callbacks already using the old key keep their table. If the new file
+    cannot be loaded the old version stays the default. Returns True on a swap.
+    """
+    with _default_dataset_lock:
+        previous = _default_dataset.get("signature")
+    signature = default_dataset_signature()
+    if signature == previous:
+        return False
+    key = load_default_dataset()
+    with _default_dataset_lock:
+        _default_dataset["signature"] = signature
+        if key is None:
+            return False
+        _default_dataset["key"] = key
+    print(f"Loaded default CUP file {DEFAULT_CUP_FILE_PATH} ({key[:12]})")
+    return True
+
+
+def watch_default_dataset(interval):
+    """Check the default CUP file for edits every interval seconds, forever"""
+    while True:
+        time.sleep(interval)
+        try:
+            reload_default_dataset()
+        except Exception as e:
+            print(f"Error reloading default CUP file: {e}")
+
+
+def build_range_features(landing_spots, radii=None, covers=None):
+    """
+    Build compact GeoJSON point features for a LandingSpotTable
+    Properties are n (name), e (elevation in feet, null if missing) and s (style),
+    plus r (radius in meters) when radii are given instead of computed in the
+    browser, and c (names of pruned spots the circle covers) when covers are given
+    """
+    features = [
+        {
+            "type": "Feature",
+            "geometry": {"type": "Point", "coordinates": [lon, lat]},
+            "properties": {
+                "n": name,
+                "e": None if elevation != elevation else elevation,
+                "s": style,
+            },
+        }
+        for name, lat, lon, elevation, style in zip(
+            landing_spots.names,
+            landing_spots.lat.tolist(),
+            landing_spots.lon.tolist(),
+            landing_spots.elevation.tolist(),
+            landing_spots.style.tolist(),
+        )
+    ]
+    if radii is not None:
+        for feature, radius in zip(features, radii.tolist()):
+            feature["properties"]["r"] = radius
+    if covers is not None:
+        for feature, covered in zip(features, covers):
+            if covered:
+                feature["properties"]["c"] = covered
+    return features
 
-    return center, zoom
+
+def geojson_hideout(glide_ratio, altitude, arrival_height):
+    """Glide parameters and style colors read by the browser's range circle functions"""
+    return {
+        "glide": glide_ratio,
+        "altitude": altitude,
+        "arrival": arrival_height,
+        "colors": {str(style): color for style, color in STYLE_COLORS.items()},
+    }
 
 
-def calculate_map_bounds(landing_spots):
+def build_geojson_layer(landing_spots, parameters, radii=None, covers=None):
     """
-    Calculate map bounds from landing spots
-    Returns [[min_lat, min_lon], [max_lat, max_lon]] for use with Dash Leaflet bounds property
+    Build a layer as a single dl.GeoJSON of spot features
+    The browser turns each feature into a range circle (glidemap.pointToLayer)
+    and builds its popup only when it is clicked (glidemap.onEachFeature)
     """
-    if not landing_spots:
-        # Return None to indicate no bounds (will use default center/zoom)
-        return None
+    return geojson_layer(
+        {
+            "type": "FeatureCollection",
+            "features": build_range_features(landing_spots, radii, covers),
+        },
+        parameters,
+    )
 
-    # Find min/max coordinates
-    lats = [spot["lat"] for spot in landing_spots]
-    lons = [spot["lon"] for spot in landing_spots]
 
-    min_lat, max_lat = min(lats), max(lats)
-    min_lon, max_lon = min(lons), max(lons)
+def geojson_layer(data, parameters):
+    """Wrap a feature collection of spots in a dl.GeoJSON drawing range circles"""
+    return [
+        dl.GeoJSON(
+            data=data,
+            hideout=geojson_hideout(*parameters),
+            pointToLayer={"variable": "glidemap.pointToLayer"},
+            onEachFeature={"variable": "glidemap.onEachFeature"},
+        )
+    ]
 
-    # Return bounds in Leaflet format: [[south, west], [north, east]]
-    # Add small padding (1% of range) to avoid markers on edge
-    lat_padding = (max_lat - min_lat) * 0.01 or 0.01
-    lon_padding = (max_lon - min_lon) * 0.01 or 0.01
 
-    bounds = [
-        [min_lat - lat_padding, min_lon - lon_padding],  # Southwest corner
-        [max_lat + lat_padding, max_lon + lon_padding],  # Northeast corner
+def build_coverage_layer(
+    landing_spots, dataset_key, layer, parameters, zoom, clip=None
+):
+    """
+    Build a layer's coverage envelope as a single dl.GeoJSON component
+    The envelope is cached per dataset, layer, glide parameters, whole zoom level
+    and clip box (see coverage_envelope)
+    """
+    zoom = int(zoom)
+
+    def compute():
+        spots = landing_spots.with_styles(LAYER_STYLES[layer])
+        radii = calculate_radii(*parameters, spots.elevation)
+        if clip is not None:
+            middle = (clip[0] + clip[2]) / 2
+        else:
+            middle = float(np.mean(spots.lat)) if len(spots) else 0.0
+        geometry = coverage_envelope(
+            spots.lat,
+            spots.lon,
+            radii,
+            envelope_tolerance_meters(zoom, middle),
+            clip,
+        )
+        return {
+            "type": "FeatureCollection",
+            "features": [
+                {"type": "Feature", "geometry": geometry, "properties": {}},
+            ],
+        }
+
+    data = render_cache.get_or_create(
+        ("envelope", dataset_key, layer, *parameters, zoom, clip), compute
+    )
+    color = STYLE_COLORS[LAYER_STYLES[layer][0]]
+    return [
+        dl.GeoJSON(
+            data=data,
+            style={
+                "color": "black",
+                "weight": 1,
+                "fillColor": color,
+                "fillOpacity": 0.5,
+            },
+        )
     ]
 
-    return bounds
+
+def build_terrain_layer(landing_spots, dataset_key, indices, parameters):
+    """
+    Build a layer of terrain-aware reach polygons as a single dl.GeoJSON
+    Feature properties follow build_range_features, with r the longest reach;
+    the layer's data is cached per dataset, spots and glide parameters
+    """
+
+    def compute():
+        spots = landing_spots[indices]
+        reach = compute_terrain_reach(spots, parameters)
+        features = build_range_features(spots, reach.max(axis=1, initial=1.0))
+        for feature, lat, lon, spot_reach in zip(
+            features, spots.lat.tolist(), spots.lon.tolist(), reach
+        ):
+            feature["geometry"] = {
+                "type": "Polygon",
+                "coordinates": [reach_polygon(lat, lon, spot_reach)],
+            }
+        return {"type": "FeatureCollection", "features": features}
+
+    data = render_cache.get_or_create(
+        ("terrain", dataset_key, *parameters, layer_digest(indices)), compute
+    )
+    return [
+        dl.GeoJSON(
+            data=data,
+            hideout=geojson_hideout(*parameters),
+            style={"variable": "glidemap.polygonStyle"},
+            onEachFeature={"variable": "glidemap.onEachFeature"},
+        )
+    ]
+
+
+def terrain_sites(landing_spots, indices, center):
+    """The (sorted) TERRAIN_MAX_SITES of indices nearest center, a (lat, lon)"""
+    if len(indices) <= TERRAIN_MAX_SITES:
+        return indices
+    distances = haversine_distances(
+        *center, landing_spots.lat[indices], landing_spots.lon[indices]
+    )
+    nearest = np.argpartition(distances, TERRAIN_MAX_SITES - 1)[:TERRAIN_MAX_SITES]
+    return np.sort(indices[nearest])
+
+
+def layer_digest(indices, covers=None):
+    """Short fingerprint of the spots (and covered names) drawn in a layer"""
+    digest = hashlib.sha256(np.ascontiguousarray(indices, dtype=np.int64).tobytes())
+    if covers:
+        digest.update(json.dumps(covers).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def patch_range_circles(radii, patch=None):
+    """
+    Build a Patch that updates only the radius and popup range text of circles
+    already rendered by build_range_circles, leaving the components in place
+    """
+    patch = Patch() if patch is None else patch
+    for i, radius in enumerate(radii.tolist()):
+        circle = patch[i]["props"]
+        circle["radius"] = radius
+        # Popup > Div > [name, br, elevation, br, range, ...]
+        popup_lines = circle["children"][0]["props"]["children"]["props"]["children"]
+        popup_lines[4] = f"Range: {radius/1000:.1f} km"
+    return patch
 
 
 # Initialize the Dash app with Bootstrap theme
@@ -266,6 +3317,11 @@ app = Dash(__name__, external_stylesheets=[dbc.themes.BOOTSTRAP])
 # Expose the Flask server for production deployment (gunicorn, etc.)
 server = app.server
 
+# Refuse request bodies far beyond any allowed upload before they are read;
+# uploads arrive base64-encoded, a third larger than the file
+if UPLOAD_MAX_BYTES:
+    server.config["MAX_CONTENT_LENGTH"] = 2 * UPLOAD_MAX_BYTES + (1 << 20)
+
 # Add custom CSS for full-height layout via index_string
 app.index_string = """
 <!DOCTYPE html>
@@ -275,6 +3331,66 @@ app.index_string = """
         <title>{%title%}</title>
         {%favicon%}
         {%css%}
+        <script>
+            // Range circles for dl.GeoJSON layers (see build_geojson_layer)
+            window.glidemap = {
+                // Same as calculate_radii: missing elevations and unreachable
+                // spots use the 1.0 m floor
+                radius: function(elevation, hideout) {
+                    const radius = 0.3048 * hideout.glide *
+                        (hideout.altitude - hideout.arrival - elevation);
+                    return (elevation === null || !(radius >= 1.0)) ? 1.0 : radius;
+                },
+                pointToLayer: function(feature, latlng, context) {
+                    const hideout = context.hideout;
+                    const spot = feature.properties;
+                    // Cluster circles come with their radius precomputed
+                    const radius = spot.r !== undefined ?
+                        spot.r : window.glidemap.radius(spot.e, hideout);
+                    return L.circle(latlng, {
+                        radius: radius,
+                        color: "black",
+                        fillColor: hideout.colors[spot.s] || "gray",
+                        fillOpacity: 0.5,
+                        weight: 1,
+                    });
+                },
+                // Reach polygons (see build_terrain_layer)
+                polygonStyle: function(feature, context) {
+                    return {
+                        color: "black",
+                        fillColor: context.hideout.colors[feature.properties.s] || "gray",
+                        fillOpacity: 0.5,
+                        weight: 1,
+                    };
+                },
+                // Popup content is only built when a circle is clicked
+                onEachFeature: function(feature, layer) {
+                    layer.bindPopup(function() {
+                        const spot = feature.properties;
+                        const body = document.createElement("div");
+                        const name = document.createElement("strong");
+                        name.textContent = spot.n;
+                        const elevation = spot.e === null ? "nan" : spot.e.toFixed(0);
+                        body.append(
+                            name,
+                            document.createElement("br"),
+                            "Elevation: " + elevation + " ft",
+                            document.createElement("br"),
+                            "Range: " + ((layer.getRadius ?
+                                layer.getRadius() : spot.r) / 1000).toFixed(1) + " km"
+                        );
+                        if (spot.c) {
+                            body.append(
+                                document.createElement("br"),
+                                "Also covers: " + spot.c.join(", ")
+                            );
+                        }
+                        return body;
+                    });
+                },
+            };
+        </script>
         <style>
             body {
                 margin: 0;
@@ -350,297 +3466,401 @@ app.index_string = """
 # Default landing spots (Sterling, Massachusetts area)
 default_center = [42.426, -71.793]
 
-# App layout with full-height map and sidebar controls
-app.layout = html.Div(
-    [
-        html.Div(
-            [
-                # Header
-                html.Div(
-                    [
-                        html.H2("Glide Range Map", className="mb-1"),
-                        html.P(
-                            "Interactive visualization of glider range",
-                            className="text-muted mb-0",
-                            style={"fontSize": "0.9rem"},
-                        ),
-                    ],
-                    className="header-section",
-                ),
-                # Main content area with sidebar and map
-                html.Div(
-                    [
-                        # Left sidebar with controls
-                        html.Div(
-                            [
-                                dbc.Card(
-                                    [
-                                        dbc.CardBody(
-                                            [
-                                                html.H5(
-                                                    "Glide Parameters",
-                                                    className="card-title mb-3",
-                                                ),
-                                                dbc.Label(
-                                                    "Glide Ratio",
-                                                    html_for="glide-ratio",
-                                                    className="mt-2",
-                                                ),
-                                                dbc.Input(
-                                                    id="glide-ratio",
-                                                    type="number",
-                                                    min=GLIDE_RATIO_MIN,
-                                                    max=GLIDE_RATIO_MAX,
-                                                    step=0.1,
-                                                    value=GLIDE_RATIO_DEFAULT,
-                                                    className="mb-1",
-                                                ),
-                                                dbc.FormText(
-                                                    "Glider's glide ratio (e.g., 20:1)",
-                                                    className="mb-3",
-                                                ),
-                                                dbc.Label(
-                                                    "Altitude MSL (ft)",
-                                                    html_for="altitude",
-                                                    className="mt-2",
-                                                ),
-                                                dbc.Input(
-                                                    id="altitude",
-                                                    type="number",
-                                                    min=ALTITUDE_MIN,
-                                                    max=ALTITUDE_MAX,
-                                                    step=100,
-                                                    value=ALTITUDE_DEFAULT,
-                                                    className="mb-1",
-                                                ),
-                                                dbc.FormText(
-                                                    "Current altitude above sea level",
-                                                    className="mb-3",
-                                                ),
-                                                dbc.Label(
-                                                    "Arrival Height (ft)",
-                                                    html_for="arrival-height",
-                                                    className="mt-2",
-                                                ),
-                                                dbc.Input(
-                                                    id="arrival-height",
-                                                    type="number",
-                                                    min=ARRIVAL_HEIGHT_MIN,
-                                                    max=ARRIVAL_HEIGHT_MAX,
-                                                    step=100,
-                                                    value=ARRIVAL_HEIGHT_DEFAULT,
-                                                    className="mb-1",
-                                                ),
-                                                dbc.FormText(
-                                                    "Minimum safe arrival height",
-                                                    className="mb-3",
-                                                ),
-                                                html.Hr(),
-                                                html.H5(
-                                                    "Load CUP File",
-                                                    className="card-title mt-3 mb-3",
-                                                ),
-                                                dcc.Upload(
-                                                    id="upload-cup",
-                                                    children=dbc.Button(
-                                                        "Upload CUP File",
-                                                        color="primary",
+
+def serve_layout():
+    """
+    App layout with full-height map and sidebar controls
+    Built on each page load, so the default CUP file is only loaded when the
+    first page is served; Dash also calls it once at startup, outside a request,
+    to validate callbacks
+    """
+    dataset_key = default_dataset_key() if has_request_context() else None
+    return html.Div(
+        [
+            html.Div(
+                [
+                    # Header
+                    html.Div(
+                        [
+                            html.H2("Glide Range Map", className="mb-1"),
+                            html.P(
+                                "Interactive visualization of glider range",
+                                className="text-muted mb-0",
+                                style={"fontSize": "0.9rem"},
+                            ),
+                        ],
+                        className="header-section",
+                    ),
+                    # Main content area with sidebar and map
+                    html.Div(
+                        [
+                            # Left sidebar with controls
+                            html.Div(
+                                [
+                                    dbc.Card(
+                                        [
+                                            dbc.CardBody(
+                                                [
+                                                    html.H5(
+                                                        "Glide Parameters",
+                                                        className="card-title mb-3",
+                                                    ),
+                                                    dbc.Label(
+                                                        "Glide Ratio",
+                                                        html_for="glide-ratio",
+                                                        className="mt-2",
+                                                    ),
+                                                    dbc.Input(
+                                                        id="glide-ratio",
+                                                        type="number",
+                                                        min=GLIDE_RATIO_MIN,
+                                                        max=GLIDE_RATIO_MAX,
+                                                        step=0.1,
+                                                        value=GLIDE_RATIO_DEFAULT,
+                                                        className="mb-1",
+                                                    ),
+                                                    dbc.FormText(
+                                                        "Glider's glide ratio (e.g., 20:1)",
+                                                        className="mb-3",
+                                                    ),
+                                                    dbc.Label(
+                                                        "Altitude MSL (ft)",
+                                                        html_for="altitude",
+                                                        className="mt-2",
+                                                    ),
+                                                    dbc.Input(
+                                                        id="altitude",
+                                                        type="number",
+                                                        min=ALTITUDE_MIN,
+                                                        max=ALTITUDE_MAX,
+                                                        step=100,
+                                                        value=ALTITUDE_DEFAULT,
+                                                        className="mb-1",
+                                                    ),
+                                                    dbc.FormText(
+                                                        "Current altitude above sea level",
+                                                        className="mb-3",
+                                                    ),
+                                                    dbc.Label(
+                                                        "Arrival Height (ft)",
+                                                        html_for="arrival-height",
+                                                        className="mt-2",
+                                                    ),
+                                                    dbc.Input(
+                                                        id="arrival-height",
+                                                        type="number",
+                                                        min=ARRIVAL_HEIGHT_MIN,
+                                                        max=ARRIVAL_HEIGHT_MAX,
+                                                        step=100,
+                                                        value=ARRIVAL_HEIGHT_DEFAULT,
+                                                        className="mb-1",
+                                                    ),
+                                                    dbc.FormText(
+                                                        "Minimum safe arrival height",
+                                                        className="mb-3",
+                                                    ),
+                                                    html.Hr(),
+                                                    html.H5(
+                                                        "Load CUP File",
+                                                        className="card-title mt-3 mb-3",
+                                                    ),
+                                                    dcc.Upload(
+                                                        id="upload-cup",
+                                                        children=dbc.Button(
+                                                            "Upload CUP File",
+                                                            color="primary",
+                                                            className="mb-2",
+                                                            style={"width": "100%"},
+                                                        ),
+                                                        multiple=False,
+                                                        style={"display": "block"},
+                                                    ),
+                                                    html.Div(
+                                                        id="upload-status",
+                                                        className="text-muted small",
+                                                    ),
+                                                    html.Hr(),
+                                                    html.H5(
+                                                        "Map Layers",
+                                                        className="card-title mt-3 mb-3",
+                                                    ),
+                                                    dbc.Checklist(
+                                                        id="layer-toggles",
+                                                        options=[
+                                                            {
+                                                                "label": html.Span(
+                                                                    [
+                                                                        html.Span(
+                                                                            style={
+                                                                                "background": "#AAC896",
+                                                                                "width": "12px",
+                                                                                "height": "12px",
+                                                                                "display": "inline-block",
+                                                                                "marginRight": "6px",
+                                                                                "verticalAlign": "middle",
+                                                                            }
+                                                                        ),
+                                                                        "Airports",
+                                                                    ]
+                                                                ),
+                                                                "value": "airports",
+                                                            },
+                                                            {
+                                                                "label": html.Span(
+                                                                    [
+                                                                        html.Span(
+                                                                            style={
+                                                                                "background": "#AAAADC",
+                                                                                "width": "12px",
+                                                                                "height": "12px",
+                                                                                "display": "inline-block",
+                                                                                "marginRight": "6px",
+                                                                                "verticalAlign": "middle",
+                                                                            }
+                                                                        ),
+                                                                        "Grass Strips",
+                                                                    ]
+                                                                ),
+                                                                "value": "grass",
+                                                            },
+                                                            {
+                                                                "label": html.Span(
+                                                                    [
+                                                                        html.Span(
+                                                                            style={
+                                                                                "background": "#E6E696",
+                                                                                "width": "12px",
+                                                                                "height": "12px",
+                                                                                "display": "inline-block",
+                                                                                "marginRight": "6px",
+                                                                                "verticalAlign": "middle",
+                                                                            }
+                                                                        ),
+                                                                        "Landable Fields",
+                                                                    ]
+                                                                ),
+                                                                "value": "landables",
+                                                            },
+                                                        ],
+                                                        value=[
+                                                            "airports",
+                                                            "grass",
+                                                            "landables",
+                                                        ],
                                                         className="mb-2",
-                                                        style={"width": "100%"},
                                                     ),
-                                                    multiple=False,
-                                                    style={"display": "block"},
-                                                ),
-                                                html.Div(
-                                                    id="upload-status",
-                                                    className="text-muted small",
-                                                ),
-                                                html.Hr(),
-                                                html.H5(
-                                                    "Map Layers",
-                                                    className="card-title mt-3 mb-3",
-                                                ),
-                                                dbc.Checklist(
-                                                    id="layer-toggles",
-                                                    options=[
-                                                        {
-                                                            "label": html.Span(
-                                                                [
-                                                                    html.Span(
-                                                                        style={
-                                                                            "background": "#AAC896",
-                                                                            "width": "12px",
-                                                                            "height": "12px",
-                                                                            "display": "inline-block",
-                                                                            "marginRight": "6px",
-                                                                            "verticalAlign": "middle",
-                                                                        }
-                                                                    ),
-                                                                    "Airports",
-                                                                ]
+                                                ]
+                                            )
+                                        ]
+                                    )
+                                ],
+                                className="sidebar",
+                            ),
+                            # Right side - Map
+                            html.Div(
+                                [
+                                    # Instructions overlay (centered on map)
+                                    html.Div(
+                                        [
+                                            dbc.Alert(
+                                                [
+                                                    html.Strong(
+                                                        "Quick Guide",
+                                                        className="d-block mb-2",
+                                                    ),
+                                                    html.Ul(
+                                                        [
+                                                            html.Li(
+                                                                "Green: Airports/airfields",
+                                                                className="small",
                                                             ),
-                                                            "value": "airports",
-                                                        },
-                                                        {
-                                                            "label": html.Span(
-                                                                [
-                                                                    html.Span(
-                                                                        style={
-                                                                            "background": "#AAAADC",
-                                                                            "width": "12px",
-                                                                            "height": "12px",
-                                                                            "display": "inline-block",
-                                                                            "marginRight": "6px",
-                                                                            "verticalAlign": "middle",
-                                                                        }
-                                                                    ),
-                                                                    "Grass Strips",
-                                                                ]
+                                                            html.Li(
+                                                                "Blue: Grass strips",
+                                                                className="small",
                                                             ),
-                                                            "value": "grass",
-                                                        },
-                                                        {
-                                                            "label": html.Span(
-                                                                [
-                                                                    html.Span(
-                                                                        style={
-                                                                            "background": "#E6E696",
-                                                                            "width": "12px",
-                                                                            "height": "12px",
-                                                                            "display": "inline-block",
-                                                                            "marginRight": "6px",
-                                                                            "verticalAlign": "middle",
-                                                                        }
-                                                                    ),
-                                                                    "Landable Fields",
-                                                                ]
+                                                            html.Li(
+                                                                "Yellow: Landable fields",
+                                                                className="small",
                                                             ),
-                                                            "value": "landables",
-                                                        },
-                                                    ],
-                                                    value=[
-                                                        "airports",
-                                                        "grass",
-                                                        "landables",
-                                                    ],
-                                                    className="mb-2",
-                                                ),
-                                            ]
-                                        )
-                                    ]
-                                )
-                            ],
-                            className="sidebar",
-                        ),
-                        # Right side - Map
-                        html.Div(
-                            [
-                                # Instructions overlay (centered on map)
-                                html.Div(
-                                    [
-                                        dbc.Alert(
-                                            [
-                                                html.Strong(
-                                                    "Quick Guide",
-                                                    className="d-block mb-2",
-                                                ),
-                                                html.Ul(
-                                                    [
-                                                        html.Li(
-                                                            "Green: Airports/airfields",
-                                                            className="small",
-                                                        ),
-                                                        html.Li(
-                                                            "Blue: Grass strips",
-                                                            className="small",
-                                                        ),
-                                                        html.Li(
-                                                            "Yellow: Landable fields",
-                                                            className="small",
+                                                        ],
+                                                        className="mb-2",
+                                                        style={"paddingLeft": "1.2rem"},
+                                                    ),
+                                                    html.P(
+                                                        "Adjust parameters on the left.",
+                                                        className="small mb-0",
+                                                    ),
+                                                    html.P(
+                                                        (
+                                                            "Ranges stop where terrain blocks the glide."
+                                                            if TERRAIN_RENDERING
+                                                            else "Range circles ignore blocking terrain."
                                                         ),
-                                                    ],
-                                                    className="mb-2",
-                                                    style={"paddingLeft": "1.2rem"},
-                                                ),
-                                                html.P(
-                                                    "Adjust parameters on the left.",
-                                                    className="small mb-0",
-                                                ),
-                                                html.P(
-                                                    "Range circles ignore blocking terrain.",
-                                                    className="small mb-0",
-                                                ),
-                                            ],
-                                            color="info",
-                                            dismissable=True,
-                                            className="shadow",
-                                        )
-                                    ],
-                                    className="instructions-overlay",
-                                ),
-                                # Map container
-                                html.Div(
-                                    id="map-container",
-                                    children=[
-                                        dl.Map(
-                                            id="map",
-                                            center=default_center,
-                                            zoom=9,
-                                            style={"width": "100%", "height": "100%"},
-                                            children=[
-                                                dl.TileLayer(
-                                                    url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
-                                                    attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors',
-                                                ),
-                                                dl.LayerGroup(
-                                                    id="airports-layer", children=[]
-                                                ),
-                                                dl.LayerGroup(
-                                                    id="grass-layer", children=[]
-                                                ),
-                                                dl.LayerGroup(
-                                                    id="landables-layer", children=[]
-                                                ),
-                                            ],
-                                        )
-                                    ],
-                                    style={"width": "100%", "height": "100%"},
-                                ),
-                            ],
-                            className="map-section",
-                        ),
-                    ],
-                    className="content-section",
-                ),
-                # Footer
-                html.Div(
-                    [
-                        html.Small(
-                            [
-                                "Glide Range Map | ",
-                                html.A(
-                                    "GitHub",
-                                    href="https://github.com/dssherrill/GlideMap",
-                                    target="_blank",
-                                ),
-                            ],
-                            className="text-muted",
-                        )
-                    ],
-                    className="footer-section",
-                ),
-            ],
-            className="app-container",
-        ),
-        # Store for landing spots data - load default CUP file on initialization
-        dcc.Store(id="landing-spots-store", data=load_default_cup_file()),
-    ]
-)
+                                                        className="small mb-0",
+                                                    ),
+                                                ],
+                                                color="info",
+                                                dismissable=True,
+                                                className="shadow",
+                                            )
+                                        ],
+                                        className="instructions-overlay",
+                                    ),
+                                    # Map container
+                                    html.Div(
+                                        id="map-container",
+                                        children=[
+                                            dl.Map(
+                                                id="map",
+                                                center=default_center,
+                                                zoom=DEFAULT_MAP_ZOOM,
+                                                style={
+                                                    "width": "100%",
+                                                    "height": "100%",
+                                                },
+                                                children=[
+                                                    dl.TileLayer(
+                                                        url="https://{s}.tile.openstreetmap.org/{z}/{x}/{y}.png",
+                                                        attribution='&copy; <a href="https://www.openstreetmap.org/copyright">OpenStreetMap</a> contributors',
+                                                    ),
+                                                    dl.LayerGroup(
+                                                        id="airports-layer", children=[]
+                                                    ),
+                                                    dl.LayerGroup(
+                                                        id="grass-layer", children=[]
+                                                    ),
+                                                    dl.LayerGroup(
+                                                        id="landables-layer",
+                                                        children=[],
+                                                    ),
+                                                ],
+                                            )
+                                        ],
+                                        style={"width": "100%", "height": "100%"},
+                                    ),
+                                ],
+                                className="map-section",
+                            ),
+                        ],
+                        className="content-section",
+                    ),
+                    # Footer
+                    html.Div(
+                        [
+                            html.Small(
+                                [
+                                    "Glide Range Map | ",
+                                    html.A(
+                                        "GitHub",
+                                        href="https://github.com/dssherrill/GlideMap",
+                                        target="_blank",
+                                    ),
+                                ],
+                                className="text-muted",
+                            )
+                        ],
+                        className="footer-section",
+                    ),
+                ],
+                className="app-container",
+            ),
+            # Store for the dataset key - the spots themselves stay on the server
+            dcc.Store(id="landing-spots-store", data=dataset_key),
+            # Uploads routed to the request (small) or a background job (large)
+            dcc.Store(id="upload-store"),
+            dcc.Store(id="upload-job-store"),
+            # Per-layer circle elevations for clientside radius updates
+            dcc.Store(id="layer-elevations-store"),
+            # Dataset key and circle count of each layer currently on the map
+            dcc.Store(id="rendered-layers-store"),
+        ]
+    )
+
+
+app.layout = serve_layout
+
+
+def register_upload(contents, filename, progress=None):
+    """
+    Parse an uploaded CUP file into the dataset registry
+    Returns the dataset key (None on failure) and a status message
+    """
+    counts = {"rejected": 0}
+    budget = (
+        DatasetBudget(DATASET_MAX_BYTES, DATASET_DOWNSAMPLE)
+        if DATASET_MAX_BYTES
+        else None
+    )
+
+    def parse():
+        def on_progress(rows, rejected):
+            counts["rejected"] = rejected
+            if progress is not None:
+                progress(rows, rejected)
+
+        start = time.perf_counter()
+        table = parse_cup_file(contents, on_progress, budget)
+        record_callback_metrics(
+            parse_seconds=time.perf_counter() - start,
+            rejected_rows=counts["rejected"],
+        )
+        return table
+
+    try:
+        with trace_memory(f"upload {filename}"):
+            # Identical uploads share one key, so they are parsed only once
+            key = DatasetRegistry.key_for(contents)
+            landing_spots = dataset_registry.get_or_create(key, parse)
+        record_callback_metrics(spots=len(landing_spots))
+        if not landing_spots:
+            return None, html.Span(
+                "No landing spots found in file", className="text-warning"
+            )
+
+        # Read from the table, so uploads served from the registry report it too
+        if landing_spots.sampling is not None:
+            spots_read, stride = landing_spots.sampling
+            return key, html.Span(
+                f"Loaded {len(landing_spots):,} of {spots_read:,} landing "
+                f"spots (one in {stride}) from {filename} to stay within "
+                f"the {DATASET_MAX_BYTES / (1 << 20):.0f} MB dataset limit",
+                className="text-warning",
+            )
+        return key, html.Span(
+            f"Loaded {len(landing_spots)} landing spots from {filename}",
+            className="text-success",
+        )
+    except Exception as e:
+        record_callback_metrics(parse_errors=1)
+        return None, html.Span(f"Error loading file: {str(e)}", className="text-danger")
+
+
+# Sends an upload to upload-store or, from BACKGROUND_UPLOAD_MIN_BYTES, to
+# upload-job-store, so the browser transfers it to the server only once
+UPLOAD_ROUTE_JS = """
+function(contents) {
+    const skip = window.dash_clientside.no_update;
+    if (!contents) {
+        return [skip, skip];
+    }
+    return contents.length >= %d ? [skip, contents] : [contents, skip];
+}
+"""
+
+if BACKGROUND_UPLOADS:
+    clientside_callback(
+        UPLOAD_ROUTE_JS % BACKGROUND_UPLOAD_MIN_BYTES,
+        [Output("upload-store", "data"), Output("upload-job-store", "data")],
+        Input("upload-cup", "contents"),
+    )
+    UploadSource = Input("upload-store", "data")
+else:
+    UploadSource = Input("upload-cup", "contents")
 
 
 @callback(
     [Output("landing-spots-store", "data"), Output("upload-status", "children")],
-    Input("upload-cup", "contents"),
+    UploadSource,
     State("upload-cup", "filename"),
 )
 def load_cup_file(contents, filename):
@@ -648,20 +3868,72 @@ def load_cup_file(contents, filename):
     if contents is None:
         # Don't update when no file is uploaded (default data is already loaded in Store)
         return no_update, no_update
+    return register_upload(contents, filename)
 
-    try:
-        landing_spots = parse_cup_file(contents)
-        if not landing_spots:
-            return [], html.Span(
-                "No landing spots found in file", className="text-warning"
+
+def upload_progress_message(filename, rows, rejected):
+    """Status shown while a background job parses an upload"""
+    return html.Span(
+        f"Parsing {filename}: {rows:,} rows read, {rejected:,} rejected",
+        className="text-muted",
+    )
+
+
+if BACKGROUND_UPLOADS:
+
+    @callback(
+        [
+            Output("landing-spots-store", "data", allow_duplicate=True),
+            Output("upload-status", "children", allow_duplicate=True),
+        ],
+        Input("upload-job-store", "data"),
+        State("upload-cup", "filename"),
+        background=True,
+        manager=background_callback_manager,
+        interval=BACKGROUND_POLL_MS,
+        progress=Output("upload-status", "children", allow_duplicate=True),
+        progress_default=no_update,
+        # A newer large upload replaces this job automatically; a small one
+        # cancels it here so the stale result never reaches the map
+        cancel=Input("upload-store", "data"),
+        prevent_initial_call=True,
+    )
+    def load_large_cup_file(set_progress, contents, filename):
+        """Parse a large CUP file in a background job, reporting progress"""
+        if contents is None:
+            return no_update, no_update
+        set_progress(upload_progress_message(filename, 0, 0))
+        with background_job_metrics("load_large_cup_file", job_metrics):
+            record_callback_metrics(request_bytes=len(contents))
+            return register_upload(
+                contents,
+                filename,
+                lambda rows, rejected: set_progress(
+                    upload_progress_message(filename, rows, rejected)
+                ),
             )
 
-        return landing_spots, html.Span(
-            f"Loaded {len(landing_spots)} landing spots from {filename}",
-            className="text-success",
-        )
-    except Exception as e:
-        return [], html.Span(f"Error loading file: {str(e)}", className="text-danger")
+
+# In clientside mode glide parameters are read but do not trigger the server
+GlideParameter = State if CLIENTSIDE_RADIUS_UPDATES else Input
+
+
+def rendered_spot_indices(indices, n_spots):
+    """
+    Validate a layer's rendered spot indices sent back by the browser
+    Returns an int64 array, or None if the list is missing or malformed
+    """
+    if not isinstance(indices, list):
+        return None
+    try:
+        indices = np.asarray(indices, dtype=np.int64)
+    except (TypeError, ValueError, OverflowError):
+        return None
+    if indices.ndim != 1 or (
+        len(indices) and (indices.min() < 0 or indices.max() >= n_spots)
+    ):
+        return None
+    return indices
 
 
 @callback(
@@ -671,121 +3943,576 @@ def load_cup_file(contents, filename):
         Output("landables-layer", "children"),
         Output("map", "center"),
         Output("map", "zoom"),
+        Output("layer-elevations-store", "data"),
+        Output("rendered-layers-store", "data"),
     ],
     [
         Input("landing-spots-store", "data"),
-        Input("glide-ratio", "value"),
-        Input("altitude", "value"),
-        Input("arrival-height", "value"),
+        GlideParameter("glide-ratio", "value"),
+        GlideParameter("altitude", "value"),
+        GlideParameter("arrival-height", "value"),
         Input("layer-toggles", "value"),
+        Input("map", "bounds"),
+        Input("map", "zoom"),
     ],
+    State("rendered-layers-store", "data"),
 )
 def update_map_layers(
-    landing_spots, glide_ratio, altitude, arrival_height, visible_layers
+    dataset_key,
+    glide_ratio,
+    altitude,
+    arrival_height,
+    visible_layers,
+    map_bounds=None,
+    map_zoom=None,
+    rendered_layers=None,
 ):
-    """Update map layers with landing spots and glide range circles"""
+    """
+    Update map layers with landing spots and glide range circles
+
+    Circles are rebuilt only when the dataset changes or a layer is switched on.
+    With viewport culling, only circles reaching the padded map view are sent,
+    and moving the map appends the newly visible ones. When a glide parameter
+    changes, circles already in the browser receive a Patch that updates each
+    radius and popup range text. In envelope mode each layer is instead one
+    cached coverage envelope, redrawn when the parameters or zoom level change.
+    """
+    landing_spots = dataset_registry.get(dataset_key)
     if not landing_spots:
         # Return empty layer groups for empty state
-        return [], [], [], no_update, no_update
+        return [], [], [], no_update, no_update, None, None
 
-    # Validate inputs (use explicit None checks so 0 is preserved)
-    glide_ratio = glide_ratio if glide_ratio is not None else GLIDE_RATIO_DEFAULT
-    glide_ratio = max(GLIDE_RATIO_MIN, min(GLIDE_RATIO_MAX, glide_ratio))
-    altitude = altitude if altitude is not None else ALTITUDE_DEFAULT
-    altitude = max(ALTITUDE_MIN, min(ALTITUDE_MAX, altitude))
-    arrival_height = (
-        arrival_height if arrival_height is not None else ARRIVAL_HEIGHT_DEFAULT
+    # Spot indices per layer already in the browser for this dataset, in
+    # circle order
+    triggered_id = ctx.triggered_id
+    dataset_changed = triggered_id is None or triggered_id == "landing-spots-store"
+    rendered = {}
+    rendered_pruned = {}
+    if (
+        not dataset_changed
+        and rendered_layers
+        and rendered_layers.get("key") == dataset_key
+    ):
+        rendered = rendered_layers.get("layers", {})
+        rendered_pruned = rendered_layers.get("pruned", {})
+    parameters_changed = triggered_id in ("glide-ratio", "altitude", "arrival-height")
+
+    glide_ratio, altitude, arrival_height = validate_glide_parameters(
+        glide_ratio, altitude, arrival_height
     )
-    arrival_height = max(ARRIVAL_HEIGHT_MIN, min(ARRIVAL_HEIGHT_MAX, arrival_height))
+    visible = visible_layers or []
 
-    # Ensure arrival height is less than altitude
-    if arrival_height >= altitude:
-        # Apply safety factor: use either 90% of altitude or ensure minimum buffer
-        arrival_height = max(
-            0,
-            min(
-                altitude * ARRIVAL_HEIGHT_SAFETY_FACTOR,
-                altitude - ARRIVAL_HEIGHT_MIN_BUFFER,
-            ),
-        )
+    # Determine whether to recenter: only when landing spots data changes
+    if dataset_changed:
+        bounds = calculate_map_bounds(landing_spots)
+        center, zoom = calculate_center_and_zoom_from_bounds(bounds)
+    else:
+        # Parameter changes, layer toggles, map moves — preserve user's view
+        center = no_update
+        zoom = no_update
 
-    # Create separate layer groups for different landing site types
-    airports_markers = []
-    grass_strips_markers = []
-    landables_markers = []
+    view_zoom = zoom if dataset_changed else map_zoom
+    if view_zoom is None:
+        view_zoom = DEFAULT_MAP_ZOOM
 
-    # Color mapping for different landing site types (matching JavaScript version)
-    style_colors = {
-        AIRPORT: "#AAC896",  # Green for airports
-        GLIDING_AIRFIELD: "#AAC896",  # Green for gliding airfields
-        GRASS_SURFACE: "#AAAADC",  # Blue for grass strips
-        OUTLANDING: "#E6E696",  # Yellow for landable fields
-    }
+    if ENVELOPE_RENDERING:
+        # One merged outline per layer; it depends on the zoom level but not on
+        # the exact view, so panning leaves the layers in place. From
+        # ENVELOPE_CLIP_MIN_ZOOM on it covers the padded view, and is redrawn
+        # once the view leaves that box
+        parameters = (glide_ratio, altitude, arrival_height)
+        drawn = [*parameters, int(view_zoom)]
+        clip = None
+        drawn_layers = {}
+        if view_zoom >= ENVELOPE_CLIP_MIN_ZOOM and map_bounds and not dataset_changed:
+            (south, west), (north, east) = map_bounds
+            clip = padded_bounds(map_bounds)
+        layers = {}
+        for layer in LAYER_STYLES:
+            previous = rendered.get(layer)
+            if layer not in visible:
+                layers[layer] = []
+            elif previous == drawn or (
+                clip is not None
+                and previous is not None
+                and previous[:4] == drawn
+                and len(previous) == 8
+                and previous[4] <= south
+                and previous[5] <= west
+                and previous[6] >= north
+                and previous[7] >= east
+            ):
+                layers[layer] = no_update
+                drawn_layers[layer] = previous
+            else:
+                layers[layer] = build_coverage_layer(
+                    landing_spots, dataset_key, layer, parameters, view_zoom, clip
+                )
+                drawn_layers[layer] = drawn + list(clip or ())
+        record_callback_metrics(spots=len(landing_spots))
+        return (
+            layers["airports"],
+            layers["grass"],
+            layers["landables"],
+            center,
+            zoom,
+            no_update,
+            {"key": dataset_key, "layers": drawn_layers},
+        )
 
-    for spot in landing_spots:
-        try:
-            radius = calculate_radius(
-                glide_ratio, altitude, arrival_height, spot["elevation"]
+    if TERRAIN_RENDERING:
+        # Reach polygons for the spots in view, nearest the view first; a
+        # layer is redrawn whenever its spots or the glide parameters change
+        parameters = (glide_ratio, altitude, arrival_height)
+        if VIEWPORT_CULLING and map_bounds and not dataset_changed:
+            in_view = spots_in_view(landing_spots, map_bounds, *parameters)
+            (south, west), (north, east) = map_bounds
+            view_center = ((south + north) / 2, (west + east) / 2)
+        else:
+            in_view = np.arange(len(landing_spots))
+            view_center = (
+                float(np.mean(landing_spots.lat)),
+                float(np.mean(landing_spots.lon)),
             )
-            color = style_colors.get(spot["style"], "gray")
+        layers = {}
+        drawn_layers = {}
+        for layer in LAYER_STYLES:
+            if layer not in visible:
+                layers[layer] = []
+                continue
+            indices = in_view[landing_spots.style_mask(LAYER_STYLES[layer])[in_view]]
+            indices = terrain_sites(landing_spots, indices, view_center)
+            drawn_layers[layer] = [*parameters, layer_digest(indices)]
+            if rendered.get(layer) == drawn_layers[layer]:
+                layers[layer] = no_update
+            else:
+                layers[layer] = build_terrain_layer(
+                    landing_spots, dataset_key, indices, parameters
+                )
+                record_callback_metrics(circles=len(indices))
+        record_callback_metrics(spots=len(in_view))
+        return (
+            layers["airports"],
+            layers["grass"],
+            layers["landables"],
+            center,
+            zoom,
+            no_update,
+            {"key": dataset_key, "layers": drawn_layers},
+        )
 
-            # Create circle for glide range
-            circle = dl.Circle(
-                center=[spot["lat"], spot["lon"]],
-                radius=radius,
-                color="black",
-                fillColor=color,
-                fillOpacity=0.5,
-                weight=1,
-                children=[
-                    dl.Popup(
-                        html.Div(
-                            [
-                                html.Strong(spot["name"]),
-                                html.Br(),
-                                f"Elevation: {spot['elevation']:.0f} ft",
-                                html.Br(),
-                                f"Range: {radius/1000:.1f} km",
-                            ]
-                        )
-                    )
-                ],
-            )
+    level = landing_spots.clusters.level(view_zoom) if LEVEL_OF_DETAIL else None
+    if level is not None:
+        parameters = (glide_ratio, altitude, arrival_height)
+        representatives = {
+            layer: level.representatives(landing_spots, i, parameters)
+            for i, layer in enumerate(LAYER_STYLES)
+            if layer in visible
+        }
+        # Spots are drawn singly, and patched on changes, unless clusters
+        # save enough circles
+        layer_ids = [i for i, layer in enumerate(LAYER_STYLES) if layer in visible]
+        members = int(level.count[np.isin(level.layer, layer_ids)].sum())
+        rows = sum(len(ids) for _, _, ids in representatives.values())
+        if rows * LOD_MIN_MERGE > members:
+            level = None
+    if level is not None:
+        # Zoomed out: one circle per cluster, covering its members' ranges.
+        # The set of clusters in view is small, so any change redraws a layer
+        layers = {}
+        layer_clusters = {}
+        for layer in LAYER_STYLES:
+            if layer not in visible:
+                layers[layer] = []
+                continue
+            table, radii, ids = representatives[layer]
+            if VIEWPORT_CULLING and map_bounds and not dataset_changed:
+                touching = disks_in_box(
+                    table.lat, table.lon, radii, *padded_bounds(map_bounds)
+                )
+                table, radii, ids = table[touching], radii[touching], ids[touching]
+            drawn = {"lod": [*parameters, int(view_zoom)], "clusters": ids.tolist()}
+            previous = rendered.get(layer)
+            if (
+                isinstance(previous, dict)
+                and previous.get("lod") == drawn["lod"]
+                and set(drawn["clusters"]) <= set(previous.get("clusters", ()))
+            ):
+                # Everything in view is already drawn
+                layers[layer] = no_update
+                drawn = previous
+            else:
+                layers[layer] = render_cache.get_or_create(
+                    (
+                        "clusters",
+                        RENDER_MODE,
+                        dataset_key,
+                        layer,
+                        *drawn["lod"],
+                        layer_digest(ids),
+                    ),
+                    lambda: (
+                        {
+                            "type": "FeatureCollection",
+                            "features": build_range_features(table, radii),
+                        }
+                        if GEOJSON_RENDERING
+                        else build_range_circles(table, radii)
+                    ),
+                )
+                if GEOJSON_RENDERING:
+                    layers[layer] = geojson_layer(layers[layer], parameters)
+                record_callback_metrics(circles=len(ids))
+            layer_clusters[layer] = drawn
+        record_callback_metrics(spots=len(landing_spots))
+        return (
+            layers["airports"],
+            layers["grass"],
+            layers["landables"],
+            center,
+            zoom,
+            no_update,
+            {"key": dataset_key, "layers": layer_clusters},
+        )
 
-            # Add to appropriate layer based on style
-            if spot["style"] in [AIRPORT, GLIDING_AIRFIELD]:
-                airports_markers.append(circle)
-            elif spot["style"] == GRASS_SURFACE:
-                grass_strips_markers.append(circle)
-            elif spot["style"] == OUTLANDING:
-                landables_markers.append(circle)
+    def radii_for(indices):
+        return calculate_radii(
+            glide_ratio, altitude, arrival_height, landing_spots.elevation[indices]
+        )
 
-        except Exception as e:
-            print(f"Error creating marker for {spot.get('name', 'unknown')}: {e}")
+    # Candidate spots: those reaching the current view. A new dataset is shown
+    # whole because the map is about to be recentered on it
+    if VIEWPORT_CULLING and map_bounds and not dataset_changed:
+        candidates = spots_in_view(
+            landing_spots, map_bounds, glide_ratio, altitude, arrival_height
+        )
+    else:
+        candidates = np.arange(len(landing_spots))
+    candidate_styles = landing_spots.style[candidates]
+    record_callback_metrics(spots=len(candidates))
+
+    # Build, extend or patch each visible layer; hidden layers stay empty
+    layers = {}
+    layer_elevations = {}
+    layer_indices = {}
+    pruned_layers = {}
+    for layer, styles in LAYER_STYLES.items():
+        if layer not in visible:
+            layers[layer] = []
+            layer_elevations[layer] = []
             continue
+        wanted = candidates[np.isin(candidate_styles, styles)]
+        covered = {}
+        if PRUNE_CONTAINED_CIRCLES:
+            # Circles inside another add nothing; their container lists them
+            wanted, covered = prune_contained_spots(
+                landing_spots, wanted, radii_for(wanted)
+            )
 
-    # Determine whether to recenter: only when landing spots data changes
-    triggered_id = ctx.triggered_id
-    if triggered_id is None or triggered_id == "landing-spots-store":
-        bounds = calculate_map_bounds(landing_spots)
-        center, zoom = calculate_center_and_zoom_from_bounds(bounds)
-    else:
-        # Parameter changes, layer toggles, etc. — preserve user's view
-        center = no_update
-        zoom = no_update
+        def covers_for(indices):
+            return [covered.get(i) for i in indices.tolist()] if covered else None
+
+        previous = rendered_spot_indices(rendered.get(layer), len(landing_spots))
+        if PRUNE_CONTAINED_CIRCLES:
+            # A container's cover list depends on every spot in view and on the
+            # radii, so a pruned layer is kept only while nothing changes and
+            # otherwise redrawn, never appended to or patched
+            pruned_layers[layer] = layer_digest(wanted, covers_for(wanted))
+            if parameters_changed or rendered_pruned.get(layer) != pruned_layers[layer]:
+                previous = None
+        added = None
+        if previous is not None:
+            added = wanted[~np.isin(wanted, previous)]
+            total = len(previous) + len(added)
+            # Drop circles that have scrolled far out of view
+            if total > max(
+                VIEWPORT_REBUILD_FACTOR * len(wanted), VIEWPORT_REBUILD_MIN_CIRCLES
+            ):
+                added = None
+
+        if added is None:
+            indices = wanted
+            digest = layer_digest(indices, covers_for(indices))
+            if GEOJSON_RENDERING:
+                # Features do not depend on the glide parameters: the browser
+                # reads them from the hideout, so every setting shares the entry
+                data = render_cache.get_or_create(
+                    ("spots", RENDER_MODE, dataset_key, layer, digest),
+                    lambda: {
+                        "type": "FeatureCollection",
+                        "features": build_range_features(
+                            landing_spots[indices], covers=covers_for(indices)
+                        ),
+                    },
+                )
+                layers[layer] = geojson_layer(
+                    data, (glide_ratio, altitude, arrival_height)
+                )
+            else:
+                layers[layer] = render_cache.get_or_create(
+                    (
+                        "spots",
+                        RENDER_MODE,
+                        dataset_key,
+                        layer,
+                        glide_ratio,
+                        altitude,
+                        arrival_height,
+                        digest,
+                    ),
+                    lambda: build_range_circles(
+                        landing_spots[indices],
+                        radii_for(indices),
+                        covers_for(indices),
+                    ),
+                )
+            record_callback_metrics(circles=len(indices))
+        else:
+            indices = np.concatenate([previous, added])
+            patch = None
+            if parameters_changed and GEOJSON_RENDERING:
+                # The browser recomputes every radius from the new parameters
+                patch = Patch()
+                patch[0]["props"]["hideout"] = geojson_hideout(
+                    glide_ratio, altitude, arrival_height
+                )
+            elif parameters_changed and len(previous):
+                patch = patch_range_circles(radii_for(previous))
+            if len(added):
+                record_callback_metrics(circles=len(added))
+                patch = Patch() if patch is None else patch
+                if GEOJSON_RENDERING:
+                    patch[0]["props"]["data"]["features"].extend(
+                        build_range_features(
+                            landing_spots[added], covers=covers_for(added)
+                        )
+                    )
+                else:
+                    patch.extend(
+                        build_range_circles(
+                            landing_spots[added], radii_for(added), covers_for(added)
+                        )
+                    )
+            # None means the layer is already up to date
+            layers[layer] = no_update if patch is None else patch
+        layer_indices[layer] = indices.tolist()
+        if GEOJSON_RENDERING:
+            # Features carry their own elevations
+            layer_elevations[layer] = []
+            continue
+        # Circle elevations in layer order for the clientside radius update;
+        # NaN is not valid JSON, so missing elevations are sent as null
+        elevations = landing_spots.elevation[indices]
+        layer_elevations[layer] = [
+            None if np.isnan(e) else e for e in elevations.tolist()
+        ]
 
-    # Return each layer group's markers separately, plus center/zoom.
+    # Return each layer group's markers (or patch) separately, plus center/zoom.
     # Layer visibility is controlled by the sidebar checkboxes — if a layer
-    # is unchecked we return an empty list so the circles disappear.
-    visible = visible_layers or []
+    # is unchecked its list is empty so the circles disappear.
     return (
-        airports_markers if "airports" in visible else [],
-        grass_strips_markers if "grass" in visible else [],
-        landables_markers if "landables" in visible else [],
+        layers["airports"],
+        layers["grass"],
+        layers["landables"],
         center,
         zoom,
+        layer_elevations if CLIENTSIDE_RADIUS_UPDATES else no_update,
+        {"key": dataset_key, "layers": layer_indices, "pruned": pruned_layers},
     )
 
 
+# Clientside fast path: recompute radii and popup range text in the browser,
+# clamping the parameters exactly like validate_glide_parameters
+RADIUS_UPDATE_JS = """
+function(glideRatio, altitude, arrivalHeight, airports, grass, landables, elevations) {
+    const no_update = window.dash_clientside.no_update;
+    if (!elevations) {
+        return [no_update, no_update, no_update];
+    }
+    const limits = %s;
+    const clamp = (value, min, max, fallback) => {
+        const v = (value === null || value === undefined || value === "")
+            ? fallback : Number(value);
+        return Math.max(min, Math.min(max, v));
+    };
+    const glide = clamp(glideRatio, limits.glideMin, limits.glideMax, limits.glideDefault);
+    const alt = clamp(altitude, limits.altMin, limits.altMax, limits.altDefault);
+    let arrival = clamp(
+        arrivalHeight, limits.arrivalMin, limits.arrivalMax, limits.arrivalDefault
+    );
+    if (arrival >= alt) {
+        arrival = Math.max(0, Math.min(alt * limits.safetyFactor, alt - limits.minBuffer));
+    }
+    const update = (circles, layerElevations) => (circles || []).map((circle, i) => {
+        if (circle.type === "GeoJSON") {
+            // The layer redraws its circles from the new parameters
+            const hideout = {...circle.props.hideout, glide: glide, altitude: alt, arrival: arrival};
+            return {...circle, props: {...circle.props, hideout: hideout}};
+        }
+        const elevation = layerElevations[i];
+        let radius = 0.3048 * glide * (alt - arrival - elevation);
+        // Missing elevations and unreachable spots use the 1.0 m floor
+        if (elevation === null || elevation === undefined || !(radius >= 1.0)) {
+            radius = 1.0;
+        }
+        const popup = circle.props.children[0];
+        const body = popup.props.children;
+        const lines = body.props.children.slice();
+        // Popup lines: name, br, elevation, br, range[, br, covered spots]
+        lines[4] = "Range: " + (radius / 1000).toFixed(1) + " km";
+        return {
+            ...circle,
+            props: {
+                ...circle.props,
+                radius: radius,
+                children: [{
+                    ...popup,
+                    props: {
+                        ...popup.props,
+                        children: {...body, props: {...body.props, children: lines}},
+                    },
+                }],
+            },
+        };
+    });
+    return [
+        update(airports, elevations.airports),
+        update(grass, elevations.grass),
+        update(landables, elevations.landables),
+    ];
+}
+""" % json.dumps(
+    {
+        "glideMin": GLIDE_RATIO_MIN,
+        "glideMax": GLIDE_RATIO_MAX,
+        "glideDefault": GLIDE_RATIO_DEFAULT,
+        "altMin": ALTITUDE_MIN,
+        "altMax": ALTITUDE_MAX,
+        "altDefault": ALTITUDE_DEFAULT,
+        "arrivalMin": ARRIVAL_HEIGHT_MIN,
+        "arrivalMax": ARRIVAL_HEIGHT_MAX,
+        "arrivalDefault": ARRIVAL_HEIGHT_DEFAULT,
+        "safetyFactor": ARRIVAL_HEIGHT_SAFETY_FACTOR,
+        "minBuffer": ARRIVAL_HEIGHT_MIN_BUFFER,
+    }
+)
+
+if CLIENTSIDE_RADIUS_UPDATES:
+    clientside_callback(
+        RADIUS_UPDATE_JS,
+        [
+            Output("airports-layer", "children", allow_duplicate=True),
+            Output("grass-layer", "children", allow_duplicate=True),
+            Output("landables-layer", "children", allow_duplicate=True),
+        ],
+        [
+            Input("glide-ratio", "value"),
+            Input("altitude", "value"),
+            Input("arrival-height", "value"),
+        ],
+        [
+            State("airports-layer", "children"),
+            State("grass-layer", "children"),
+            State("landables-layer", "children"),
+            State("layer-elevations-store", "data"),
+        ],
+        prevent_initial_call=True,
+    )
+
+
+@server.route("/api/reachability", methods=["POST"])
+def reachability_api():
+    """
+    Batched reachability queries for flight computers and ground-station tools
+    See parse_reachability_request for the request body; without a "dataset"
+    key the default CUP file is used
+    """
+    try:
+        dataset, positions, glide_ratio, arrival_height, max_spots = (
+            parse_reachability_request(request.get_json(silent=True))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    if dataset is None and default_dataset_key() is not None:
+        dataset = default_dataset_key()
+        landing_spots = dataset_registry.get_or_create(dataset, load_default_cup_file)
+    else:
+        landing_spots = dataset_registry.get(dataset)
+    if landing_spots is None:
+        return jsonify({"error": "Unknown dataset"}), 404
+
+    body = reachability_batch(
+        landing_spots, positions, glide_ratio, arrival_height, max_spots
+    )
+    body["dataset"] = dataset
+    return jsonify(body)
+
+
+# Callback metrics of this worker
+callback_metrics = CallbackMetrics()
+
+if MEMORY_TRACING:
+    tracemalloc.start()
+
+    @server.before_request
+    def start_callback_memory_trace():
+        """Trace the memory of a Dash callback request, including its response"""
+        if request.path.endswith("/_dash-update-component"):
+            payload = request.get_json(silent=True) or {}
+            entry = app.callback_map.get(payload.get("output"), {})
+            name = getattr(entry.get("callback"), "__name__", "unknown")
+            g.memory_trace = start_memory_trace(f"callback {name}")
+
+    @server.teardown_request
+    def finish_callback_memory_trace(exception=None):
+        """Log the memory of a Dash callback request once its response is built"""
+        finish_memory_trace(g.pop("memory_trace", None))
+
+
+if METRICS_ENABLED:
+
+    @server.before_request
+    def start_callback_timer():
+        """Note when a Dash callback request starts"""
+        if request.path.endswith("/_dash-update-component"):
+            g.callback_started = time.perf_counter()
+
+    @server.after_request
+    def record_callback_request(response):
+        """Record the wall time, payload sizes and counters of a callback request"""
+        started = g.pop("callback_started", None)
+        if started is not None:
+            payload = request.get_json(silent=True) or {}
+            entry = app.callback_map.get(payload.get("output"), {})
+            callback_metrics.observe(
+                getattr(entry.get("callback"), "__name__", "unknown"),
+                time.perf_counter() - started,
+                request_bytes=request.content_length or 0,
+                response_bytes=response.content_length or 0,
+                **g.pop("callback_metrics", {}),
+            )
+        return response
+
+    @server.route("/metrics", methods=["GET"])
+    def metrics():
+        """
+        Callback metrics of the worker serving the request, plus those of
+        background jobs, as Prometheus text
+        """
+        shared = [("jobs", job_metrics.snapshot())] if job_metrics else []
+        return Response(
+            callback_metrics.render(shared), mimetype="text/plain; version=0.0.4"
+        )
+
+
+@server.route("/api/render-cache", methods=["GET"])
+def render_cache_stats():
+    """Render cache hit and miss counters of the worker serving the request"""
+    return jsonify(render_cache.stats())
+
+
 if __name__ == "__main__":
+    if sys.argv[1:] == ["build-snapshot"]:
+        sys.exit(0 if build_default_snapshot() else 1)
     app.run(debug=True, host="0.0.0.0", port=8050)
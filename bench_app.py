@@ -0,0 +1,259 @@
+"""
+Benchmark suite for the Glide Range Map Dash application
+
+Generates deterministic synthetic CUP files of 100 to 100k waypoints and times
+parse_cup_file, calculate_map_bounds and the update_map_layers callback (served
+through Flask's test client, for the first render and a glide ratio change) at
+each size. Medians are written to a JSON file and compared with a stored
+baseline; the run exits with status 1 when any median is slower than the
+baseline by more than the tolerance.
+
+Usage: python bench_app.py [--sizes N ...] [--baseline FILE] [--save-baseline]
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+
+# Keep every render in this process, so each repetition really renders
+os.environ.setdefault("GLIDEMAP_RENDER_CACHE_DIR", "")
+os.environ.setdefault("GLIDEMAP_DATASET_DIR", "")
+
+import app  # noqa: E402
+
+BENCH_SIZES = (100, 1000, 10000, 100000)
+BASELINE_PATH = os.path.join(os.path.dirname(__file__), "bench_baseline.json")
+RESULTS_PATH = "bench_results.json"
+
+# A run fails when a median exceeds the baseline by more than this fraction
+TOLERANCE = 0.5
+
+# Timings below this many seconds are too noisy to compare with the baseline
+MIN_COMPARED_SECONDS = 0.002
+
+# Waypoint styles and their share of a typical national database
+STYLE_MIX = {1: 0.35, 2: 0.15, 3: 0.30, 4: 0.05, 5: 0.15}
+
+# Waypoints per square degree, about the density of New England
+SPOTS_PER_SQUARE_DEGREE = 40
+
+
+def format_cup_coordinate(value, is_longitude=False):
+    """Format decimal degrees as a CUP DDMM.mmm coordinate"""
+    hemisphere = ("E" if value >= 0 else "W") if is_longitude else "NS"[value < 0]
+    value = abs(value)
+    degrees = int(value)
+    minutes = round((value - degrees) * 60, 3)
+    if minutes >= 60:
+        degrees, minutes = degrees + 1, 0.0
+    width = 3 if is_longitude else 2
+    return f"{degrees:0{width}d}{minutes:06.3f}{hemisphere}"
+
+
+def generate_cup(n_waypoints, seed=0):
+    """
+    Deterministic synthetic CUP text with n_waypoints waypoints
+    Spots are spread over a square around New England that grows with the count,
+    with STYLE_MIX styles, elevations in feet and meters, quoted names and
+    descriptions containing commas, and a tasks section that must be skipped.
+    """
+    rng = random.Random(seed)
+    half_side = max(0.5, (n_waypoints / SPOTS_PER_SQUARE_DEGREE) ** 0.5 / 2)
+    styles = list(STYLE_MIX)
+    weights = list(STYLE_MIX.values())
+    lines = ["name,code,country,lat,lon,elev,style,rwdir,rwlen,freq,desc"]
+    for i in range(n_waypoints):
+        lat = min(max(42.5 + rng.uniform(-half_side, half_side), -85.0), 85.0)
+        lon = -72.0 + rng.uniform(-half_side, half_side)
+        style = rng.choices(styles, weights)[0]
+        if rng.random() < 0.2:
+            elevation = f"{rng.uniform(0, 900):.1f}m"
+        else:
+            elevation = f"{rng.randint(0, 3000)}ft"
+        name = f'"Field {i}, North"' if rng.random() < 0.05 else f'"Field {i}"'
+        description = '"Grass, rough"' if style in (2, 3) else '""'
+        lines.append(
+            f"{name},F{i},US,{format_cup_coordinate(lat)},"
+            f"{format_cup_coordinate(lon, is_longitude=True)},{elevation},{style},"
+            f"{rng.randint(1, 36) * 10:03d},{rng.randint(15, 60) * 100}ft,"
+            f"122.900,{description}"
+        )
+    lines.append("-----Related Tasks-----")
+    lines.append('"Task",,"Field 0","Field 1","Field 0"')
+    return "\n".join(lines) + "\n"
+
+
+def median_time(function, repeats, setup=None):
+    """Median wall time of function() in seconds; setup() runs untimed first"""
+    times = []
+    for _ in range(repeats):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def reset_render_cache():
+    """Finish pending background cache writes, then empty the render cache"""
+    app.render_cache.flush()
+    app.render_cache.clear()
+
+
+def layer_update_request(client, dataset_key):
+    """Build a function that posts an update_map_layers request and returns JSON"""
+    dependencies = client.get("/_dash-dependencies").get_json()
+    dependency = next(
+        d for d in dependencies if d["output"].startswith("..airports-layer.children")
+    )
+    outputs = [
+        dict(zip(("id", "property"), output.rsplit(".", 1)))
+        for output in dependency["output"].strip(".").split("...")
+    ]
+    values = {
+        "landing-spots-store.data": dataset_key,
+        "glide-ratio.value": app.GLIDE_RATIO_DEFAULT,
+        "altitude.value": app.ALTITUDE_DEFAULT,
+        "arrival-height.value": app.ARRIVAL_HEIGHT_DEFAULT,
+        "layer-toggles.value": list(app.LAYER_STYLES),
+        "map.bounds": None,
+        "map.zoom": None,
+    }
+
+    def post(changed, rendered=None, **overrides):
+        def prop(item):
+            prop_id = f"{item['id']}.{item['property']}"
+            value = overrides.get(prop_id, values.get(prop_id, rendered))
+            return {**item, "value": value}
+
+        body = {
+            "output": dependency["output"],
+            "outputs": outputs,
+            "inputs": [prop(item) for item in dependency["inputs"]],
+            "state": [prop(item) for item in dependency["state"]],
+            "changedPropIds": [changed],
+        }
+        response = client.post("/_dash-update-component", json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+        return response.get_json()["response"]
+
+    return post
+
+
+def run_benchmarks(sizes):
+    """Time every benchmark at every size; returns {name: {size: seconds}}"""
+    client = app.server.test_client()
+    results = {}
+    for size in sizes:
+        repeats = 3 if size >= 100000 else 5
+        contents = generate_cup(size)
+        table = app.parse_cup_file(contents)
+        dataset_key = app.DatasetRegistry.key_for(contents)
+        app.dataset_registry.put(dataset_key, table)
+        post = layer_update_request(client, dataset_key)
+        first = post("landing-spots-store.data")
+        rendered = first["rendered-layers-store"]["data"]
+        # The browser reports the zoom the first render chose
+        zoom = first.get("map", {}).get("zoom")
+
+        timings = {
+            "parse_cup_file": median_time(
+                lambda: app.parse_cup_file(contents), repeats
+            ),
+            "calculate_map_bounds": median_time(
+                lambda: app.calculate_map_bounds(table), repeats
+            ),
+            "update_map_layers_initial": median_time(
+                lambda: post("landing-spots-store.data"),
+                repeats,
+                setup=reset_render_cache,
+            ),
+            "update_map_layers_glide_ratio": median_time(
+                lambda: post(
+                    "glide-ratio.value",
+                    rendered,
+                    **{
+                        "glide-ratio.value": app.GLIDE_RATIO_DEFAULT + 5,
+                        "map.zoom": zoom,
+                    },
+                ),
+                repeats,
+                setup=reset_render_cache,
+            ),
+        }
+        for name, seconds in timings.items():
+            results.setdefault(name, {})[str(size)] = seconds
+            print(f"  {name} [{size}]: {seconds * 1000:.1f} ms")
+    return results
+
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Names of benchmarks slower than the baseline by more than tolerance"""
+    regressions = []
+    for name, by_size in results.items():
+        for size, seconds in by_size.items():
+            reference = baseline.get(name, {}).get(size)
+            if reference is None or reference < MIN_COMPARED_SECONDS:
+                continue
+            if seconds > reference * (1 + tolerance):
+                regressions.append(
+                    f"{name} [{size}]: {seconds * 1000:.1f} ms, "
+                    f"baseline {reference * 1000:.1f} ms"
+                )
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(BENCH_SIZES))
+    parser.add_argument("--output", default=RESULTS_PATH)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=TOLERANCE)
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help="store this run as the new baseline instead of comparing",
+    )
+    args = parser.parse_args(argv)
+
+    print("Running benchmarks...")
+    results = run_benchmarks(args.sizes)
+    report = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "render_mode": app.RENDER_MODE,
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Wrote {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}")
+        return 0
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline")
+        return 0
+
+    with open(args.baseline, "r", encoding="utf-8") as f:
+        baseline = json.load(f)["results"]
+    regressions = compare_with_baseline(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"✗ {regression}")
+    if regressions:
+        return 1
+    print(f"✓ No benchmark more than {args.tolerance:.0%} slower than the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
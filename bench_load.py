@@ -0,0 +1,320 @@
+"""
+Load test for the Glide Range Map Dash application on one machine
+
+Starts app:server under gunicorn for each requested worker class and worker
+count, then runs concurrent simulated pilots against it. Each session loads
+the page and its layout, uploads a synthetic CUP file through load_cup_file,
+draws the map with update_map_layers and scrubs altitude and glide ratio
+through it, as the browser would. Reports throughput and p50/p95/p99 latency
+for each request type and configuration.
+
+Usage: python bench_load.py [--worker-class sync gthread] [--workers 1 2 4]
+                            [--users N] [--duration S] [--cup-size N]
+"""
+
+import argparse
+import base64
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from json import dumps
+
+from bench_app import app, generate_cup, layer_update_request
+
+# Altitude and glide ratio steps of one scrub through the sidebar controls
+SCRUB_ALTITUDES = range(2000, 6001, 500)
+SCRUB_GLIDE_RATIOS = range(20, 41, 5)
+
+# Seconds to wait for gunicorn to serve its first page
+STARTUP_TIMEOUT = 60
+
+PERCENTILES = (50, 95, 99)
+
+
+class HttpResponse:
+    """The parts of a Flask test response that layer_update_request uses"""
+
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self._body = body
+
+    def get_json(self):
+        return json.loads(self._body)
+
+    def get_data(self, as_text=False):
+        return self._body.decode("utf-8") if as_text else self._body
+
+
+class HttpClient:
+    """Minimal HTTP client with Flask test client call signatures"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def _send(self, request):
+        try:
+            with urllib.request.urlopen(request, timeout=120) as response:
+                return HttpResponse(response.status, response.read())
+        except urllib.error.HTTPError as e:
+            return HttpResponse(e.code, e.read())
+
+    def get(self, path):
+        return self._send(urllib.request.Request(self.base_url + path))
+
+    def post(self, path, json=None):
+        request = urllib.request.Request(
+            self.base_url + path,
+            data=dumps(json).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        return self._send(request)
+
+
+class LatencyLog:
+    """Thread-safe latencies in seconds per request type, plus error counts"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self._lock = threading.Lock()
+
+    def timed(self, name, function):
+        """Call function(), recording its latency under name; errors are counted"""
+        start = time.perf_counter()
+        try:
+            result = function()
+        except Exception:
+            with self._lock:
+                self.errors[name] = self.errors.get(name, 0) + 1
+            raise
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies.setdefault(name, []).append(elapsed)
+        return result
+
+    def summary(self, duration):
+        """Per request type: count, errors, requests per second and percentiles"""
+        summary = {}
+        for name in sorted(set(self.latencies) | set(self.errors)):
+            values = sorted(self.latencies.get(name, []))
+            entry = {
+                "count": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput": len(values) / duration,
+            }
+            for p in PERCENTILES:
+                index = min(len(values) - 1, round(p / 100 * (len(values) - 1)))
+                entry[f"p{p}"] = values[index] if values else None
+            summary[name] = entry
+        return summary
+
+
+def upload_request(client, contents, filename):
+    """Build a function that posts an upload to load_cup_file"""
+    dependencies = client.get("/_dash-dependencies").get_json()
+    dependency = next(
+        d
+        for d in dependencies
+        if d["output"] == "..landing-spots-store.data...upload-status.children.."
+    )
+    body = {
+        "output": dependency["output"],
+        "outputs": [
+            {"id": "landing-spots-store", "property": "data"},
+            {"id": "upload-status", "property": "children"},
+        ],
+        "inputs": [{**dependency["inputs"][0], "value": contents}],
+        "state": [{**dependency["state"][0], "value": filename}],
+        "changedPropIds": [
+            f"{dependency['inputs'][0]['id']}.{dependency['inputs'][0]['property']}"
+        ],
+    }
+
+    def post():
+        response = client.post("/_dash-update-component", json=body)
+        assert response.status_code == 200, response.get_data(as_text=True)[:200]
+        return response.get_json()["response"]["landing-spots-store"]["data"]
+
+    return post
+
+
+def run_session(client, log, upload):
+    """One pilot: page load, CUP upload, first map, then an altitude/glide scrub"""
+    for path, name in (("/", "page"), ("/_dash-layout", "layout")):
+        response = log.timed(name, lambda: client.get(path))
+        assert response.status_code == 200, f"{path}: {response.status_code}"
+    dataset_key = log.timed("load_cup_file", upload)
+    post = layer_update_request(client, dataset_key)
+    first = log.timed("update_map_layers", lambda: post("landing-spots-store.data"))
+    rendered = first["rendered-layers-store"]["data"]
+    zoom = first.get("map", {}).get("zoom")
+    steps = [("altitude.value", value) for value in SCRUB_ALTITUDES]
+    steps += [("glide-ratio.value", value) for value in SCRUB_GLIDE_RATIOS]
+    values = {"map.zoom": zoom}
+    for prop_id, value in steps:
+        values[prop_id] = value
+        response = log.timed(
+            "update_map_layers", lambda: post(prop_id, rendered, **values)
+        )
+        rendered = response.get("rendered-layers-store", {}).get("data", rendered)
+
+
+def free_port():
+    """A TCP port that is free on localhost right now"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(worker_class, workers, threads, cache_dir):
+    """Start gunicorn serving app:server; returns the process and its base URL"""
+    port = free_port()
+    env = dict(
+        os.environ,
+        GLIDEMAP_DATASET_DIR=os.path.join(cache_dir, "datasets"),
+        GLIDEMAP_RENDER_CACHE_DIR=os.path.join(cache_dir, "render"),
+        GLIDEMAP_BACKGROUND_DIR=os.path.join(cache_dir, "jobs"),
+    )
+    command = [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "app:server",
+        "--bind",
+        f"127.0.0.1:{port}",
+        "--workers",
+        str(workers),
+        "--worker-class",
+        worker_class,
+        # gunicorn turns sync workers into gthread ones when threads > 1
+        "--threads",
+        str(threads if worker_class == "gthread" else 1),
+        "--timeout",
+        "120",
+        "--log-level",
+        "warning",
+    ]
+    process = subprocess.Popen(
+        command, cwd=os.path.dirname(os.path.abspath(__file__)), env=env
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"gunicorn exited with status {process.returncode}")
+        try:
+            with urllib.request.urlopen(base_url + "/", timeout=5):
+                return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("gunicorn did not start in time")
+
+
+def run_load(base_url, users, duration, contents):
+    """Run users concurrent session loops for duration seconds; returns the log"""
+    log = LatencyLog()
+    deadline = time.monotonic() + duration
+
+    def user():
+        client = HttpClient(base_url)
+        upload = upload_request(client, contents, "load-test.cup")
+        while time.monotonic() < deadline:
+            try:
+                run_session(client, log, upload)
+            except Exception as e:
+                print(f"Session error: {e}")
+
+    threads = [threading.Thread(target=user) for _ in range(users)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return log
+
+
+def print_summary(label, summary):
+    print(f"\n{label}")
+    print(
+        f"  {'request':<20}{'count':>7}{'errors':>8}{'req/s':>9}"
+        + "".join(f"{f'p{p} ms':>10}" for p in PERCENTILES)
+    )
+    for name, entry in summary.items():
+        percentiles = "".join(
+            (
+                f"{entry[f'p{p}'] * 1000:>10.1f}"
+                if entry[f"p{p}"] is not None
+                else f"{'-':>10}"
+            )
+            for p in PERCENTILES
+        )
+        print(
+            f"  {name:<20}{entry['count']:>7}{entry['errors']:>8}"
+            f"{entry['throughput']:>9.1f}{percentiles}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--worker-class", nargs="+", default=["sync"])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument(
+        "--threads", type=int, default=4, help="threads per gthread worker"
+    )
+    parser.add_argument("--users", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=20.0)
+    parser.add_argument("--cup-size", type=int, default=1000)
+    parser.add_argument("--output", help="write the summaries to this JSON file")
+    args = parser.parse_args(argv)
+
+    cup_text = generate_cup(args.cup_size)
+    contents = "data:application/octet-stream;base64," + base64.b64encode(
+        cup_text.encode("utf-8")
+    ).decode("ascii")
+
+    report = []
+    for worker_class in args.worker_class:
+        for workers in args.workers:
+            with tempfile.TemporaryDirectory() as cache_dir:
+                process, base_url = start_server(
+                    worker_class, workers, args.threads, cache_dir
+                )
+                try:
+                    log = run_load(base_url, args.users, args.duration, contents)
+                finally:
+                    process.terminate()
+                    process.wait()
+            summary = log.summary(args.duration)
+            label = (
+                f"{worker_class} x {workers} workers, {args.users} users, "
+                f"{args.cup_size} waypoints, render mode {app.RENDER_MODE}"
+            )
+            print_summary(label, summary)
+            report.append(
+                {
+                    "worker_class": worker_class,
+                    "workers": workers,
+                    "threads": args.threads,
+                    "users": args.users,
+                    "duration": args.duration,
+                    "cup_size": args.cup_size,
+                    "requests": summary,
+                }
+            )
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nWrote {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
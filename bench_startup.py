@@ -0,0 +1,77 @@
+"""
+Startup benchmark for the Glide Range Map Dash application
+
+Starts fresh interpreters that import app.py and serve the first page (the
+index and its layout) through Flask's test client, then reports the median
+times. Exits with status 1 when a median exceeds its budget, so CI catches
+cold-start regressions.
+
+Usage: python bench_startup.py [--runs N] [--max-import S] [--max-first-page S]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import time
+
+# Code run in each fresh interpreter; prints its timings as JSON
+CHILD_SCRIPT = """
+import json, time
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+client = app.server.test_client()
+assert client.get("/").status_code == 200
+assert client.get("/_dash-layout").status_code == 200
+served = time.perf_counter()
+print(json.dumps({"import": imported - start, "first_page": served - imported}))
+"""
+
+# Default budgets in seconds, with headroom over the medians on a laptop
+IMPORT_BUDGET = 1.5
+FIRST_PAGE_BUDGET = 0.5
+PROCESS_BUDGET = 2.0
+
+
+def measure_startup():
+    """Time one cold start: import, first page and whole process, in seconds"""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-c", CHILD_SCRIPT],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    timings = json.loads(result.stdout.strip().splitlines()[-1])
+    timings["process"] = time.perf_counter() - start
+    return timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-import", type=float, default=IMPORT_BUDGET)
+    parser.add_argument("--max-first-page", type=float, default=FIRST_PAGE_BUDGET)
+    parser.add_argument("--max-process", type=float, default=PROCESS_BUDGET)
+    args = parser.parse_args(argv)
+
+    runs = [measure_startup() for _ in range(args.runs)]
+    budgets = {
+        "import": args.max_import,
+        "first_page": args.max_first_page,
+        "process": args.max_process,
+    }
+    ok = True
+    for name, budget in budgets.items():
+        median = statistics.median(run[name] for run in runs)
+        passed = median <= budget
+        ok = ok and passed
+        mark = "✓" if passed else "✗"
+        print(f"{mark} {name}: {median * 1000:.0f} ms (budget {budget * 1000:.0f} ms)")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,48 @@
 Test script for the Glide Range Map Dash application
 """
 
-import sys
+import base64
+import io
+import json
+import math
+import multiprocessing
 import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import types
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+
+def run_with_settings(settings, script):
+    """
+    Run script in a fresh interpreter with the app's environment variables set
+    Returns the JSON value the script prints last
+    """
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, **settings},
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
 
 # Test imports
 print("Testing imports...")
 try:
+    import app as app_module
     from app import (
         feet_to_meters,
         meters_to_feet,
         calculate_radius,
+        calculate_radii,
         parse_cup_coordinate,
         parse_cup_elevation,
         parse_cup_file,
@@ -23,6 +55,43 @@ except Exception as e:
     print(f"✗ Import error: {e}")
     sys.exit(1)
 
+# Dash test client, and the update_map_layers callback it posts to
+client = app_module.server.test_client()
+dependencies = client.get("/_dash-dependencies").get_json()
+layer_dependency = next(
+    d for d in dependencies if d["output"].startswith("..airports-layer.children")
+)
+
+
+def post_layer_update(dataset_key, changed, rendered=None, values=()):
+    """Post an update_map_layers request; values override inputs by 'id.property'"""
+    values = {
+        "landing-spots-store.data": dataset_key,
+        "glide-ratio.value": 20,
+        "altitude.value": 3500,
+        "arrival-height.value": 1000,
+        "layer-toggles.value": ["airports"],
+        "map.zoom": 10,
+        **dict(values),
+    }
+    body = {
+        "output": layer_dependency["output"],
+        "outputs": [
+            dict(zip(("id", "property"), output.rsplit(".", 1)))
+            for output in layer_dependency["output"].strip(".").split("...")
+        ],
+        "inputs": [
+            {**item, "value": values.get(f"{item['id']}.{item['property']}")}
+            for item in layer_dependency["inputs"]
+        ],
+        "state": [{**layer_dependency["state"][0], "value": rendered}],
+        "changedPropIds": [changed],
+    }
+    response = client.post("/_dash-update-component", json=body)
+    assert response.status_code == 200, response.get_data(as_text=True)[:200]
+    return response.get_json()["response"]
+
+
 # Test conversion functions
 print("\nTesting conversion functions...")
 assert abs(feet_to_meters(1000) - 304.8) < 0.1, "feet_to_meters failed"
@@ -54,6 +123,15 @@ assert (
 ), f"Radius calculation failed: got {radius}, expected {expected}"
 print(f"✓ Radius calculation works: {radius:.1f}m ({radius/1000:.1f}km)")
 
+# Test batch radius calculation
+print("\nTesting batch radius calculation...")
+radii = calculate_radii(20, 3500, 1000, [500, float("nan"), 10000])
+assert abs(radii[0] - expected) < 0.1, f"Batch radius failed: got {radii[0]}"
+assert radii[1] == 1.0, f"NaN elevation should clamp to 1.0 m: got {radii[1]}"
+assert radii[2] == 1.0, f"Unreachable spot should clamp to 1.0 m: got {radii[2]}"
+assert calculate_radius(20, 3500, 1000, None) == 1.0, "None elevation should clamp"
+print(f"✓ Batch radius calculation works: {len(radii)} radii")
+
 # Test CUP file loading with committed fixture
 print("\nTesting CUP file loading with fixture...")
 fixture_path = os.path.join(os.path.dirname(__file__), "vero_beach_test.cup")
@@ -63,8 +141,6 @@ assert os.path.exists(fixture_path), (
 )
 with open(fixture_path, "r", encoding="utf-8") as f:
     fixture_content = f.read()
-from app import parse_cup_file
-
 spots = parse_cup_file(fixture_content)
 assert len(spots) > 0, "No landing spots loaded from fixture file"
 assert "name" in spots[0], "Landing spot missing 'name' field"
@@ -83,6 +159,826 @@ assert bounds[0][0] < bounds[1][0], "South lat should be less than north lat"
 assert bounds[0][1] < bounds[1][1], "West lon should be less than east lon"
 print(f"✓ Map bounds calculation works: SW={bounds[0]}, NE={bounds[1]}")
 
+# Test columnar landing spot table
+print("\nTesting landing spot table...")
+from app import LandingSpotTable, AIRPORT, GLIDING_AIRFIELD
+
+assert isinstance(spots, LandingSpotTable), "parse_cup_file should return a table"
+records = spots.to_records()
+assert len(records) == len(spots) and records[0] == spots[0], "to_records mismatch"
+assert len(LandingSpotTable.from_records(records)) == len(spots), "from_records failed"
+assert len(LandingSpotTable.from_data(spots.to_dict())) == len(
+    spots
+), "from_data failed"
+airports = spots.with_styles((AIRPORT, GLIDING_AIRFIELD))
+assert 0 < len(airports) < len(spots), "Style masking should select a subset"
+assert set(airports.style.tolist()) <= {AIRPORT, GLIDING_AIRFIELD}, "Wrong styles"
+assert len(spots[:5]) == 5, "Slicing should return a table"
+print(f"✓ Landing spot table works: {len(airports)} airports of {len(spots)} spots")
+
+# Test streaming CUP parser
+print("\nTesting streaming CUP parser...")
+from app import CUP_PARSE_BATCH_SIZE, iter_cup_spots, iter_cup_tables
+
+with open(fixture_path, "r", encoding="utf-8", newline="") as f:
+    spot_iter = iter_cup_spots(f)
+    assert isinstance(spot_iter, types.GeneratorType), "Parser should be a generator"
+    streamed = list(spot_iter)
+assert streamed == spots.to_records(), "Streaming parser should match parse_cup_file"
+quoted = (
+    "name,code,country,lat,lon,elev,style\n"
+    '"Field, North",F1,US,2737.939N,08031.690W,25ft,3\n'
+    "-----Related Tasks-----\n"
+    '"Task",T1,US,2737.939N,08031.690W,25ft,3\n'
+)
+streamed = list(iter_cup_spots(io.StringIO(quoted)))
+assert len(streamed) == 1, "Parser should stop at the tasks section"
+assert streamed[0]["name"] == "Field, North", "Quoted commas should be preserved"
+progress = []
+parse_cup_file(
+    "name,code,country,lat,lon,elev,style\nshort,row\n"
+    '"Field",F1,US,2737.939N,08031.690W,25ft,3\n'
+    '"Bad",F2,US,bad,08031.690W,25ft,3\n',
+    lambda rows, rejected: progress.append((rows, rejected)),
+)
+assert progress == [(3, 2)], f"Wrong parse progress: {progress}"
+# Plain lines are split without csv.reader; the rest must parse the same way
+mixed = (
+    "name,code,country,lat,lon,elev,style,rwdir,rwlen,freq,desc\r\n"
+    '"Plain",P1,US,2737.939N,08031.690W,25ft,3,,,,"Grass, rough"\r\n'
+    '"Multi",M1,US,2737.939N,08031.690W,25ft,3,,,,"Two\r\nlines"\r\n'
+    "Trailing,T1,US,2737.939N,08031.690W,25ft,3,090,600m,,,\r\n"
+    '"Padded",P2,US, 2737.939N ,08031.690W,25ft ,3,,,,""\r\n'
+    "\r\n"
+    '"Zürich, Süd",Z1,CH,4727.000N,00833.000E,400m,4\r\n'
+    "Müller,M2,DE,4727.000N,00833.000E,400m,4\r\n"
+)
+expected = [
+    ("Plain", 3),
+    ("Multi", 3),
+    ("Trailing", 3),
+    ("Padded", 3),
+    ("Zürich, Süd", 4),
+    ("Müller", 4),
+]
+for batch_size in (2, CUP_PARSE_BATCH_SIZE):
+    tables = list(iter_cup_tables(io.StringIO(mixed, newline=""), batch_size))
+    mixed_spots = LandingSpotTable.concat(tables)
+    assert list(zip(mixed_spots.names, mixed_spots.style)) == expected, "Mixed lines"
+    assert np.allclose(mixed_spots.lat[:4], parse_cup_coordinate("2737.939N"))
+    assert np.allclose(mixed_spots.elevation[4:], meters_to_feet(400.0))
+print(f"✓ Streaming CUP parser works: {len(spots)} spots streamed")
+
+# Test bulk CUP column decoding
+print("\nTesting bulk CUP decoding...")
+from app import decode_cup_coordinates, decode_cup_elevations
+
+lats, lat_ok = decode_cup_coordinates(["5107.830N", "2737.939S", "bad"])
+assert abs(lats[0] - lat) < 1e-12, f"Bulk latitude mismatch: got {lats[0]}"
+assert lats[1] < 0, "Southern latitudes should be negative"
+assert lat_ok.tolist() == [True, True, False], "Bad coordinate should be masked"
+lons, lon_ok = decode_cup_coordinates(["01410.467E", "08031.690W"], True)
+assert abs(lons[0] - lon) < 1e-12 and lons[1] < 0, f"Bulk longitude failed: {lons}"
+elevs, elev_ok = decode_cup_elevations(["1234ft", "100m", "", "1e3ft", "xft"])
+assert elevs[0] == elev_ft and elevs[1] == elev_m, f"Bulk elevation failed: {elevs}"
+assert elevs[2] == 0 and elevs[3] == 1000, f"Unitless/exponent elevations: {elevs}"
+assert elev_ok.tolist() == [True, True, True, True, False], "Bad elevation mask"
+print(f"✓ Bulk CUP decoding works: {lat_ok.sum() + lon_ok.sum()} coordinates")
+
+# Test server-side dataset registry
+print("\nTesting dataset registry...")
+from app import DatasetRegistry
+
+with tempfile.TemporaryDirectory() as spill_dir:
+    registry = DatasetRegistry(spots.nbytes, spill_dir)
+    key = DatasetRegistry.key_for(fixture_content)
+    parses = []
+    for _ in range(2):
+        registry.get_or_create(key, lambda: parses.append(1) or spots)
+    assert len(parses) == 1, "Identical content should be parsed only once"
+    other_key = DatasetRegistry.key_for("other")
+    registry.put(other_key, spots[:5])
+    assert key not in registry, "Least recently used dataset should be evicted"
+    reloaded = DatasetRegistry(spots.nbytes, spill_dir).get(key)
+    assert reloaded.to_records() == spots.to_records(), "Spilled dataset mismatch"
+    assert registry.get("../" + key) is None, "Malformed keys should be rejected"
+print(f"✓ Dataset registry works: key {key[:12]}...")
+
+# Test glide parameter validation
+print("\nTesting glide parameter validation...")
+from app import validate_glide_parameters, GLIDE_RATIO_MAX, ALTITUDE_DEFAULT
+
+assert validate_glide_parameters(20, 3500, 1000) == (20, 3500, 1000), "Valid input"
+glide, altitude, arrival = validate_glide_parameters(500, None, 5000)
+assert glide == GLIDE_RATIO_MAX, f"Glide ratio should clamp: got {glide}"
+assert altitude == ALTITUDE_DEFAULT, f"Altitude should default: got {altitude}"
+assert arrival < altitude, f"Arrival height should stay below altitude: {arrival}"
+print(f"✓ Glide parameter validation works: arrival {arrival:.0f} ft")
+
+# Test clientside radius updates, which are registered at import time
+print("\nTesting clientside radius updates...")
+CLIENTSIDE_SCRIPT = """
+import json, app
+
+client = app.server.test_client()
+dependencies = client.get("/_dash-dependencies").get_json()
+layers = [d for d in dependencies if d["output"].startswith("..airports-layer.")]
+server_side = next(d for d in layers if d["clientside_function"] is None)
+browser_side = next(d for d in layers if d["clientside_function"] is not None)
+values = {
+    "landing-spots-store.data": app.load_default_dataset(),
+    "glide-ratio.value": 20,
+    "altitude.value": 3500,
+    "arrival-height.value": 1000,
+    "layer-toggles.value": ["airports", "grass", "landables"],
+}
+body = {
+    "output": server_side["output"],
+    "outputs": [
+        dict(zip(("id", "property"), output.rsplit(".", 1)))
+        for output in server_side["output"].strip(".").split("...")
+    ],
+    "inputs": [
+        {**item, "value": values.get(f"{item['id']}.{item['property']}")}
+        for item in server_side["inputs"]
+    ],
+    "state": [
+        {**item, "value": values.get(f"{item['id']}.{item['property']}")}
+        for item in server_side["state"]
+    ],
+    "changedPropIds": ["landing-spots-store.data"],
+}
+response = client.post("/_dash-update-component", json=body).get_json()["response"]
+page = client.get("/").get_data(as_text=True)
+names = lambda items: [f"{item['id']}.{item['property']}" for item in items]
+print(json.dumps({
+    "inputs": names(server_side["inputs"]),
+    "state": names(server_side["state"]),
+    "clientside_inputs": names(browser_side["inputs"]),
+    "clientside_state": names(browser_side["state"]),
+    "registered": browser_side["clientside_function"]["function_name"] in page
+    and "update(airports, elevations.airports)" in page,
+    "elevations": response["layer-elevations-store"]["data"],
+    "rendered": response["rendered-layers-store"]["data"]["layers"],
+    "radii": {
+        layer: [circle["props"]["radius"] for circle in response[f"{layer}-layer"]["children"]]
+        for layer in ("airports", "grass", "landables")
+    },
+}))
+"""
+clientside = run_with_settings(
+    {"GLIDEMAP_RADIUS_UPDATES": "clientside", "GLIDEMAP_RENDER_MODE": "circles"},
+    CLIENTSIDE_SCRIPT,
+)
+glide_inputs = ["glide-ratio.value", "altitude.value", "arrival-height.value"]
+assert not set(glide_inputs) & set(clientside["inputs"]), "Server should not trigger"
+assert clientside["state"][:3] == glide_inputs, "Server should read them as State"
+assert clientside["clientside_inputs"] == glide_inputs, "Browser should trigger"
+assert clientside["clientside_state"][-1] == "layer-elevations-store.data"
+assert clientside["registered"], "Clientside function should be in the page"
+from app import load_default_cup_file
+
+default_table = load_default_cup_file()
+for layer, indices in clientside["rendered"].items():
+    elevations = default_table.elevation[indices]
+    expected = [None if np.isnan(e) else e for e in elevations.tolist()]
+    assert clientside["elevations"][layer] == expected, f"{layer} elevations differ"
+    expected = calculate_radii(20, 3500, 1000, elevations)
+    assert np.allclose(clientside["radii"][layer], expected), f"{layer} radii differ"
+circles = sum(len(indices) for indices in clientside["rendered"].values())
+print(f"✓ Clientside radius updates work: {circles} circle elevations sent")
+
+# Test radius-only patch updates
+print("\nTesting radius patch updates...")
+from app import build_range_circles, patch_range_circles
+
+circles = build_range_circles(spots[:2], radii[:2])
+operations = patch_range_circles(radii[:2]).to_plotly_json()["operations"]
+assert len(operations) == 4, f"Expected radius and range text per circle: {operations}"
+assert operations[0]["location"] == [0, "props", "radius"], "Radius patch location"
+range_line = circles[1].children[0].children.children[4]
+assert operations[3]["params"]["value"] == range_line, "Popup range text mismatch"
+# Through the Dash endpoint, a glide ratio change in circles mode only patches
+# the drawn radii
+pair = LandingSpotTable(["A", "B"], [42.0, 42.0], [-72.0, -71.9], [0, 2000], [5, 5])
+pair_key = DatasetRegistry.key_for(b"airport pair")
+app_module.dataset_registry.put(pair_key, pair)
+saved_rendering = app_module.GEOJSON_RENDERING, app_module.RENDER_MODE
+app_module.GEOJSON_RENDERING, app_module.RENDER_MODE = False, "circles"
+try:
+    drawn = post_layer_update(pair_key, "layer-toggles.value", {"key": pair_key})
+    assert isinstance(drawn["airports-layer"]["children"], list), "Full first draw"
+    assert len(drawn["airports-layer"]["children"]) == 2, "One circle per spot"
+    steeper = post_layer_update(
+        pair_key,
+        "glide-ratio.value",
+        drawn["rendered-layers-store"]["data"],
+        {"glide-ratio.value": 30},
+    )
+    patch = steeper["airports-layer"]["children"]
+    assert patch.get("__dash_patch_update"), "Layer should be patched, not rebuilt"
+    radius_updates = {
+        operation["location"][0]: operation["params"]["value"]
+        for operation in patch["operations"]
+        if operation["location"][1:] == ["props", "radius"]
+    }
+    assert {operation["operation"] for operation in patch["operations"]} == {
+        "Assign"
+    }, f"Only assignments expected: {patch['operations']}"
+    expected = calculate_radii(30, 3500, 1000, pair.elevation).tolist()
+    assert radius_updates == dict(enumerate(expected)), "Wrong radius assignments"
+finally:
+    app_module.GEOJSON_RENDERING, app_module.RENDER_MODE = saved_rendering
+print(f"✓ Radius patch updates work: {len(operations)} operations")
+
+# Test viewport culling
+print("\nTesting viewport culling...")
+from app import spots_in_view
+
+south, west = spots.lat[0], spots.lon[0]
+corner = [[south - 0.01, west - 0.01], [south + 0.01, west + 0.01]]
+in_view = spots_in_view(spots, corner, 20, 3500, 1000)
+assert 0 < len(in_view) < len(spots), f"Culling should select a subset: {in_view}"
+assert spots.spatial_index.query_box(-90, -180, 90, 180).size == len(spots), "Index"
+world = [[-90, -540], [90, 540]]
+assert len(spots_in_view(spots, world, 20, 3500, 1000)) == len(spots), "World view"
+# Views and reach boxes crossing the antimeridian search both sides of it
+dateline = LandingSpotTable(
+    ["East", "West", "Far"], [0.0, 0.0, 0.0], [179.95, -179.95, 170.0], [0] * 3, [5] * 3
+)
+for box in [(-1, 179.5, 1, -179.5), (-1, 179.5, 1, 180.5), (-1, -180.5, 1, -179.5)]:
+    found = sorted(dateline.names[dateline.spatial_index.query_box(*box)])
+    assert found == ["East", "West"], f"{box} should span the antimeridian: {found}"
+across = [[-0.1, 179.9], [0.1, 180.1]]
+found = spots_in_view(dateline, across, 20, 3500, 1000)
+assert dateline.names[found].tolist() == ["East", "West"], "Both sides are in view"
+print(f"✓ Viewport culling works: {len(in_view)} of {len(spots)} spots in view")
+
+# Test reachability queries
+print("\nTesting reachability queries...")
+from app import reachable_spots, haversine_distances
+
+home = spots[0]
+indices, distances, margins = reachable_spots(
+    spots, home["lat"], home["lon"], 3500, 20, 1000
+)
+assert all(margins[:-1] >= margins[1:]), "Spots should be sorted by arrival margin"
+assert (margins >= 0).all(), f"Unreachable spots returned: {margins}"
+all_dist = haversine_distances(home["lat"], home["lon"], spots.lat, spots.lon)
+assert all_dist[indices[-1]] == distances[-1], "Distances should match haversine"
+assert len(reachable_spots(spots, home["lat"], home["lon"], 500, 20, 1000)[0]) == 0
+found = reachable_spots(dateline, 0.0, 179.99, 3500, 20, 1000)[0]
+assert sorted(dateline.names[found]) == ["East", "West"], "Reach across the dateline"
+print(f"✓ Reachability queries work: {len(indices)} spots reachable")
+
+# Test batched reachability API
+print("\nTesting reachability API...")
+from app import dataset_registry
+
+dataset_registry.put(key, spots)
+position = {"lat": home["lat"], "lon": home["lon"], "altitude": 3500}
+body = {"glide_ratio": 20, "arrival_height": 1000, "positions": [position] * 2}
+body["dataset"] = key
+response = client.post("/api/reachability", json=body)
+assert response.status_code == 200, f"API request failed: {response.data}"
+results = response.get_json()["results"]
+assert results[0]["spots"] == indices.tolist(), "API should match reachable_spots"
+assert str(indices[0]) in response.get_json()["spots"], "Referenced spots missing"
+body["glide_ratio"] = GLIDE_RATIO_MAX + 1
+response = client.post("/api/reachability", json=body)
+assert response.status_code == 400, "Out-of-range glide ratio should be rejected"
+print(f"✓ Reachability API works: {len(results)} positions")
+
+# Test coverage envelopes
+print("\nTesting coverage envelopes...")
+from app import coverage_envelope, METERS_PER_DEGREE
+
+disk_lat, disk_lon = np.array([42.0, 42.0]), np.array([-72.0, -70.0])
+envelope = coverage_envelope(disk_lat, disk_lon, np.array([10000.0, 10000.0]), 200)
+assert len(envelope["coordinates"]) == 2, "Separate disks should stay separate"
+ring = np.array(envelope["coordinates"][0][0])
+assert ring[0].tolist() == ring[-1].tolist(), "Rings should be closed"
+x = (ring[:, 0] + 72) * METERS_PER_DEGREE * math.cos(math.radians(42))
+y = (ring[:, 1] - 42) * METERS_PER_DEGREE
+area = 0.5 * abs(np.dot(x[:-1], y[1:]) - np.dot(x[1:], y[:-1]))
+assert abs(area / (math.pi * 10000.0**2) - 1) < 0.05, f"Envelope area off: {area}"
+merged = coverage_envelope(disk_lat, disk_lon, np.array([90000.0, 90000.0]), 500)
+assert len(merged["coordinates"]) == 1, "Overlapping disks should merge"
+
+# From ENVELOPE_CLIP_MIN_ZOOM on, a 1920x1080 pixel view of the default layers
+# is rasterized at the zoom tolerance rather than coarsened to the cell cap
+from app import ENVELOPE_CLIP_MIN_ZOOM, build_coverage_layer, padded_bounds
+from app import rasterize_disks
+
+default_spots = load_default_cup_file()
+default_radii = calculate_radii(20, 3500, 1000, default_spots.elevation)
+view_lat = float(np.mean(default_spots.lat))
+view_lon = float(np.mean(default_spots.lon))
+for view_zoom in (ENVELOPE_CLIP_MIN_ZOOM, ENVELOPE_CLIP_MIN_ZOOM + 2):
+    degrees_per_px = 360 / 256 / 2**view_zoom
+    half_width = 960 * degrees_per_px
+    half_height = 540 * degrees_per_px * math.cos(math.radians(view_lat))
+    view = [
+        [view_lat - half_height, view_lon - half_width],
+        [view_lat + half_height, view_lon + half_width],
+    ]
+    tolerance = app_module.envelope_tolerance_meters(view_zoom, view_lat)
+    cell_lat = rasterize_disks(
+        default_spots.lat, default_spots.lon, default_radii, tolerance
+    )[3]
+    assert cell_lat * METERS_PER_DEGREE > 1.5 * tolerance, "Whole layer is capped"
+    clip = padded_bounds(view)
+    mask, _, _, cell_lat, _ = rasterize_disks(
+        default_spots.lat, default_spots.lon, default_radii, tolerance, clip
+    )
+    assert abs(cell_lat * METERS_PER_DEGREE / tolerance - 1) < 0.01, (
+        f"Zoom {view_zoom} cells are {cell_lat * METERS_PER_DEGREE:.0f} m, "
+        f"not {tolerance:.0f} m"
+    )
+    assert max(mask.shape) <= app_module.ENVELOPE_MAX_CELLS + 3, "Clip too large"
+    layer = build_coverage_layer(
+        default_spots, "default", "landables", (20, 3500, 1000), view_zoom, clip
+    )
+    geometry = layer[0].data["features"][0]["geometry"]
+    outline_lat = [lat for polygon in geometry["coordinates"] for _, lat in polygon[0]]
+    assert clip[0] - 3 * cell_lat <= min(outline_lat), "Outline leaves the clip"
+    assert max(outline_lat) <= clip[2] + 3 * cell_lat, "Outline leaves the clip"
+
+# Panning inside the clipped box keeps the envelope; leaving it redraws
+default_key = DatasetRegistry.key_for(b"default landing spots")
+dataset_registry.put(default_key, default_spots)
+saved_rendering = app_module.ENVELOPE_RENDERING
+app_module.ENVELOPE_RENDERING = True
+try:
+    clipped = post_layer_update(
+        default_key,
+        "map.zoom",
+        {"key": default_key},
+        {"map.bounds": view, "map.zoom": view_zoom},
+    )
+    drawn = clipped["rendered-layers-store"]["data"]["layers"]["airports"]
+    assert drawn[4:] == list(padded_bounds(view)), "Clip box should be recorded"
+    nudged = [[south, west + half_width / 10] for south, west in view]
+    panned = post_layer_update(
+        default_key,
+        "map.bounds",
+        clipped["rendered-layers-store"]["data"],
+        {"map.bounds": nudged, "map.zoom": view_zoom},
+    )
+    assert "airports-layer" not in panned, "A small pan should keep the envelope"
+    moved = [[south, west + 4 * half_width] for south, west in view]
+    panned = post_layer_update(
+        default_key,
+        "map.bounds",
+        clipped["rendered-layers-store"]["data"],
+        {"map.bounds": moved, "map.zoom": view_zoom},
+    )
+    drawn = panned["rendered-layers-store"]["data"]["layers"]["airports"]
+    assert drawn[4:] == list(padded_bounds(moved)), "Leaving the box should redraw"
+finally:
+    app_module.ENVELOPE_RENDERING = saved_rendering
+print(f"✓ Coverage envelopes work: {len(ring)} points for one disk")
+
+# Test GeoJSON layers
+print("\nTesting GeoJSON layers...")
+from app import build_geojson_layer
+
+layer = build_geojson_layer(spots[:2], (20, 3500, 1000))[0]
+features = layer.data["features"]
+assert len(features) == 2, f"Expected one feature per spot: {features}"
+assert features[0]["properties"]["n"] == spots[0]["name"], "Feature name mismatch"
+assert features[0]["geometry"]["coordinates"] == [spots[0]["lon"], spots[0]["lat"]]
+assert layer.hideout["glide"] == 20, "Glide parameters should be in the hideout"
+print(f"✓ GeoJSON layers work: {len(features)} features")
+
+# Test level-of-detail clusters
+print("\nTesting level-of-detail clusters...")
+from app import LOD_MIN_ZOOM, LOD_MAX_ZOOM
+
+hierarchy = spots.clusters
+coarse, fine = hierarchy.level(LOD_MIN_ZOOM), hierarchy.level(LOD_MAX_ZOOM)
+assert len(coarse) < len(fine) <= len(spots), "Clusters should merge when zooming out"
+assert hierarchy.level(LOD_MAX_ZOOM + 1) is None, "Spots should be drawn singly"
+assert coarse.count.sum() == len(spots), "Every spot should be in one cluster"
+# A cluster circle never claims more than 2 * LOD_MAX_OFFSET beyond the range
+# of a member it stands for; members further out are drawn singly
+from app import LOD_MAX_OFFSET
+
+hills = load_default_cup_file()
+level = hills.clusters.level(LOD_MAX_ZOOM)
+parameters = (60, 12000, 1000)
+bearings = np.radians(np.arange(0, 360, 10))
+merged_rows = drawn_spots = 0
+for layer in range(3):
+    table, cluster_radii, ids = level.representatives(hills, layer, parameters)
+    assert len(set(ids.tolist())) == len(ids), "Rows should have distinct ids"
+    for row, cluster in enumerate(ids.tolist()):
+        if cluster < 0:
+            drawn_spots += 1
+            continue
+        start = level.starts[cluster]
+        members = level.members[start : start + level.count[cluster]]
+        own = calculate_radii(*parameters, hills.elevation[members])
+        merged = level.distances[start : start + len(members)] <= LOD_MAX_OFFSET * own
+        members, own = members[merged], own[merged]
+        drawn_spots += len(members)
+        merged_rows += len(members) > 1
+        assert cluster_radii[row] >= own.max(), "Cluster circle should cover members"
+        edge_lat = (
+            table.lat[row] + cluster_radii[row] * np.cos(bearings) / METERS_PER_DEGREE
+        )
+        edge_lon = table.lon[row] + cluster_radii[row] * np.sin(bearings) / (
+            METERS_PER_DEGREE * np.cos(np.radians(table.lat[row]))
+        )
+        for point in zip(edge_lat, edge_lon):
+            reach = haversine_distances(*point, hills.lat[members], hills.lon[members])
+            assert (
+                reach / own
+            ).min() <= 1 + 2 * LOD_MAX_OFFSET + 0.01, (
+                f"Cluster {cluster} claims range no member has"
+            )
+assert merged_rows > 0, "Long ranges should merge some clusters"
+assert drawn_spots == sum(
+    level.count[level.layer >= 0]
+), "Every spot should be drawn once"
+print(f"✓ Level-of-detail clusters work: {len(coarse)} clusters at zoom {LOD_MIN_ZOOM}")
+
+# Test containment pruning
+print("\nTesting containment pruning...")
+from app import find_containing_disks, prune_contained_spots
+
+disk_lat = np.array([42.0, 42.01, 42.0, 42.0])
+disk_lon = np.array([-72.0, -72.0, -71.0, -71.0])
+disk_radii = np.array([20000.0, 5000.0, 3000.0, 3000.0])
+container = find_containing_disks(disk_lat, disk_lon, disk_radii)
+assert container.tolist() == [-1, 0, -1, 2], f"Wrong containers: {container}"
+# The fixture is flat, so use the hilly default file
+hills = load_default_cup_file()
+hill_radii = calculate_radii(60, 12000, 1000, hills.elevation)
+kept, covered = prune_contained_spots(hills, np.arange(len(hills)), hill_radii)
+assert 0 < len(kept) < len(hills), "Large ranges should prune some circles"
+assert sum(map(len, covered.values())) == len(hills) - len(kept), "Lost spots"
+# Pruning depends on the glide parameters, which clientside updates never send
+clientside_pruning = run_with_settings(
+    {"GLIDEMAP_RADIUS_UPDATES": "clientside", "GLIDEMAP_PRUNE_CONTAINED": "1"},
+    "import json, app; "
+    "print(json.dumps([app.CLIENTSIDE_RADIUS_UPDATES, app.PRUNE_CONTAINED_CIRCLES]))",
+)
+assert clientside_pruning == [True, False], "Clientside updates should not prune"
+print(f"✓ Containment pruning works: kept {len(kept)} of {len(hills)} circles")
+
+# Test incremental layer updates through the Dash endpoint
+print("\nTesting incremental layer updates...")
+# Airport B's range lies inside airport A's
+nested = LandingSpotTable(["A", "B"], [42.0, 42.0], [-72.0, -71.9], [0, 2000], [5, 5])
+nested_key = DatasetRegistry.key_for(b"nested airports")
+dataset_registry.put(nested_key, nested)
+west_of_b = [[41.95, -72.3], [42.05, -72.1]]
+at_b = [[41.95, -71.95], [42.05, -71.85]]
+saved_pruning = app_module.PRUNE_CONTAINED_CIRCLES
+app_module.PRUNE_CONTAINED_CIRCLES = True
+try:
+    first = post_layer_update(
+        nested_key,
+        "layer-toggles.value",
+        {"key": nested_key},
+        {"map.bounds": west_of_b},
+    )
+    names = [
+        f["properties"]["n"]
+        for f in first["airports-layer"]["children"][0]["props"]["data"]["features"]
+    ]
+    assert names == ["A"], f"Only A reaches the western view: {names}"
+    panned = post_layer_update(
+        nested_key,
+        "map.bounds",
+        first["rendered-layers-store"]["data"],
+        {"map.bounds": at_b},
+    )
+    layer = panned["airports-layer"]["children"]
+    assert isinstance(layer, list), "A pruned layer should be redrawn, not patched"
+    feature = layer[0]["props"]["data"]["features"][0]
+    assert feature["properties"].get("c") == ["B"], "A's popup should list B"
+    again = post_layer_update(
+        nested_key,
+        "map.bounds",
+        panned["rendered-layers-store"]["data"],
+        {"map.bounds": at_b},
+    )
+    assert "airports-layer" not in again, "An unchanged pruned layer is kept"
+finally:
+    app_module.PRUNE_CONTAINED_CIRCLES = saved_pruning
+
+print("✓ Incremental layer updates keep container popups current")
+
+# Test shared render cache
+print("\nTesting render cache...")
+from app import RenderCache
+
+with tempfile.TemporaryDirectory() as cache_dir:
+    worker = RenderCache(1 << 20, cache_dir, 1 << 20)
+    builds = []
+    for _ in range(2):
+        worker.get_or_create(("layer", 1), lambda: builds.append(1) or [{"a": 1}])
+    worker.flush()
+    other_worker = RenderCache(1 << 20, cache_dir, 1 << 20)
+    shared = other_worker.get_or_create(("layer", 1), lambda: builds.append(1))
+    assert len(builds) == 1 and shared == [{"a": 1}], "Entry should be built once"
+    stats = worker.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1), f"Wrong counters: {stats}"
+    assert other_worker.stats()["disk_hits"] == 1, "Other worker should hit disk"
+    assert 0 < stats["memory_bytes"] < 20, "Entries should be sized as JSON"
+    saved_version = app_module.RENDER_CACHE_VERSION
+    app_module.RENDER_CACHE_VERSION += 1
+    try:
+        next_release = RenderCache(1 << 20, cache_dir, 1 << 20)
+        next_release.get_or_create(("layer", 1), lambda: builds.append(1))
+    finally:
+        app_module.RENDER_CACHE_VERSION = saved_version
+    assert len(builds) == 2, "Entries of another version should be rebuilt"
+    small = RenderCache(40, None)
+    for i in range(3):
+        small.get_or_create(("layer", i), lambda: ["x" * 20])
+    small.flush()
+    assert len(small) == 1 and small.nbytes <= 40, "Memory should be bounded by size"
+print(f"✓ Render cache works: {stats['disk_entries']} shared entries")
+
+# Test default CUP snapshots
+print("\nTesting default CUP snapshots...")
+from app import write_spot_snapshot, load_spot_snapshot
+
+with tempfile.TemporaryDirectory() as snapshot_dir:
+    snapshot_path = os.path.join(snapshot_dir, "default.snapshot")
+    write_spot_snapshot(snapshot_path, hills, "source")
+    mapped = load_spot_snapshot(snapshot_path, "source")
+    assert mapped.names.tolist() == hills.names.tolist(), "Names should round-trip"
+    assert np.array_equal(mapped.elevation, hills.elevation, equal_nan=True)
+    assert not mapped.lat.flags.writeable, "Coordinates should be mapped read-only"
+    box = (42.0, -72.5, 43.0, -71.0)
+    assert np.array_equal(
+        mapped.spatial_index.query_box(*box), hills.spatial_index.query_box(*box)
+    ), "Spatial index should round-trip"
+    assert load_spot_snapshot(snapshot_path, "edited") is None, "Stale snapshot"
+    del mapped
+assert load_spot_snapshot(snapshot_path, "source") is None, "Missing snapshot"
+print(f"✓ Default CUP snapshots work: {len(hills)} spots mapped")
+
+# Test hot reload of the default CUP file
+print("\nTesting default CUP file reload...")
+saved_paths = (app_module.DEFAULT_CUP_FILE_PATH, app_module.DEFAULT_SNAPSHOT_PATH)
+saved_default = dict(app_module._default_dataset)
+app_module.DEFAULT_RELOAD_SECONDS = 0
+with tempfile.TemporaryDirectory() as season_dir:
+    season_path = os.path.join(season_dir, "season.cup")
+    with open(saved_paths[0], encoding="utf-8") as f:
+        season_lines = f.read().splitlines(keepends=True)
+    with open(season_path, "w", encoding="utf-8") as f:
+        f.writelines(season_lines[:11])
+    app_module.DEFAULT_CUP_FILE_PATH = season_path
+    app_module.DEFAULT_SNAPSHOT_PATH = season_path + ".snapshot"
+    app_module._default_dataset.clear()
+    old_key = app_module.default_dataset_key()
+    assert not app_module.reload_default_dataset(), "Unchanged file reloaded"
+    with open(season_path, "w", encoding="utf-8") as f:
+        f.writelines(season_lines)
+    os.utime(season_path, ns=(0, 0))
+    assert app_module.reload_default_dataset(), "Edited file should be reloaded"
+    new_key = app_module.default_dataset_key()
+    assert new_key != old_key, "Default key should change"
+    assert len(app_module.dataset_registry.get(old_key)) == 10, "Old table lost"
+    assert len(app_module.dataset_registry.get(new_key)) == len(hills), "New table"
+app_module.DEFAULT_CUP_FILE_PATH, app_module.DEFAULT_SNAPSHOT_PATH = saved_paths
+app_module._default_dataset.clear()
+app_module._default_dataset.update(saved_default)
+print("✓ Default CUP file reload works")
+
+# Test background uploads through the DiskcacheManager callback
+print("\nTesting background uploads...")
+job_dependency = next(
+    d for d in dependencies if d["inputs"][0]["id"] == "upload-job-store"
+)
+header, *waypoints = fixture_content.splitlines(keepends=True)
+waypoints = [line for line in waypoints if not line.startswith("-----")][:40]
+copies = app_module.BACKGROUND_UPLOAD_MIN_BYTES // len("".join(waypoints).encode()) + 1
+large_bytes = (header + "".join(waypoints) * copies).encode("utf-8")
+large_url = "data:text/plain;base64," + base64.b64encode(large_bytes).decode()
+assert len(large_url) >= app_module.BACKGROUND_UPLOAD_MIN_BYTES, "Upload too small"
+job_body = {
+    "output": job_dependency["output"],
+    "outputs": [
+        dict(zip(("id", "property"), output.rsplit(".", 1)))
+        for output in job_dependency["output"].strip(".").split("...")
+    ],
+    "inputs": [{**job_dependency["inputs"][0], "value": large_url}],
+    "state": [{**job_dependency["state"][0], "value": "large.cup"}],
+    "changedPropIds": ["upload-job-store.data"],
+}
+job = client.post("/_dash-update-component", json=job_body).get_json()
+assert "cacheKey" in job and "job" in job, f"Upload should start a job: {job}"
+job_url = f"/_dash-update-component?cacheKey={job['cacheKey']}&job={job['job']}"
+deadline = time.monotonic() + 60
+result = {}
+while "response" not in result and time.monotonic() < deadline:
+    time.sleep(0.2)
+    result = client.post(job_url, json=job_body).get_json() or {}
+assert "response" in result, "Background upload did not finish"
+job_key = result["response"]["landing-spots-store"]["data"]
+assert job_key == DatasetRegistry.key_for(large_url), "Store should hold the key"
+assert len(dataset_registry.get(job_key)) == len(waypoints) * copies, "Lost spots"
+job_status = result["response"]["upload-status"]["children"]["props"]
+assert job_status["className"] == "text-success", f"Wrong status: {job_status}"
+assert "from large.cup" in job_status["children"], f"Wrong status: {job_status}"
+print(f"✓ Background uploads work: {len(large_bytes):,} bytes parsed in a job")
+
+# Test chunked base64 uploads
+print("\nTesting chunked upload decoding...")
+from app import Base64Stream
+
+with open(fixture_path, "rb") as f:
+    fixture_bytes = f.read()
+data_url = "data:text/plain;base64," + base64.b64encode(fixture_bytes).decode()
+start = data_url.index(",") + 1
+chunked = io.BufferedReader(Base64Stream(data_url, start, chunk_chars=102))
+assert chunked.read() == fixture_bytes, "Chunked decoding should match the file"
+assert parse_cup_file(data_url).to_records() == spots.to_records(), "Upload parse"
+assert DatasetRegistry.key_for(data_url) == DatasetRegistry.key_for(
+    data_url.split(",", 1)[1].encode()
+), "Chunked hashing should match hashing the payload"
+saved_limit = app_module.UPLOAD_MAX_BYTES
+app_module.UPLOAD_MAX_BYTES = len(fixture_bytes) - 1
+try:
+    parse_cup_file(data_url)
+    assert False, "Oversized upload should be rejected"
+except ValueError as e:
+    assert "too large" in str(e), f"Wrong error: {e}"
+finally:
+    app_module.UPLOAD_MAX_BYTES = saved_limit
+print(f"✓ Chunked upload decoding works: {len(fixture_bytes)} bytes")
+
+# Test callback metrics
+print("\nTesting callback metrics...")
+from app import CallbackMetrics
+
+metrics = CallbackMetrics(buckets=(0.1, 1))
+metrics.observe("load_cup_file", 0.05, spots=10, parse_errors=1)
+metrics.observe("load_cup_file", 0.5, spots=5)
+text = metrics.render()
+assert 'le="0.1"} 1' in text and 'le="1"} 2' in text, "Histogram buckets wrong"
+assert 'glidemap_callback_spots_total{callback="load_cup_file"' in text
+assert text.split("glidemap_callback_spots_total{")[1].split("\n")[0].endswith(" 15")
+post_layer_update(None, "landing-spots-store.data")
+response = client.get("/metrics")
+assert response.status_code == 200, "Metrics endpoint should respond"
+text = response.get_data(as_text=True)
+assert 'callback="update_map_layers"' in text
+if app_module.job_metrics is not None:
+    # The background upload above ran in a job process
+    assert 'callback="load_large_cup_file",pid="jobs"' in text, "Job metrics missing"
+    jobs = app_module.job_metrics.snapshot()["load_large_cup_file"]
+    assert jobs["calls"] >= 1 and jobs["spots"] > 0, "Job counters missing"
+print("✓ Callback metrics work")
+
+# Test dataset memory budgets and memory tracing
+print("\nTesting dataset memory budgets...")
+from app import DatasetBudget, start_memory_trace, finish_memory_trace
+
+batches = [spots[i : i + 10] for i in range(0, len(spots), 10)]
+whole = DatasetBudget(spots.nbytes * 2).collect(batches)
+assert whole.to_records() == spots.to_records(), "Within budget keeps every spot"
+try:
+    DatasetBudget(spots.nbytes // 3).collect(batches)
+    assert False, "Over-budget dataset should be rejected"
+except ValueError as e:
+    assert "dataset limit" in str(e), f"Wrong error: {e}"
+budget = DatasetBudget(spots.nbytes // 3, downsample=True)
+thinned = budget.collect(batches)
+assert budget.stride >= 4 and budget.spots_read == len(spots), "Wrong downsampling"
+assert thinned.nbytes <= spots.nbytes // 3, "Downsampled table over budget"
+assert thinned.to_records() == spots[:: budget.stride].to_records(), "Uneven thinning"
+assert thinned.sampling == (len(spots), budget.stride), "Sampling not recorded"
+assert whole.sampling is None, "Complete table should not be marked as sampled"
+# A downsampled upload keeps its notice when served from the registry or disk
+saved = app_module.dataset_registry, app_module.DATASET_MAX_BYTES
+saved_downsample = app_module.DATASET_DOWNSAMPLE
+with tempfile.TemporaryDirectory() as spill_dir:
+    app_module.dataset_registry = DatasetRegistry(1 << 30, spill_dir)
+    app_module.DATASET_MAX_BYTES = spots.nbytes // 3
+    app_module.DATASET_DOWNSAMPLE = True
+    try:
+        notices = [app_module.register_upload(data_url, "big.cup")[1] for _ in "ab"]
+        reloaded = DatasetRegistry(1 << 30, spill_dir).get(
+            DatasetRegistry.key_for(data_url)
+        )
+    finally:
+        app_module.dataset_registry, app_module.DATASET_MAX_BYTES = saved
+        app_module.DATASET_DOWNSAMPLE = saved_downsample
+assert notices[0].children == notices[1].children, "Cached upload lost its notice"
+assert "one in" in notices[1].children and notices[1].className == "text-warning"
+assert reloaded.sampling == (len(spots), budget.stride), "Sampling not spilled"
+saved_tracing = app_module.MEMORY_TRACING
+app_module.MEMORY_TRACING = True
+try:
+    outer = start_memory_trace("outer")
+    inner = start_memory_trace("inner")
+    block = bytearray(1 << 20)
+    inner_peak, _ = finish_memory_trace(inner)
+    del block
+    outer_peak, outer_retained = finish_memory_trace(outer)
+finally:
+    app_module.MEMORY_TRACING = saved_tracing
+    tracemalloc.stop()
+assert inner_peak >= 1 << 20 and outer_peak >= inner_peak, "Peak not carried over"
+assert outer_retained < 1 << 20, "Freed block should not be retained"
+print(f"✓ Dataset budgets work: kept one in {budget.stride} spots")
+
+# Test terrain-aware reach
+print("\nTesting terrain reach...")
+from app import (
+    ElevationModel,
+    compute_terrain_reach,
+    reach_polygon,
+    terrain_reach_cache,
+    terrain_reach_distances,
+)
+
+with tempfile.TemporaryDirectory() as dem_dir:
+    # Flat tile with a 600 m ridge from 42.54 to 42.56 N
+    tile = np.zeros((121, 121), dtype=">i2")
+    tile[53:56, :] = 600
+    tile[0, 0] = -32768
+    tile.tofile(os.path.join(dem_dir, "N42W072.hgt"))
+    model = ElevationModel(dem_dir)
+    heights = model.elevations(
+        [42.55, 42.2, 42.999, 41.5], [-71.5, -71.5, -72.0, -71.5]
+    )
+    assert heights[:2].tolist() == [600, 0], f"Wrong DEM lookup: {heights}"
+    assert np.isnan(heights[2:]).all(), "Voids and missing tiles should be NaN"
+
+    parameters = (20, 3500, 1000)
+    reach = terrain_reach_distances(
+        dem_dir,
+        np.array([42.5, 42.2]),
+        np.array([-71.5, -71.5]),
+        np.zeros(2),
+        parameters,
+    )
+    plain = calculate_radii(*parameters, np.zeros(1))[0]
+    assert reach.shape == (2, app_module.TERRAIN_RADIALS), "One reach per radial"
+    assert reach[0, 0] < 0.6 * plain, "The ridge should block the northern glide"
+    assert plain - app_module.TERRAIN_STEP_M <= reach[0, 36] <= plain, "South is open"
+    assert (reach[1] >= plain - app_module.TERRAIN_STEP_M).all(), "Flat terrain"
+    ring = reach_polygon(42.5, -71.5, reach[0])
+    assert len(ring) == len(reach[0]) + 1 and ring[0] == ring[-1], "Unclosed ring"
+
+    spots_near = LandingSpotTable(
+        ["A", "B"], [42.5, 42.2], [-71.5, -71.5], [0, 0], [5, 5]
+    )
+    saved_workers = app_module.TERRAIN_WORKERS
+    app_module.TERRAIN_WORKERS = 0
+    try:
+        cached = compute_terrain_reach(spots_near, parameters, dem_dir)
+        entries = len(terrain_reach_cache)
+        assert np.allclose(cached, reach), "Pooled reach should match"
+        assert np.allclose(
+            compute_terrain_reach(spots_near, parameters, dem_dir), reach
+        )
+        assert len(terrain_reach_cache) == entries, "Repeat should use the cache"
+    finally:
+        app_module.TERRAIN_WORKERS = saved_workers
+
+    # Walking the radials a few samples at a time gives the same reach
+    saved_steps = app_module.TERRAIN_CHUNK_STEPS
+    app_module.TERRAIN_CHUNK_STEPS = 3
+    try:
+        stepped = terrain_reach_distances(
+            dem_dir, spots_near.lat, spots_near.lon, np.zeros(2), parameters
+        )
+    finally:
+        app_module.TERRAIN_CHUNK_STEPS = saved_steps
+    assert np.array_equal(stepped, reach), "Chunked radials should match"
+
+    # One spot per chunk goes through the process pool. It is forked here,
+    # since spawned workers would re-run this script
+    pooled_parameters = (25, 4000, 1000)
+    saved_chunk = app_module.TERRAIN_CHUNK_SITES
+    app_module.TERRAIN_CHUNK_SITES = 1
+    pool = ProcessPoolExecutor(2, mp_context=multiprocessing.get_context("fork"))
+    app_module._terrain_pool["executor"] = pool
+    try:
+        pooled = compute_terrain_reach(spots_near, pooled_parameters, dem_dir)
+        assert pool._processes, "Reach should be computed in the pool"
+    finally:
+        app_module.TERRAIN_CHUNK_SITES = saved_chunk
+        app_module._terrain_pool.pop("executor", None)
+        pool.shutdown()
+    assert np.array_equal(
+        pooled,
+        terrain_reach_distances(
+            dem_dir, spots_near.lat, spots_near.lon, np.zeros(2), pooled_parameters
+        ),
+    ), "Pooled reach should match the in-process reach"
+print(f"✓ Terrain reach works: {reach[0, 0] / 1000:.1f} km north of a ridge")
+
 # Test app structure
 print("\nTesting app structure...")
 from app import app